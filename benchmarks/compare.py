@@ -0,0 +1,78 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+"""
+Compares two results files written by run.py, and exits with status 1 if any stage regressed.
+
+    python benchmarks/compare.py results/old.json results/new.json --threshold 0.2
+
+A stage regresses if it became slower by more than the threshold (a fraction of the old time), or if its peak traced
+memory grew by more than the threshold. Stages faster than `--min-seconds` in both runs are too noisy to compare.
+"""
+
+import sys
+import json
+import argparse
+
+
+def compare(old, new, threshold=0.2, min_seconds=0.01):
+    """
+    Returns a list of (stage, old seconds, new seconds, ratio, regressed) rows for the stages in both results, and a
+    list of warnings about runs that are not comparable.
+    """
+    warnings = []
+    if old.get("config", {}).get("synthetic") != new.get("config", {}).get("synthetic") or \
+            old.get("config", {}).get("repo") != new.get("config", {}).get("repo"):
+        warnings.append("The runs used different repositories.")
+    if old.get("config", {}).get("trace_memory") != new.get("config", {}).get("trace_memory"):
+        warnings.append("Only one run traced memory, so its times are not comparable.")
+    rows = []
+    for name, stage in new["stages"].items():
+        if name not in old["stages"]:
+            continue
+        before = old["stages"][name]
+        ratio = stage["seconds"] / before["seconds"] if before["seconds"] > 0 else float("inf")
+        regressed = max(stage["seconds"], before["seconds"]) >= min_seconds and ratio > 1 + threshold
+        if before.get("peak_traced_mb") and stage.get("peak_traced_mb"):
+            if stage["peak_traced_mb"] > before["peak_traced_mb"] * (1 + threshold):
+                regressed = True
+        rows.append((name, before["seconds"], stage["seconds"], ratio, regressed))
+    return rows, warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two gitnet benchmark results.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="ignore stages faster than this")
+    args = parser.parse_args(argv)
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows, warnings = compare(old, new, args.threshold, args.min_seconds)
+    for warning in warnings:
+        print("Warning: {}".format(warning))
+    print("{:<20} {:>10} {:>10} {:>8}".format("stage", "old", "new", "ratio"))
+    for name, before, after, ratio, regressed in rows:
+        print("{:<20} {:>10.4f} {:>10.4f} {:>8.2f}{}".format(name, before, after, ratio,
+                                                           "  REGRESSED" if regressed else ""))
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+"""
+Measures the time taken by `import gitnet` in fresh interpreters, and lists the optional heavy dependencies that the
+import loaded. Results are written in the format of run.py, so they can be compared with compare.py.
+
+    python benchmarks/import_time.py --repeat 10 --output import.json
+"""
+
+import os
+import sys
+import json
+import platform
+import argparse
+import datetime
+import subprocess as sub
+
+# Dependencies which should only be imported when a feature needing them is used.
+HEAVY = ["pandas", "matplotlib", "pygraphviz", "scipy"]
+
+SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import gitnet
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY,)
+
+
+def measure(repeat=5):
+    """
+    Imports gitnet in `repeat` fresh interpreters, and returns the times and the heavy modules loaded.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = root + os.pathsep + env.get("PYTHONPATH", "")
+    runs = []
+    loaded = set()
+    for i in range(repeat):
+        out = sub.check_output([sys.executable, "-c", SCRIPT], env=env)
+        result = json.loads(out.decode("utf-8").strip().splitlines()[-1])
+        runs.append(round(result["seconds"], 6))
+        loaded.update(result["loaded"])
+    return runs, sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time `import gitnet` in fresh interpreters.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+    runs, loaded = measure(args.repeat)
+    runs_sorted = sorted(runs)
+    print("import gitnet: best {:.4f}s, median {:.4f}s over {} runs".format(runs_sorted[0],
+                                                                           runs_sorted[len(runs) // 2], len(runs)))
+    print("Heavy dependencies loaded: {}".format(", ".join(loaded) if loaded else "none"))
+    if args.output is not None:
+        report = {"format_version": 1,
+                  "created": datetime.datetime.now().isoformat(),
+                  "python": platform.python_version(),
+                  "platform": platform.platform(),
+                  "config": {"repeat": args.repeat, "import": True},
+                  "stages": {"import_gitnet": {"runs": runs, "seconds": runs_sorted[0], "loaded": loaded,
+                                               "peak_traced_mb": None, "max_rss_mb": None}}}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Wrote {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+"""
+Times the built in force layout on networks of a given size whose nodes are spread evenly, or packed into a few
+dense clusters. Repulsion is approximated on a grid, so both should take time roughly linear in the number of nodes;
+a clustered network much slower than a uniform one points to pairwise work within crowded grid cells.
+
+    python benchmarks/layout.py --nodes 20000 50000 --iterations 10 --output layout.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import datetime
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitnet.layout import _run
+
+
+def positions(n, clustered, rng):
+    """
+    Returns starting positions for n nodes: uniform over a square, or with 90% of the nodes in three tight clusters.
+    """
+    if not clustered:
+        return rng.uniform(-100, 100, (n, 2))
+    packed = int(n * 0.9)
+    centres = rng.uniform(-100, 100, (3, 2))
+    x = rng.uniform(-100, 100, (n, 2))
+    x[:packed] = centres[rng.randint(0, 3, packed)] + rng.normal(scale=0.01, size=(packed, 2))
+    return x
+
+
+def edges(n, rng):
+    """Returns random (source, destination) arrays with two edges per node."""
+    src = rng.randint(0, n, 2 * n)
+    dst = rng.randint(0, n, 2 * n)
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the force layout on uniform and clustered networks.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[5000, 20000, 80000])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each case; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+    timings = {}
+    print("{:<24} {:>10} {:>14}".format("case", "seconds", "us/node/iter"))
+    for n in args.nodes:
+        for clustered in [False, True]:
+            name = "layout_{}_{}".format("clustered" if clustered else "uniform", n)
+            runs = []
+            for i in range(args.repeat):
+                rng = np.random.RandomState(args.seed)
+                x = positions(n, clustered, rng)
+                src, dst = edges(n, rng)
+                mass = 1.0 + np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+                start = time.perf_counter()
+                _run(x, src, dst, np.ones(len(src)), mass, args.iterations, 0.1)
+                runs.append(round(time.perf_counter() - start, 6))
+            timings[name] = {"runs": runs, "seconds": min(runs), "peak_traced_mb": None, "max_rss_mb": None}
+            print("{:<24} {:>10.4f} {:>14.2f}".format(name, min(runs), min(runs) / n / args.iterations * 1e6))
+    if args.output is not None:
+        report = {"format_version": 1,
+                  "created": datetime.datetime.now().isoformat(),
+                  "python": platform.python_version(),
+                  "platform": platform.platform(),
+                  "config": {"iterations": args.iterations, "repeat": args.repeat, "seed": args.seed},
+                  "stages": timings}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Wrote {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
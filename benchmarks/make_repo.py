@@ -0,0 +1,139 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+"""
+Generates synthetic git repositories for benchmarking gitnet.
+
+Commits are streamed to `git fast-import`, which writes a repository of tens of thousands of commits in seconds. The
+same settings and seed always give the same history, so results for different versions of gitnet are comparable.
+
+    python benchmarks/make_repo.py /tmp/bench_repo --commits 10000 --authors 50
+"""
+
+import os
+import bisect
+import random
+import itertools
+import argparse
+import subprocess as sub
+
+WORDS = ["fix", "add", "remove", "update", "refactor", "test", "docs", "parser", "network", "graph", "log", "commit",
+         "author", "file", "edge", "node", "filter", "merge", "bug", "feature", "cleanup", "typo", "release", "build"]
+
+# Timezone offsets given to the authors, in turn.
+OFFSETS = ["-0400", "+0000", "+0100", "-0700", "+0530", "+0900"]
+
+
+def make_repo(path, commits=1000, authors=20, files=200, files_per_commit=3, message_length=60, seed=0):
+    """
+    Creates a git repository with a synthetic history.
+
+    **Parameters** :
+
+    > *path* : `string`
+
+    >> The directory of the new repository. It must not exist, or be empty.
+
+    > *commits* : `int`
+
+    >> The number of commits.
+
+    > *authors* : `int`
+
+    >> The number of distinct authors, who commit in a skewed (Zipf-like) proportion.
+
+    > *files* : `int`
+
+    >> The number of distinct file paths.
+
+    > *files_per_commit* : `int`
+
+    >> The largest number of files changed by a commit. Each commit changes between one and this many files.
+
+    > *message_length* : `int`
+
+    >> The approximate length of each commit message, in characters.
+
+    > *seed* : `int`
+
+    >> The random seed.
+
+    **Return** : `string`
+
+    > The path of the repository.
+
+    """
+    rng = random.Random(seed)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    if os.listdir(path):
+        raise ValueError("{} is not empty.".format(path))
+    sub.check_call(["git", "init", "-q", path])
+    paths = ["{}/{}/module_{}.py".format(rng.choice(WORDS), rng.choice(WORDS), i) for i in range(files)]
+    cumulative = list(itertools.accumulate(1.0 / (i + 1) for i in range(authors)))
+    sizes = {}
+    start = 1262304000  # 2010-01-01 00:00:00 UTC
+    proc = sub.Popen(["git", "fast-import", "--quiet"], cwd=path, stdin=sub.PIPE)
+    out = proc.stdin
+    for i in range(commits):
+        author = bisect.bisect(cumulative, rng.random() * cumulative[-1])
+        timestamp = start + i * 3600 + rng.randint(0, 3599)
+        words = []
+        while sum(len(w) + 1 for w in words) < message_length:
+            words.append(rng.choice(WORDS))
+        message = " ".join(words).capitalize().encode("utf-8")
+        lines = ["commit refs/heads/master",
+                 "mark :{}".format(i + 1),
+                 "author Author {0} <author{0}@example{1}.org> {2} {3}".format(author, author % 7, timestamp,
+                                                                             OFFSETS[author % len(OFFSETS)]),
+                 "committer Author {0} <author{0}@example{1}.org> {2} {3}".format(author, author % 7, timestamp,
+                                                                                OFFSETS[author % len(OFFSETS)]),
+                 "data {}".format(len(message))]
+        out.write("\n".join(lines).encode("utf-8") + b"\n" + message + b"\n")
+        if i > 0:
+            out.write("from :{}\n".format(i).encode("utf-8"))
+        for name in rng.sample(paths, rng.randint(1, min(files_per_commit, files))):
+            # Each change rewrites the file with a few lines more or less than before, up to 100 lines.
+            size = min(100, max(1, sizes.get(name, 0) + rng.randint(-5, 20)))
+            sizes[name] = size
+            content = "".join("line {} of {}\n".format(rng.randint(0, size), name) for j in range(size))
+            content = content.encode("utf-8")
+            out.write("M 100644 inline {}\ndata {}\n".format(name, len(content)).encode("utf-8") + content + b"\n")
+        out.write(b"\n")
+    out.close()
+    if proc.wait() != 0:
+        raise RuntimeError("git fast-import failed for {}.".format(path))
+    sub.check_call(["git", "reset", "-q", "--hard"], cwd=path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic git repository for benchmarking gitnet.")
+    parser.add_argument("path", help="directory of the new repository")
+    parser.add_argument("--commits", type=int, default=1000)
+    parser.add_argument("--authors", type=int, default=20)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--files-per-commit", type=int, default=3)
+    parser.add_argument("--message-length", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    make_repo(args.path, commits=args.commits, authors=args.authors, files=args.files,
+              files_per_commit=args.files_per_commit, message_length=args.message_length, seed=args.seed)
+    print("Created {} commits in {}".format(args.commits, args.path))
+
+
+if __name__ == "__main__":
+    main()
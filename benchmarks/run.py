@@ -0,0 +1,207 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+"""
+Times each stage of the gitnet pipeline on a synthetic (or given) repository, and writes the results as JSON.
+
+    python benchmarks/run.py --commits 10000 --repeat 3 --output results/new.json
+    python benchmarks/compare.py results/old.json results/new.json
+
+Each stage is run `--repeat` times, and the fastest run is reported. The peak resident memory of the process is
+recorded after each stage; with `--trace-memory`, the peak memory allocated by Python during each stage is recorded as
+well (this slows every stage down, so its times are not comparable with those of untraced runs).
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import datetime
+import warnings
+import tracemalloc
+import contextlib
+import subprocess as sub
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gitnet
+from gitnet.get_log import retrieve_commits, parse_commits
+from make_repo import make_repo
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FORMAT_VERSION = 1
+
+
+def max_rss_mb():
+    """
+    Returns the peak resident memory of the process in megabytes, or None where it is not available.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    if sys.platform == "darwin":
+        return rss / 1048576
+    return rss / 1024
+
+
+def gitnet_commit():
+    """
+    Returns the git commit of the gitnet source being benchmarked, or None if it is not in a git repository.
+    """
+    try:
+        out = sub.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(gitnet.__file__),
+                               stderr=sub.DEVNULL)
+        return out.decode("utf-8").strip()
+    except (OSError, sub.CalledProcessError):
+        return None
+
+
+def stages(repo, workdir):
+    """
+    Yields (name, function) pairs for the benchmarked stages, in order. Each function takes the results of the earlier
+    stages as a dictionary, and returns its own result, which is stored under its name.
+    """
+    def out(name):
+        return os.path.join(workdir, name)
+
+    def top_author(r):
+        return r["annotate"].top("author", 1)[0][1]
+
+    yield "retrieve_commits", lambda r: retrieve_commits(repo, "stat")
+    yield "parse_commits", lambda r: parse_commits(r["retrieve_commits"])
+    yield "annotate", lambda r: gitnet.CommitLog(dofd=r["parse_commits"], source="local git", path=repo,
+                                                 key_type="hash")
+    yield "filter_author", lambda r: r["annotate"].filter("author", "equals", top_author(r))
+    yield "filter_date", lambda r: r["annotate"].filter("date", "since", "Sat Jan 01 00:00:00 2011 -0500")
+    yield "describe", lambda r: r["annotate"].describe()
+    yield "generate_network", lambda r: r["annotate"].network("author/file/weighted")
+    yield "collapse_edges", lambda r: r["generate_network"].collapse_edges(sum_weights=True)
+    yield "write_tsv", lambda r: r["annotate"].tsv(out("log.tsv"))
+    yield "write_file_changes", lambda r: r["annotate"].write_file_changes(out("changes.tsv"))
+    yield "write_edges", lambda r: r["annotate"].write_edges(out("edges.txt"), "author", "files")
+    yield "write_nodes", lambda r: r["annotate"].write_nodes(out("nodes.txt"), "author", "files")
+    yield "write_graphml", lambda r: r["collapse_edges"].write_graphml(out("network.graphml"))
+    yield "write_tnet", lambda r: r["generate_network"].write_tnet(out("network.tnet"), weighted=True)
+
+
+def run_stage(function, results, trace_memory):
+    """
+    Runs one stage with its printed output and warnings discarded, and returns its result, time and peak traced
+    memory.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        result = function(results)
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1048576
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark(repo, repeat=1, trace_memory=False, only=None):
+    """
+    Runs the stages on a repository, and returns a dictionary of results for each stage.
+    """
+    timings = {}
+    workdir = tempfile.mkdtemp(prefix="gitnet_bench_")
+    try:
+        for i in range(repeat):
+            results = {}
+            for name, function in stages(repo, workdir):
+                result, seconds, peak = run_stage(function, results, trace_memory)
+                results[name] = result
+                if only and name not in only:
+                    continue
+                stage = timings.setdefault(name, {"runs": [], "peak_traced_mb": None})
+                stage["runs"].append(round(seconds, 6))
+                stage["max_rss_mb"] = max_rss_mb()
+                if peak is not None:
+                    stage["peak_traced_mb"] = max(peak, stage["peak_traced_mb"] or 0)
+    finally:
+        shutil.rmtree(workdir)
+    for stage in timings.values():
+        stage["seconds"] = min(stage["runs"])
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the stages of the gitnet pipeline.")
+    parser.add_argument("--repo", help="benchmark an existing repository instead of generating one")
+    parser.add_argument("--commits", type=int, default=5000)
+    parser.add_argument("--authors", type=int, default=50)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--files-per-commit", type=int, default=5)
+    parser.add_argument("--message-length", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each stage; the fastest is reported")
+    parser.add_argument("--trace-memory", action="store_true", help="record the peak Python allocations per stage")
+    parser.add_argument("--stage", action="append", help="only report this stage (may be given more than once)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    config = {"repeat": args.repeat, "trace_memory": args.trace_memory}
+    generated = None
+    if args.repo is not None:
+        repo = os.path.abspath(args.repo)
+        config["repo"] = repo
+    else:
+        repo_settings = {"commits": args.commits, "authors": args.authors, "files": args.files,
+                         "files_per_commit": args.files_per_commit, "message_length": args.message_length,
+                         "seed": args.seed}
+        config["synthetic"] = repo_settings
+        generated = tempfile.mkdtemp(prefix="gitnet_repo_")
+        repo = make_repo(generated, **repo_settings)
+    try:
+        timings = benchmark(repo, repeat=args.repeat, trace_memory=args.trace_memory, only=args.stage)
+    finally:
+        if generated is not None:
+            shutil.rmtree(generated)
+
+    report = {"format_version": FORMAT_VERSION,
+              "created": datetime.datetime.now().isoformat(),
+              "gitnet_commit": gitnet_commit(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "config": config,
+              "stages": timings}
+    print("{:<20} {:>10} {:>12} {:>12}".format("stage", "seconds", "max rss MB", "traced MB"))
+    for name, stage in timings.items():
+        traced = "" if stage["peak_traced_mb"] is None else "{:.1f}".format(stage["peak_traced_mb"])
+        rss = "" if stage["max_rss_mb"] is None else "{:.1f}".format(stage["max_rss_mb"])
+        print("{:<20} {:>10.4f} {:>12} {:>12}".format(name, stage["seconds"], rss, traced))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Wrote {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,15 @@
 # If not, see <http://www.gnu.org/licenses/>.
 # *********************************************************************************************
 
+import logging
+
 from .get_log import get_log
 from .exceptions import RepositoryError, ParseError, InputError
 from .log import Log
 from .commit_log import CommitLog
-from .helpers import net_edges_simple, net_edges_changes, node_colours
+from .helpers import net_edges_simple, net_edges_changes, net_edges_repo_changes, node_colours
 from .multigraph import MultiGraphPlus
+from .instrument import enable_logging
+
+# gitnet is quiet unless the application configures logging, or calls enable_logging.
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,362 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+"""
+The `gitnet` command, which retrieves the logs of many repositories in a pool of worker processes and exports each one
+in the requested formats:
+
+    gitnet ~/src/* --format tsv --format graphml --output exports --cache ~/.cache/gitnet --incremental
+
+Failures of single repositories (e.g. a path which is not a Git repository) are reported, and the other repositories
+are still processed. A throughput summary is printed at the end, and the exit status is 1 if any repository failed.
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import itertools
+import multiprocessing
+import subprocess as sub
+from gitnet.exceptions import RepositoryError, InputError
+from gitnet.commit_log import CommitLog
+from gitnet.get_log import get_log
+from gitnet.helpers import net_edges_simple, net_edges_changes
+from gitnet.instrument import enable_logging
+from gitnet.storage import write_store
+
+FORMATS = ["tsv", "edges", "graphml", "binary"]
+NETWORKS = ["author/file", "author/file/simple", "author/file/weighted"]
+
+
+def repo_head(path):
+    """
+    Returns the hash of the HEAD commit of a repository, raising a `RepositoryError` if there is none.
+    """
+    try:
+        out = sub.check_output(["git", "rev-parse", "--verify", "HEAD"], cwd=path, stderr=sub.DEVNULL)
+    except (OSError, sub.CalledProcessError):
+        raise RepositoryError("{} is not a Git repository with commits.".format(path))
+    return out.decode("utf-8").strip()
+
+
+def cache_entry(cache, path, mode):
+    """
+    Returns the directory in `cache` which holds the store of a repository's log for a retrieval mode.
+    """
+    path = os.path.abspath(path)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache, "{}-{}-{}".format(os.path.basename(path), digest, mode))
+
+
+def _cached_head(entry):
+    try:
+        with open(os.path.join(entry, "HEAD")) as f:
+            return f.read().strip()
+    except (OSError, IOError):
+        return None
+
+
+def _is_ancestor(path, old, new):
+    return sub.call(["git", "merge-base", "--is-ancestor", old, new], cwd=path,
+                    stdout=sub.DEVNULL, stderr=sub.DEVNULL) == 0
+
+
+def _write_update(path, mode, entry, tmp, cached_head, head):
+    # Newly retrieved commits come first, as in git log, followed by the cached ones.
+    new = get_log(path, mode, revisions="{}..{}".format(cached_head, head))
+    old = CommitLog.from_mmap(entry)
+    records = itertools.chain(new.collection.items(),
+                              ((key, record) for key, record in old.collection.items() if key not in new.collection))
+    meta = {"source": old.source,
+            "path": old.path,
+            "key_type": old.key_type,
+            "filters": []}
+    write_store(tmp, records, meta)
+
+
+def load_log(path, mode="stat", cache=None, incremental=False, refresh=False):
+    """
+    Retrieves the `CommitLog` of a repository, using a cache of memory-mapped stores (see `Log.to_mmap`) if given.
+
+    **Parameters** :
+
+    > *path* : `string`
+
+    >> The path of the Git repository.
+
+    > *mode* : `string`
+
+    >> The retrieval mode, as in `get_log`.
+
+    > *cache* : `None` or `string`
+
+    >> A directory of cached logs. A cached log is used as it is if the repository's HEAD has not moved since it was
+    >> stored; otherwise the log is retrieved again, and the cache is updated.
+
+    > *incremental* : `bool`
+
+    >> If True, and the cached HEAD is an ancestor of the current HEAD, only the new commits are retrieved and added to
+    >> the cached log. Otherwise (e.g. after a rebase) the whole log is retrieved.
+
+    > *refresh* : `bool`
+
+    >> If True, the cached log is ignored and replaced.
+
+    **Return** : `tuple`
+
+    > The `CommitLog`, and how it was obtained: "retrieved", "cached" or "updated".
+
+    """
+    head = repo_head(path)
+    if cache is None:
+        return get_log(path, mode), "retrieved"
+    entry = cache_entry(cache, path, mode)
+    cached_head = None if refresh else _cached_head(entry)
+    if cached_head == head:
+        return CommitLog.from_mmap(entry), "cached"
+    # The new store is written beside the old one and moved into place, so that an interrupted run leaves a usable
+    # cache, and the old store can be read while the new one is written.
+    tmp = entry + ".tmp"
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    if incremental and cached_head is not None and _is_ancestor(path, cached_head, head):
+        _write_update(path, mode, entry, tmp, cached_head, head)
+        how = "updated"
+    else:
+        get_log(path, mode, store=tmp)
+        how = "retrieved"
+    with open(os.path.join(tmp, "HEAD"), "w") as f:
+        f.write(head + "\n")
+    if os.path.isdir(entry):
+        shutil.rmtree(entry)
+    os.rename(tmp, entry)
+    return CommitLog.from_mmap(entry), how
+
+
+def process_repo(task):
+    """
+    Retrieves and exports the log of one repository, and returns a dictionary describing the result. Run by the
+    workers of `run_batch`, so any error (from gitnet, git, parsing or writing files) is returned rather than raised,
+    and cannot stop the other repositories of a batch.
+
+    **Parameters** :
+
+    > *task* : `tuple`
+
+    >> The path of the repository, the name used for its output files, and a dictionary of options (the keyword
+    >> arguments of `run_batch`).
+
+    **Return** : `dict`
+
+    > The repository's path and name, the number of commits and edges, the seconds taken, how the log was obtained (see
+    > `load_log`), the files written, and an error message (None if it succeeded).
+
+    """
+    path, name, options = task
+    result = {"path": path, "name": name, "commits": 0, "edges": 0, "seconds": 0, "how": None, "outputs": [],
+              "error": None}
+    start = time.perf_counter()
+    try:
+        log, result["how"] = load_log(path, options["mode"], options["cache"], options["incremental"],
+                                      options["refresh"])
+        result["commits"] = len(log)
+        out = options["output"]
+        formats = options["formats"]
+        weighted = options["network"] == "author/file/weighted"
+        if "tsv" in formats:
+            fname = os.path.join(out, name + ".tsv")
+            log.tsv(fname)
+            result["outputs"].append(fname)
+        if "edges" in formats:
+            fname = os.path.join(out, name + "_edges.txt")
+            if weighted:
+                log.write_edges(fname, "author", "files", helper=net_edges_changes, edge_attribute=["weight", "date"])
+            else:
+                log.write_edges(fname, "author", "files", helper=net_edges_simple, edge_attribute=["hash", "date"])
+            result["outputs"].append(fname)
+        if "graphml" in formats or "binary" in formats:
+            graph = log.network(options["network"])
+            result["edges"] = graph.number_of_edges()
+            if "graphml" in formats:
+                fname = os.path.join(out, name + ".graphml")
+                graph.write_graphml(fname)
+                result["outputs"].append(fname)
+            if "binary" in formats:
+                fname = os.path.join(out, name + ".npz")
+                graph.save(fname)
+                result["outputs"].append(fname)
+    except Exception as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def output_names(paths):
+    """
+    Returns a name for the output files of each repository: the name of its directory, followed by a short hash of
+    its path when several repositories have the same name.
+    """
+    paths = [os.path.abspath(p) for p in paths]
+    names = [os.path.basename(p.rstrip(os.sep)) or "repo" for p in paths]
+    for i, name in enumerate(names):
+        if names.count(name) > 1:
+            names[i] = "{}-{}".format(name, hashlib.sha1(paths[i].encode("utf-8")).hexdigest()[:8])
+    return names
+
+
+def run_batch(paths, output=".", formats=["graphml"], network="author/file", mode="stat", cache=None,
+              incremental=False, refresh=False, jobs=None, callback=None):
+    """
+    Processes many repositories with `process_repo`, in a pool of worker processes.
+
+    **Parameters** :
+
+    > *paths* : `list`
+
+    >> The paths of the repositories. Repeated paths are processed once.
+
+    > *output* : `string`
+
+    >> The directory to write to. It is created if it does not exist.
+
+    > *formats* : `list`
+
+    >> The formats to export: "tsv" (`Log.tsv`), "edges" (`Log.write_edges`), "graphml"
+    >> (`MultiGraphPlus.write_graphml`) and "binary" (`MultiGraphPlus.save`).
+
+    > *network* : `string`
+
+    >> The `CommitLog.network` preset used for the edge list, GraphML and binary formats.
+
+    > *mode* : `string`
+
+    >> The retrieval mode, as in `get_log`.
+
+    > *cache*, *incremental*, *refresh* :
+
+    >> See `load_log`.
+
+    > *jobs* : `None` or `int`
+
+    >> The number of worker processes. Defaults to the number of CPUs. With one job, or one repository, the
+    >> repositories are processed in this process.
+
+    > *callback* : `None` or `function`
+
+    >> A function called with each result of `process_repo` as it finishes.
+
+    **Return** : `list`
+
+    > The results of `process_repo`, in the order the repositories finished.
+
+    """
+    for f in formats:
+        if f not in FORMATS:
+            raise InputError("{} is not a valid output format. Options are {}.".format(f, FORMATS))
+    if network not in NETWORKS:
+        raise InputError("{} is not a valid network preset. Options are {}.".format(network, NETWORKS))
+    paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+    if not os.path.isdir(output):
+        os.makedirs(output)
+    if cache is not None and not os.path.isdir(cache):
+        os.makedirs(cache)
+    options = {"output": output, "formats": list(formats), "network": network, "mode": mode, "cache": cache,
+               "incremental": incremental, "refresh": refresh}
+    tasks = [(p, name, options) for p, name in zip(paths, output_names(paths))]
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(tasks)))
+    results = []
+    if jobs == 1:
+        finished = map(process_repo, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(jobs)
+        finished = pool.imap_unordered(process_repo, tasks)
+    try:
+        for result in finished:
+            results.append(result)
+            if callback is not None:
+                callback(result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return results
+
+
+def report(result, stream=None):
+    """
+    Prints one line describing a result of `process_repo`.
+    """
+    stream = sys.stdout if stream is None else stream
+    if result["error"] is not None:
+        stream.write("{}: failed after {:.2f}s. {}\n".format(result["path"], result["seconds"], result["error"]))
+    else:
+        stream.write("{}: {} commits ({}), {} edges, {} files written in {:.2f}s.\n".format(
+            result["path"], result["commits"], result["how"], result["edges"], len(result["outputs"]),
+            result["seconds"]))
+    stream.flush()
+
+
+def summary(results, seconds):
+    """
+    Returns a summary of the throughput of a batch, given its results and its wall-clock duration in seconds.
+    """
+    failed = sum(1 for r in results if r["error"] is not None)
+    commits = sum(r["commits"] for r in results)
+    edges = sum(r["edges"] for r in results)
+    rate = commits / seconds if seconds > 0 else float("inf")
+    return ("Processed {} repositories ({} failed) in {:.2f}s: {} commits ({:.0f} commits/s), {} edges, "
+            "{:.2f} repositories/s.".format(len(results), failed, seconds, commits, rate, edges,
+                                            len(results) / seconds if seconds > 0 else float("inf")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gitnet",
+                                     description="Retrieve the logs of Git repositories and export them as tables "
+                                                 "and networks.")
+    parser.add_argument("repos", nargs="+", help="paths of the repositories")
+    parser.add_argument("-o", "--output", default=".", help="directory to write to (default: the current one)")
+    parser.add_argument("-f", "--format", action="append", choices=FORMATS, dest="formats",
+                        help="an output format; may be given more than once (default: graphml)")
+    parser.add_argument("-n", "--network", default="author/file", choices=NETWORKS,
+                        help="the network preset for edges, graphml and binary output (default: author/file)")
+    parser.add_argument("-m", "--mode", default="stat", choices=["basic", "raw", "stat"], help="git log mode")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: the number of CPUs)")
+    parser.add_argument("--cache", help="directory of cached logs, reused while a repository's HEAD is unchanged")
+    parser.add_argument("--incremental", action="store_true",
+                        help="add only new commits to cached logs, instead of retrieving them again")
+    parser.add_argument("--refresh", action="store_true", help="retrieve every log again, replacing cached logs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show gitnet's messages")
+    args = parser.parse_args(argv)
+    if (args.incremental or args.refresh) and args.cache is None:
+        parser.error("--incremental and --refresh need --cache")
+    if args.verbose:
+        enable_logging()
+    start = time.perf_counter()
+    results = run_batch(args.repos, output=args.output, formats=args.formats or ["graphml"], network=args.network,
+                        mode=args.mode, cache=args.cache, incremental=args.incremental, refresh=args.refresh,
+                        jobs=args.jobs, callback=report)
+    print(summary(results, time.perf_counter() - start))
+    return 1 if any(r["error"] is not None for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
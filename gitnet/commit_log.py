@@ -14,12 +14,32 @@
 # If not, see <http://www.gnu.org/licenses/>.
 # *********************************************************************************************
 
+import os
+import csv
+import logging
 import numpy as np
+import datetime as dt
 import copy
+import warnings
+from collections import Counter, namedtuple
+from itertools import chain
 from gitnet.log import Log
 from gitnet.exceptions import InputError
+from gitnet.storage import MISSING, column_array
+from gitnet.instrument import instrumented
 from gitnet.helpers import datetime_git, most_common, filter_regex, net_edges_simple, net_edges_changes, \
-    make_utc_datetime, make_utc_date, make_domain
+    net_edges_repo_changes, make_utc_datetime, make_utc_date, make_domain, parse_mailmap, union_roots, change_counts, git_timestamp, \
+    git_timestamps, open_output
+
+logger = logging.getLogger(__name__)
+
+
+# The result of CommitLog.statistics.
+CommitStatistics = namedtuple("CommitStatistics", ["records", "authors", "files", "domains", "earliest", "latest",
+                                                   "fedits", "inserts", "deletes", "merges", "errors"])
+
+# Old CommitLog.describe tags, and the tags which replaced them.
+DESCRIBE_ALIASES = {"date": "dates", "utc_date": "dates", "utc_datetime": "dates", "domain": "emails"}
 
 
 class CommitLog(Log):
@@ -27,6 +47,17 @@ class CommitLog(Log):
     A subclass of `Log` for holding git commit logs, whose data has been parsed into a dictionary of dictionaries.
     """
 
+    # Attributes added to each record by annotate, as (name, helper) pairs for mutate_attribute.
+    annotations = [("utc_date", make_utc_date),
+                   ("utc_datetime", make_utc_datetime),
+                   ("domain", make_domain)]
+
+    _statistics = None
+
+    # For logs made by concat, the path of each repository, keyed by its name. None for other logs.
+    repos = None
+
+    @instrumented("CommitLog.annotate", records=lambda result, args: len(args[0]))
     def annotate(self):
         """
         A method that automatically runs after initialization. Processes date information, and adds easily parsed
@@ -34,13 +65,75 @@ class CommitLog(Log):
         utc_date : "YYYY-MM-DD" in Coordinated Universal Time. Formatted for `parse_date()` in `readr` package in R.
         utc_datetime : "YYYY-MM-DD HH:MM:SS" in Coordinated Universal Time.
         """
-        self.mutate_attribute("utc_date",make_utc_date)
-        self.mutate_attribute("utc_datetime",make_utc_datetime)
-        self.mutate_attribute("domain",make_domain)
+        for name, helper in self.annotations:
+            self.mutate_attribute(name, helper)
+
+    def clear_cache(self):
+        """
+        Clears the cached results of `attributes` and `statistics`. Only needed after records in `self.collection`
+        have been changed directly.
+        """
+        Log.clear_cache(self)
+        self._statistics = None
+
+    @classmethod
+    def concat(cls, logs, names=None):
+        """
+        Combines the logs of several repositories into one `CommitLog`, for analysing them together. Records are copied
+        as new dictionaries which share their values with the original logs (see `Log._shallow_copy`), so the logs are
+        not deep copied, and are left unchanged.
+
+        **Parameters** :
+
+        > *logs* : `list`
+
+        >> The `CommitLog` objects to combine. Memory-mapped logs are read into memory.
+
+        > *names* : `None` or `list`
+
+        >> A unique name for each repository. By default, the name of the directory in each log's `path` is used, with
+        >> a number added when several logs have the same name (or no path).
+
+        **Return** : `CommitLog`
+
+        > A log whose keys are namespaced by repository ("repository:hash"), so short hashes from different repositories
+        > cannot collide. Each record gains a "repo" attribute with the repository's name. The log's `path` is None,
+        > and its `repos` attribute holds the path of each repository, keyed by name. See the "author/repo" and
+        > "author/repo_file" presets of `network` for networks across repositories.
+
+        """
+        logs = list(logs)
+        if names is None:
+            names = [os.path.basename(log.path.rstrip("/\\")) if log.path else "repo" for log in logs]
+            names = ["{}{}".format(name, i + 1) if names.count(name) > 1 else name for i, name in enumerate(names)]
+        names = list(names)
+        if len(names) != len(logs):
+            raise InputError("concat() was given {} names for {} logs.".format(len(names), len(logs)))
+        if len(set(names)) != len(names):
+            raise InputError("Repository names must be unique: {}".format(names))
+        collection = {}
+        filters = []
+        for name, log in zip(names, logs):
+            for key, record in log.collection.items():
+                record = dict(record)
+                record["repo"] = name
+                collection["{}:{}".format(name, key)] = record
+            filters.extend("{}: {}".format(name, f) for f in log.filters)
+        # Records were annotated when their logs were made, so the collection is set after initialization.
+        combined = cls(dofd={},
+                       source=", ".join(sorted(set(str(log.source) for log in logs))),
+                       path=None,
+                       key_type="repo:{}".format(logs[0].key_type if len(logs) > 0 else None),
+                       filters=filters)
+        combined.collection = collection
+        combined.repos = dict(zip(names, [log.path for log in logs]))
+        combined.clear_cache()
+        return combined
 
     def describe(self, mode = "default", exclude = []):
         """
-        A method for creating extended descriptive output for the `Commitlog` subclass.
+        A method for creating extended descriptive output for the `Commitlog` subclass. The figures come from
+        `statistics`, so describing a log again does not recompute them.
 
         **Parameters**:
 
@@ -58,8 +151,14 @@ class CommitLog(Log):
 
         > *summary* : Prints the number of logs and creation date. Identical to `str(self)`.
 
+        > *path* : Prints the origin of the log.
+
+        > *filters* : Prints the filters applied to the log.
+
         > *authors* : Prints the number of authors who commit to the repository.
 
+        > *files* : Prints the number of distinct files changed in the collection.
+
         > *emails* : Prints the ten most common email address domains used by more than one user.
 
         > *dates* : Prints the date range for commits in the collection.
@@ -70,22 +169,30 @@ class CommitLog(Log):
 
         > *errors* : Prints the number of parsing errors in the collection.
 
+        The tags "date", "utc_date" and "utc_datetime" (now "dates") and "domain" (now "emails") are still accepted,
+        with a `DeprecationWarning`.
+
         """
         # Define included/excluded data summaries.
-        if mode == "default":
-            output = ["summary", "path", "filters", "authors", "files",
-                      "emails", "domain", "date", "utc_date", "utc_datetime", "changes", "merges", "errors"]
-        else:
-            output = ["summary", "path", "filters", "authors", "files",
-                      "emails", "domain", "date", "utc_date", "utc_datetime", "changes", "merges", "errors"]
+        output = ["summary", "path", "filters", "authors", "files", "emails", "dates", "changes", "merges", "errors"]
         for i in exclude:
+            if i in DESCRIBE_ALIASES:
+                warnings.warn("The describe tag '{}' is deprecated, use '{}' instead."
+                              .format(i, DESCRIBE_ALIASES[i]), DeprecationWarning, stacklevel=2)
+                i = DESCRIBE_ALIASES[i]
+                if i not in output:
+                    continue
             output.remove(i)
+        stats = self.statistics()
         # Print summary
         if "summary" in output:
             print(self)
         # Print path
         if "path" in output:
-            print("Origin: ", self.path)
+            if self.repos is not None:
+                print("Origin: ", ", ".join("{} ({})".format(name, path) for name, path in self.repos.items()))
+            else:
+                print("Origin: ", self.path)
         # Print filter summaries
         if "filters" in output:
             if len(self.filters) != 0:
@@ -94,86 +201,96 @@ class CommitLog(Log):
                     print("\t", f)
         # Print number of authors.
         if "authors" in output:
-            author_dict = {}
-            for record in self.collection:
-                author = self.collection[record]["author"]
-                if author in author_dict.keys():
-                    author_dict[author] += 1
-                else:
-                    author_dict[author] = 1
-            print("Number of authors: {}".format(len(author_dict)))
+            print("Number of authors: {}".format(len(stats.authors)))
         # Print number of files.
         if "files" in output:
-            num_files = len(set(self.vector("files")))
-            print("Number of files: {}".format(num_files))
+            print("Number of files: {}".format(stats.files))
         # Print most common email domains.
         if "emails" in output:
-            def get_domain(s):
-                """
-                :param s: An email address (string).
-                :return: An email domain, i.e. "@domain.com" (string)
-                """
-                domain = s
-                while True:
-                    if domain == "":
-                        domain = "None"
-                        break
-                    elif domain[0] != "@":
-                        domain = domain[1:]
-                    else:
-                        break
-                return domain
-            emails = set(self.vector("email"))
-            emails = list(map(get_domain, emails))
-            max_domain = most_common(emails, 10)
             print("Most common email address domains:")
-            for domain in max_domain:
+            for domain in stats.domains:
                 print("\t {} [{} users]".format(domain[1], domain[0]))
         # Print date range.
         if "dates" in output:
-            early = None
-            late = None
-            for record in self.collection:
-                date = datetime_git(self.collection[record]["date"])
-                if early is None or date < early:
-                    early = date
-                if late is None or date > late:
-                    late = date
-            print("Date range: {} to {}".format(early, late))
+            print("Date range: {} to {}".format(stats.earliest, stats.latest))
         # Print descriptive statistics of distribution of changes (number of file edits, inserts, and deletes.)
         if "changes" in output:
-            file_lst = []
-            insert_lst = []
-            delete_lst = []
-            for record in self.collection:
-                cur_record = self.collection[record]
-                if "fedits" in cur_record.keys():
-                    file_lst.append(cur_record["fedits"])
-                if "inserts" in cur_record.keys():
-                    insert_lst.append(cur_record["inserts"])
-                if "deletes" in cur_record.keys():
-                    delete_lst.append(cur_record["deletes"])
             print("Change distribution summary:")
-            print("\t Files changed: Mean = {}, SD = {}".format(round(np.mean(file_lst), 3),
-                                                                round(np.std(file_lst), 3)))
-            print("\t Line insertions: Mean = {}, SD = {}".format(round(np.mean(insert_lst), 3),
-                                                                  round(np.std(insert_lst), 3)))
-            print("\t Line deletions: Mean = {}, SD = {}".format(round(np.mean(delete_lst), 3),
-                                                                 round(np.std(delete_lst), 3)))
+            print("\t Files changed: Mean = {}, SD = {}".format(round(stats.fedits[0], 3), round(stats.fedits[1], 3)))
+            print("\t Line insertions: Mean = {}, SD = {}".format(round(stats.inserts[0], 3),
+                                                                  round(stats.inserts[1], 3)))
+            print("\t Line deletions: Mean = {}, SD = {}".format(round(stats.deletes[0], 3),
+                                                                 round(stats.deletes[1], 3)))
         # Print number of merges.
         if "merges" in output:
-            n_merge = 0
-            for record in self.collection:
-                if "merge" in self.collection[record].keys():
-                    n_merge += 1
-            print("Number of merges: {}".format(n_merge))
+            print("Number of merges: {}".format(stats.merges))
         # Print number of parsing errors.
         if "errors" in output:
-            n_errors = 0
-            for record in self.collection:
-                if "errors" in self.collection[record].keys():
-                    n_errors += len(self.collection[record]["errors"])
-            print("Number of parsing errors: {}".format(n_errors))
+            print("Number of parsing errors: {}".format(stats.errors))
+
+    def file_changes_df(self):
+        """
+        Produces a long-format table of file changes, with one row for each file changed by each commit. Built in one
+        pass over the "hash", "author", "date", "files" and "changes" tags, without creating a dictionary per row, and
+        suited to pandas groupbys (e.g. lines changed per author and file).
+
+        **Return** : `dataframe`
+
+        > A `pandas dataframe` with the columns:
+
+        >> *hash* (categorical) : The hash of the commit.
+
+        >> *author* (categorical) : The author of the commit.
+
+        >> *timestamp* (datetime64) : The time of the commit, in UTC.
+
+        >> *path* (categorical) : The path of the file.
+
+        >> *inserts* (float) : Lines inserted in the file, from the commit's "changes". NaN for binary files, and
+        >> for logs without line counts.
+
+        >> *deletes* (float) : Lines deleted from the file, as for *inserts*.
+
+        > Commits without a "files" list have no rows. Missing hashes, authors and dates are NaN (or NaT).
+
+        """
+        import pandas as pd
+        dates = self._column("date")
+        changes = self._column("changes")
+        counts = []
+        count_cache = {}
+        path_index = {}
+        path_codes = []
+        inserts = []
+        deletes = []
+        for i, paths in enumerate(self._column("files")):
+            if type(paths) is not list:
+                counts.append(0)
+                continue
+            counts.append(len(paths))
+            cur = changes[i]
+            if type(cur) is not list or len(cur) != len(paths):
+                cur = [None] * len(paths)
+            for path, change in zip(paths, cur):
+                code = path_index.get(path)
+                if code is None:
+                    code = path_index[path] = len(path_index)
+                path_codes.append(code)
+                ins, dels = change_counts(change, count_cache)
+                inserts.append(ins)
+                deletes.append(dels)
+        # Commit-level values are converted once per commit, and repeated for each of its files.
+        rows = np.repeat(np.arange(len(counts)), counts)
+        columns = {}
+        for tag in ("hash", "author"):
+            values = pd.Categorical(column_array(self._column(tag)))
+            columns[tag] = pd.Categorical.from_codes(values.codes[rows], values.categories)
+        seconds = np.array([None if d is MISSING else git_timestamp(d) for d in dates], dtype=np.float64)
+        columns["timestamp"] = pd.to_datetime(seconds[rows], unit="s")
+        columns["path"] = pd.Categorical.from_codes(np.array(path_codes, dtype=np.int64), list(path_index))
+        columns["inserts"] = np.array(inserts, dtype=np.float64)
+        columns["deletes"] = np.array(deletes, dtype=np.float64)
+        return pd.DataFrame(columns, columns=["hash", "author", "timestamp", "path", "inserts", "deletes"])
 
     def get_tags(self):
         """
@@ -232,7 +349,29 @@ class CommitLog(Log):
         self_copy.filters.append(summary)
         return self_copy
 
-    def network(self, type):
+    def merge_identities(self, mailmap=None, ignore_emails=[]):
+        """
+        Replaces every author name with the canonical name of its identity, as found by `resolve_identities`.
+
+        **Parameters** :
+
+        > *mailmap* : `string` or `bool`
+
+        >> The path of a `.mailmap` file, or True to use the `.mailmap` file of the repository the log was
+        >> retrieved from (if one exists). Defaults to None, which ignores mailmaps.
+
+        > *ignore_emails* : `list`
+
+        >> Emails which should not be used to link authors, such as shared placeholder addresses.
+
+        **Return** : `CommitLog`
+
+        > A new `CommitLog`, in which the authors of each identity share one name.
+
+        """
+        return self.merge_values("author", self.resolve_identities(mailmap=mailmap, ignore_emails=ignore_emails))
+
+    def network(self, type, integer_ids=False, progress=None):
         """
         A method for quickly creating preset networks using `Commitlog` data.
 
@@ -240,7 +379,17 @@ class CommitLog(Log):
 
         > *type* : `string`
 
-        >> Indicates which preset to use.
+        >> Indicates which preset to use: "author/file", "author/file/simple" or "author/file/weighted". For logs
+        >> combined with `concat`, "author/repo" links authors to the repositories they commit to, and
+        >> "author/repo_file" and "author/repo_file/weighted" link authors to repository-qualified file paths.
+
+        > *integer_ids* : `bool`
+
+        >> If True, nodes are keyed by dense integers with a side label table. See `generate_network`.
+
+        > *progress* : `None` or `function`
+
+        >> A callback for the number of edges added. See `generate_network`.
 
         **return** :
 
@@ -248,14 +397,16 @@ class CommitLog(Log):
 
         """
         if type == "author/file/simple":
-            return self.generate_network("author", "files")
+            return self.generate_network("author", "files", integer_ids=integer_ids, progress=progress)
         if type == "author/file":
             return self.generate_network("author", "files",
                                          edge_attributes=["author", "hash"],
                                          mode1_atom_attrs=["email"],
                                          mode2_atom_attrs=[],
                                          mode1_vector_attrs=["hash", "fedits"],
-                                         mode2_vector_attrs=["date", "hash"])
+                                         mode2_vector_attrs=["date", "hash"],
+                                         integer_ids=integer_ids,
+                                         progress=progress)
         if type == "author/file/weighted":
             return self.generate_network("author", "files",
                                          edge_attributes=["author", "hash", "date"],
@@ -263,6 +414,236 @@ class CommitLog(Log):
                                          mode2_atom_attrs=[],
                                          mode1_vector_attrs=["hash", "fedits"],
                                          mode2_vector_attrs=["date", "hash"],
-                                         edge_helper=net_edges_changes)
+                                         edge_helper=net_edges_changes,
+                                         integer_ids=integer_ids,
+                                         progress=progress)
+        if type == "author/repo":
+            return self.generate_network("author", "repo",
+                                         edge_attributes=["author", "hash", "date"],
+                                         mode1_atom_attrs=["email"],
+                                         mode1_vector_attrs=["hash"],
+                                         integer_ids=integer_ids,
+                                         progress=progress)
+        if type == "author/repo_file":
+            return self._with_repo_files().generate_network("author", "repo_files",
+                                         edge_attributes=["author", "hash"],
+                                         mode1_atom_attrs=["email"],
+                                         mode2_atom_attrs=["repo"],
+                                         mode1_vector_attrs=["hash", "fedits"],
+                                         mode2_vector_attrs=["date", "hash"],
+                                         integer_ids=integer_ids,
+                                         progress=progress)
+        if type == "author/repo_file/weighted":
+            return self._with_repo_files().generate_network("author", "repo_files",
+                                         edge_attributes=["author", "hash", "date"],
+                                         mode1_atom_attrs=["email"],
+                                         mode2_atom_attrs=["repo"],
+                                         mode1_vector_attrs=["hash", "fedits"],
+                                         mode2_vector_attrs=["date", "hash"],
+                                         edge_helper=net_edges_repo_changes,
+                                         integer_ids=integer_ids,
+                                         progress=progress)
         else:
             raise InputError("{} is not a valid network preset.".format(type))
+
+    def _with_repo_files(self):
+        """
+        Produces a copy of the `Log` in which each record with "repo" and "files" attributes (as in a log made by
+        `concat`) also has a "repo_files" attribute of repository-qualified paths ("repository/path"). The paths are
+        built from the current "files" whenever a network needs them, so they follow `ignore`, `replace_val` and
+        `merge_values`. Other records are shared with the original, as in `_shallow_copy`.
+
+        **Return** : `CommitLog`
+
+        """
+        self_copy = copy.copy(self)
+        self_copy.collection = {}
+        for key, record in self.collection.items():
+            if "repo" in record and "files" in record:
+                record = dict(record)
+                record["repo_files"] = ["{}/{}".format(record["repo"], f) for f in record["files"]]
+            self_copy.collection[key] = record
+        self_copy.clear_cache()
+        return self_copy
+
+    def resolve_identities(self, mailmap=None, ignore_emails=[]):
+        """
+        Finds author names which belong to the same person. Authors and emails are linked whenever they appear in
+        the same commit, and each connected group of names and emails is treated as one identity. The canonical
+        name of an identity is the name given by the mailmap (if any), or otherwise the name used in the most commits.
+
+        **Parameters** :
+
+        > *mailmap* : `string` or `bool`
+
+        >> The path of a `.mailmap` file, or True to use the `.mailmap` file of the repository the log was
+        >> retrieved from (if one exists), or of each repository of a log made by `concat`. Mailmap entries are
+        >> applied before authors are linked. Defaults to None, which ignores mailmaps.
+
+        > *ignore_emails* : `list`
+
+        >> Emails which should not be used to link authors, such as shared placeholder addresses. Empty emails are
+        >> always ignored.
+
+        **Return** : `dict`
+
+        > A dictionary mapping each author name which is not canonical to the canonical name of its identity.
+        > Suitable for `Log.merge_values("author", ...)`, or as a reference for `MultiGraphPlus.merge_nodes`.
+
+        """
+        if mailmap is True:
+            paths = list(self.repos.values()) if self.repos is not None else [self.path]
+            mailmap_entries = {}
+            for path in paths:
+                if path is not None and os.path.isfile(os.path.join(path, ".mailmap")):
+                    for key, proper in parse_mailmap(os.path.join(path, ".mailmap")).items():
+                        mailmap_entries.setdefault(key, proper)
+        elif mailmap is not None:
+            mailmap_entries = parse_mailmap(mailmap)
+        else:
+            mailmap_entries = {}
+        ignore = set(e.lower() for e in ignore_emails)
+        ignore.add("")
+        # Count each distinct (author, email) pair in a single pass over the records.
+        identities = {}
+        for record in self.collection.values():
+            if "author" in record:
+                pair = (record["author"], (record.get("email") or "").lower())
+                identities[pair] = identities.get(pair, 0) + 1
+        # Link names and emails. Nodes are tagged tuples, so that a name and an email with the same text stay apart.
+        links = []
+        name_counts = {}
+        mailmap_names = set()
+        for (author, email), count in identities.items():
+            proper = mailmap_entries.get((author, email)) or mailmap_entries.get((None, email)) or (None, None)
+            name = proper[0] or author
+            if proper[0] is not None:
+                mailmap_names.add(name)
+            if proper[1] is not None:
+                email = proper[1].lower()
+            links.append((("author", author), ("author", name)))
+            if email not in ignore:
+                links.append((("author", name), ("email", email)))
+            name_counts[name] = name_counts.get(name, 0) + count
+        roots = union_roots(links)
+        # Choose the canonical name of each identity: mailmap names first, then the most commits.
+        best = {}
+        for name, count in name_counts.items():
+            root = roots[("author", name)]
+            rank = (name in mailmap_names, count)
+            if root not in best or rank > best[root][0]:
+                best[root] = (rank, name)
+        canonical = {}
+        for node, root in roots.items():
+            if node[0] == "author" and node[1] != best[root][1]:
+                canonical[node[1]] = best[root][1]
+        return canonical
+
+    def statistics(self):
+        """
+        Computes the summary statistics printed by `describe`. Each statistic is computed over a column of the
+        collection rather than by visiting the records once per statistic, and the result is cached until the log
+        changes.
+
+        **Return** : `CommitStatistics`
+
+        > A named tuple with the fields:
+
+        >> *records* : The number of records.
+
+        >> *authors* : A `collections.Counter` of the number of commits by each author.
+
+        >> *files* : The number of distinct files changed.
+
+        >> *domains* : The ten most common email domains used by more than one address, as by `most_common`.
+
+        >> *earliest*, *latest* : The dates of the first and last commits as `datetime` objects, or `None`.
+
+        >> *fedits*, *inserts*, *deletes* : The (mean, standard deviation) of files changed, insertions and
+        >> deletions per commit. Both are `nan` when no record has the tag.
+
+        >> *merges* : The number of merges.
+
+        >> *errors* : The number of parsing errors.
+
+        """
+        if self._statistics is not None and self._statistics[0] is self.collection:
+            return self._statistics[1]
+        authors = Counter(value for value in self._column("author") if value is not MISSING)
+        file_column = self._column("files")
+        files = set(chain.from_iterable(value for value in file_column if type(value) is list))
+        files.update(value for value in file_column if type(value) is not list and value is not MISSING)
+        emails = set(value for value in set(self._column("email")) if type(value) is str)
+        domains = most_common([email[email.index("@"):] if "@" in email else "None" for email in emails], 10)
+        dates = self._column("date")
+        earliest = latest = None
+        if len(dates) > 0:
+            seconds = git_timestamps(dates)
+            if not np.isnan(seconds).all():
+                earliest = datetime_git(dates[int(np.nanargmin(seconds))])
+                latest = datetime_git(dates[int(np.nanargmax(seconds))])
+        changes = []
+        for tag in ["fedits", "inserts", "deletes"]:
+            values = np.array([value for value in self._column(tag) if value is not MISSING], dtype=float)
+            if len(values) == 0:
+                changes.append((float("nan"), float("nan")))
+            else:
+                changes.append((values.mean(), values.std()))
+        merge_column = self._column("merge")
+        merges = len(merge_column) - merge_column.count(MISSING)
+        errors = sum(map(len, filter(lambda value: value is not MISSING, self._column("errors"))))
+        stats = CommitStatistics(len(self.collection), authors, len(files), domains, earliest, latest,
+                                 changes[0], changes[1], changes[2], merges, errors)
+        self._statistics = (self.collection, stats)
+        return stats
+
+    @instrumented("CommitLog.write_file_changes", records=lambda result, args: len(args[0]))
+    def write_file_changes(self, fname, delimiter=None):
+        """
+        Writes the long-format table of file changes produced by `file_changes_df` to a file, one commit at a time,
+        so that the table never has to fit in memory.
+
+        **Parameters** :
+
+        > *fname* : `string`
+
+        >> A string indicating the path or file name to write to. File names ending in `.gz`, `.bz2` or `.xz` are
+        >> compressed.
+
+        > *delimiter* : `None` or `string`
+
+        >> The field delimiter. By default, a comma for file names containing ".csv", and a tab otherwise.
+
+        **Return** : `None`
+
+        *Columns* :
+
+        > hash, author, timestamp ("YYYY-MM-DD HH:MM:SS", in UTC), path, inserts, deletes. Missing values are
+        > written as "NA".
+
+        """
+        if delimiter is None:
+            delimiter = "," if ".csv" in os.path.basename(fname) else "\t"
+        count_cache = {}
+        with open_output(fname) as f:
+            writer = csv.writer(f, delimiter=delimiter, lineterminator="\n")
+            writer.writerow(["hash", "author", "timestamp", "path", "inserts", "deletes"])
+            for record in self.collection.values():
+                paths = record.get("files")
+                if type(paths) is not list:
+                    continue
+                cur = record.get("changes")
+                if type(cur) is not list or len(cur) != len(paths):
+                    cur = [None] * len(paths)
+                seconds = git_timestamp(record.get("date"))
+                if seconds is None:
+                    timestamp = "NA"
+                else:
+                    timestamp = str(dt.datetime(1970, 1, 1) + dt.timedelta(seconds=seconds))
+                commit = [record.get("hash", "NA"), record.get("author", "NA"), timestamp]
+                rows = []
+                for path, change in zip(paths, cur):
+                    ins, dels = change_counts(change, count_cache)
+                    rows.append(commit + [path, "NA" if ins is None else ins, "NA" if dels is None else dels])
+                writer.writerows(rows)
+        logger.info("Wrote file changes to %s in %s.", fname, os.getcwd())
@@ -0,0 +1,378 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import os
+import re
+import json
+import sqlite3
+import datetime as dt
+from collections.abc import ItemsView, ValuesView
+from gitnet.storage import StoredCollection, MISSING
+from gitnet.helpers import datetime_reference, git_timestamp, change_counts, net_edges_simple
+
+# Records are stored whole, as JSON, in the commits table, so that any Log can be saved and restored exactly. The
+# attributes used for querying are also normalized into indexed tables:
+#
+#   authors (id, name, email)                   one row per author name and email pair
+#   files (id, path)                            one row per file path
+#   commits (id, key, hash, author_id, date,    one row per record; timestamp is the date in seconds since the epoch
+#            timestamp, record)
+#   commit_files (commit_id, file_id,           one row per item of a record's "files", with the lines inserted and
+#                 position, inserts, deletes)   deleted, where the matching "changes" entry records them
+#
+# The normalized tables are only used for a tag if every record's value for it had the expected type, which is
+# recorded in the "indexed" metadata entry.
+
+_SCHEMA = """
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT, email TEXT);
+CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT UNIQUE);
+CREATE TABLE commits (id INTEGER PRIMARY KEY, key TEXT UNIQUE, hash TEXT, author_id INTEGER REFERENCES authors (id),
+                      date TEXT, timestamp INTEGER, record TEXT);
+CREATE TABLE commit_files (commit_id INTEGER REFERENCES commits (id), file_id INTEGER REFERENCES files (id),
+                           position INTEGER, inserts INTEGER, deletes INTEGER);
+"""
+
+_INDEXES = """
+CREATE INDEX authors_name ON authors (name);
+CREATE INDEX authors_email ON authors (email);
+CREATE INDEX commits_author ON commits (author_id);
+CREATE INDEX commits_timestamp ON commits (timestamp);
+CREATE INDEX commit_files_commit ON commit_files (commit_id, position);
+CREATE INDEX commit_files_file ON commit_files (file_id);
+"""
+
+# SQL expressions for the normalized tags.
+_columns = {"author": "authors.name",
+            "email": "authors.email",
+            "hash": "commits.hash",
+            "date": "commits.date",
+            "files": "files.path"}
+
+_date_comparisons = {"since": ">=", "sincex": ">", "before": "<=", "beforex": "<"}
+
+# The largest number of parameters used in one statement, below SQLite's default limit of 999.
+_BATCH = 500
+
+
+def _regex_match(s, pattern):
+    return type(s) is str and re.match(pattern, s) is not None
+
+
+def _regex_search(s, pattern):
+    return type(s) is str and re.search(pattern, s) is not None
+
+
+def connect(path):
+    """
+    Opens a connection to a gitnet database, with the regular expression functions used for filtering
+    (`gitnet_match(s, pattern)` and `gitnet_search(s, pattern)`, which behave like `filter_equals` and `filter_has`).
+
+    **Parameters** :
+
+    > *path* : `str`
+
+    >> The database file.
+
+    **Return** : `sqlite3.Connection`
+
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.create_function("gitnet_match", 2, _regex_match)
+    conn.create_function("gitnet_search", 2, _regex_search)
+    return conn
+
+
+def write_database(path, records, meta, chunk_size=10000):
+    """
+    Writes records to a SQLite database, which can be opened with `SQLiteCollection`. An existing file at `path` is
+    replaced. Records are consumed in chunks, so memory use depends on `chunk_size` rather than on the number of records.
+
+    **Parameters** :
+
+    > *path* : `str`
+
+    >> The database file to write.
+
+    > *records* : `iterable`
+
+    >> An iterable of (key, record dictionary) pairs. Values must be serializable as JSON.
+
+    > *meta* : `dict`
+
+    >> A dictionary of metadata, which must be serializable as JSON. It is returned by `SQLiteCollection.meta`.
+
+    > *chunk_size* : `int`
+
+    >> The number of records inserted per transaction.
+
+    **Return** : `int`
+
+    > The number of records written.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    conn = connect(path)
+    conn.executescript(_SCHEMA)
+    authors = {}
+    files = {}
+    ids = {}
+    count_cache = {}
+    tags = set()
+    # Tags stop being indexed as soon as a record has a value of the wrong type for them.
+    indexed = set(_columns)
+    records = iter(records)
+    while True:
+        chunk = [r for i, r in zip(range(chunk_size), records)]
+        if len(chunk) == 0:
+            break
+        commit_rows = []
+        file_rows = []
+        for key, record in chunk:
+            tags.update(record.keys())
+            for tag in ("author", "email", "hash", "date"):
+                if type(record.get(tag, "")) is not str:
+                    indexed.discard(tag)
+            # A repeated key replaces the earlier record, in its place, as in a dictionary.
+            if key in ids:
+                conn.execute("DELETE FROM commits WHERE id = ?", (ids[key],))
+                conn.execute("DELETE FROM commit_files WHERE commit_id = ?", (ids[key],))
+                commit_rows = [row for row in commit_rows if row[0] != ids[key]]
+                file_rows = [row for row in file_rows if row[0] != ids[key]]
+            else:
+                ids[key] = len(ids) + 1
+            commit_id = ids[key]
+            author_id = None
+            if "author" in record or "email" in record:
+                identity = (record.get("author"), record.get("email"))
+                if identity not in authors:
+                    authors[identity] = len(authors) + 1
+                    conn.execute("INSERT INTO authors VALUES (?, ?, ?)", (authors[identity],) + identity)
+                author_id = authors[identity]
+            date = record.get("date")
+            commit_rows.append((commit_id, key, record.get("hash"), author_id, date, git_timestamp(date),
+                                json.dumps(record)))
+            paths = record.get("files", [])
+            if type(paths) is not list or any(type(p) is not str for p in paths):
+                indexed.discard("files")
+                continue
+            changes = record.get("changes", [])
+            if type(changes) is not list or len(changes) != len(paths):
+                changes = [None] * len(paths)
+            for position, (p, change) in enumerate(zip(paths, changes)):
+                if p not in files:
+                    files[p] = len(files) + 1
+                    conn.execute("INSERT INTO files VALUES (?, ?)", (files[p], p))
+                file_rows.append((commit_id, files[p], position) + change_counts(change, count_cache))
+        conn.executemany("INSERT INTO commits VALUES (?, ?, ?, ?, ?, ?, ?)", commit_rows)
+        conn.executemany("INSERT INTO commit_files VALUES (?, ?, ?, ?, ?)", file_rows)
+        conn.commit()
+    # Indexes are built once all rows are in, which is much faster than updating them with every insert.
+    conn.executescript(_INDEXES)
+    meta = dict(meta, tags=sorted(tags), indexed=sorted(indexed), rows=len(ids))
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in meta.items()])
+    conn.commit()
+    conn.close()
+    return len(ids)
+
+
+class SQLiteCollection(StoredCollection):
+    """
+    A read-only, dictionary-like view of the records in a database written by `write_database`, optionally limited
+    to the records which satisfy SQL conditions. Records are read from the database as they are accessed.
+
+    `Log.filter` adds conditions for the built-in predicates on indexed tags ("author", "email", "hash", "files" and
+    "date"), so that they are evaluated by SQLite. Other filters evaluate records in Python and limit the view to the
+    matching rows. Author-file (and similar) networks are generated by joining the normalized tables.
+    """
+
+    def __init__(self, path, where=None, params=()):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self.meta = {name: json.loads(value) for name, value in self._execute("SELECT name, value FROM meta")}
+        self.tags = self.meta["tags"]
+        self.indexed = self.meta["indexed"]
+        self._conditions = []
+        self._ids = None
+        if where is not None:
+            self._conditions.append(("({})".format(where), tuple(params)))
+
+    def _view(self, condition=None, params=(), ids=None):
+        # Returns a copy of this view, with an extra condition or limited to a list of row ids.
+        view = object.__new__(SQLiteCollection)
+        view.__dict__.update(self.__dict__)
+        view._conn = None
+        view._pid = None
+        if condition is not None:
+            view._conditions = self._conditions + [(condition, tuple(params))]
+        if ids is not None:
+            view._ids = ids
+        return view
+
+    def __reduce__(self):
+        return _open_view, (self.path, self._conditions, self._ids)
+
+    def _execute(self, sql, params=()):
+        # Connections are not shared with forked processes.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = connect(self.path)
+            self._pid = os.getpid()
+        return self._conn.execute(sql, params)
+
+    def _select(self, columns, joins="", where=(), order="commits.id"):
+        # Yields the rows of a query over the records in the view, with any extra conditions in `where`.
+        conditions = self._conditions + list(where)
+        if self._ids is None:
+            batches = [None]
+        else:
+            batches = [self._ids[i:i + _BATCH] for i in range(0, len(self._ids), _BATCH)]
+        for batch in batches:
+            clauses = [c for c, p in conditions]
+            params = [x for c, p in conditions for x in p]
+            if batch is not None:
+                clauses.append("commits.id IN ({})".format(", ".join("?" * len(batch))))
+                params.extend(batch)
+            sql = "SELECT {} FROM commits LEFT JOIN authors ON authors.id = commits.author_id {}".format(columns, joins)
+            if len(clauses) > 0:
+                sql += " WHERE " + " AND ".join(clauses)
+            if order is not None:
+                sql += " ORDER BY " + order
+            for row in self._execute(sql, params):
+                yield row
+
+    def __len__(self):
+        return sum(row[0] for row in self._select("COUNT(*)", order=None))
+
+    def __iter__(self):
+        for row in self._select("commits.key"):
+            yield row[0]
+
+    def __contains__(self, key):
+        for row in self._select("commits.id", where=[("commits.key = ?", (key,))], order=None):
+            return True
+        return False
+
+    def __getitem__(self, key):
+        for row in self._select("commits.record", where=[("commits.key = ?", (key,))], order=None):
+            return json.loads(row[0])
+        raise KeyError(key)
+
+    def items(self):
+        return _SQLiteItems(self)
+
+    def values(self):
+        return _SQLiteValues(self)
+
+    def attributes(self):
+        if len(self._conditions) == 0 and self._ids is None:
+            return set(self.tags)
+        return StoredCollection.attributes(self)
+
+    def column(self, tag):
+        if tag not in self.tags:
+            return [MISSING] * len(self)
+        if tag in self.indexed and tag != "files":
+            # A value is NULL exactly when the tag is missing from the record.
+            return [MISSING if row[0] is None else row[0] for row in self._select(_columns[tag])]
+        return StoredCollection.column(self, tag)
+
+    def subset(self, keys):
+        ids = []
+        keys = list(keys)
+        for i in range(0, len(keys), _BATCH):
+            batch = keys[i:i + _BATCH]
+            sql = "SELECT id FROM commits WHERE key IN ({})".format(", ".join("?" * len(batch)))
+            ids.extend(row[0] for row in self._execute(sql, batch))
+        # The new view keeps the existing conditions, so the ids only need to be sorted.
+        return self._view(ids=sorted(set(ids) & set(self._ids)) if self._ids is not None else sorted(set(ids)))
+
+    def pushdown(self, tag, fun, match, negate=False):
+        if tag not in self.indexed:
+            return None
+        if fun in ("equals", "has") and type(match) is str and tag != "date":
+            function = "gitnet_match" if fun == "equals" else "gitnet_search"
+            if tag in ("author", "email"):
+                # The pattern is tested once per author, and commits are found through the index.
+                column = "name" if tag == "author" else "email"
+                condition = "commits.author_id IN (SELECT id FROM authors WHERE {}({}, ?))".format(function, column)
+                params = (match,)
+            elif tag == "files":
+                # As in filter, "has" also matches a list which contains the pattern itself.
+                test = "{}(path, ?)".format(function) if fun == "equals" else "gitnet_search(path, ?) OR path = ?"
+                condition = "commits.id IN (SELECT commit_id FROM commit_files WHERE file_id IN " \
+                            "(SELECT id FROM files WHERE {}))".format(test)
+                params = (match,) if fun == "equals" else (match, match)
+            else:
+                condition = "{}({}, ?)".format(function, _columns[tag])
+                params = (match,)
+        elif fun in _date_comparisons and tag == "date":
+            try:
+                reference = datetime_reference(match)
+            except Exception:
+                return None
+            # Naive datetimes cannot be compared with git dates, and raise the usual error in Python.
+            if type(reference) is not dt.datetime or reference.tzinfo is None:
+                return None
+            condition = "commits.timestamp {} ?".format(_date_comparisons[fun])
+            params = (reference.timestamp(),)
+        else:
+            return None
+        # Records without the tag never match, and are kept by a negated filter.
+        if negate:
+            condition = "NOT COALESCE(({}), 0)".format(condition)
+        else:
+            condition = "COALESCE(({}), 0)".format(condition)
+        return self._view(condition, params)
+
+    def edges(self, mode1, mode2, helper, edge_attributes):
+        if helper is not net_edges_simple or len(edge_attributes) > 0 or mode1 == mode2:
+            return None
+        if mode1 not in self.indexed or mode2 not in self.indexed:
+            return None
+        joins = ""
+        order = "commits.id"
+        if "files" in (mode1, mode2):
+            joins = "JOIN commit_files ON commit_files.commit_id = commits.id " \
+                    "JOIN files ON files.id = commit_files.file_id"
+            order = "commits.id, commit_files.position"
+        columns = "{}, {}".format(_columns[mode1], _columns[mode2])
+        # Only records with both tags produce edges.
+        where = [("{} IS NOT NULL AND {} IS NOT NULL".format(_columns[mode1], _columns[mode2]), ())]
+        return ((v1, v2, {}) for v1, v2 in self._select(columns, joins, where, order))
+
+
+def _open_view(path, conditions, ids):
+    view = SQLiteCollection(path)
+    view._conditions = conditions
+    view._ids = ids
+    return view
+
+
+class _SQLiteItems(ItemsView):
+
+    def __iter__(self):
+        for key, record in self._mapping._select("commits.key, commits.record"):
+            yield key, json.loads(record)
+
+
+class _SQLiteValues(ValuesView):
+
+    def __iter__(self):
+        for row in self._mapping._select("commits.record"):
+            yield json.loads(row[0])
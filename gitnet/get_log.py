@@ -17,11 +17,18 @@
 import bash as sh
 import subprocess as sub
 import os
+import shlex
+import logging
 import warnings
 from gitnet.exceptions import RepositoryError, ParseError, InputError
 from gitnet.commit_log import CommitLog
+from gitnet.storage import write_store
+from gitnet.instrument import instrumented, tracked
 
-def get_log(path, mode="stat", commit_source="local git"):
+logger = logging.getLogger(__name__)
+
+@instrumented("get_log", records=lambda result, args: len(result))
+def get_log(path, mode="stat", commit_source="local git", store=None, progress=None, revisions=None):
     """
     A function for gathering data from a local Git repository.
 
@@ -39,6 +46,22 @@ def get_log(path, mode="stat", commit_source="local git"):
 
     >> The source of the Git repository, local is currently the only option.
 
+    > *store* : `None` or `string`
+
+    >> If a directory path is given, parsed commits are written to a memory-mapped store in that directory as they are
+    >> parsed, rather than kept in a dictionary, and the returned `CommitLog` reads its records from the store (see
+    >> `Log.to_mmap` and `Log.from_mmap`). Useful for repositories whose logs do not fit in memory.
+
+    > *progress* : `None` or `function`
+
+    >> A function called as `progress("parse_commits", count)` after every 1000 commits parsed, and with the final
+    >> count at the end. See `gitnet.instrument.tracked`.
+
+    > *revisions* : `None` or `string`
+
+    >> A revision range given to `git log`, such as "1a2b3c4..HEAD", to retrieve only some commits. By default, all
+    >> commits reachable from HEAD are retrieved.
+
     **Returns** : `Commitlog`
 
     """
@@ -46,11 +69,29 @@ def get_log(path, mode="stat", commit_source="local git"):
         detect_key = "hash"
     else:
         detect_key = "unknown"
-    return CommitLog(dofd=parse_commits(retrieve_commits(path, mode)),
+    if store is not None:
+        meta = {"source": commit_source,
+                "path": path,
+                "key_type": detect_key,
+                "filters": []}
+        commits = tracked(iter_commits(retrieve_commits(path, mode, revisions)), progress, "parse_commits")
+        write_store(store, annotate_commits(commits), meta)
+        return CommitLog.from_mmap(store)
+    return CommitLog(dofd=parse_commits(retrieve_commits(path, mode, revisions), progress=progress),
                      source=commit_source,
                      path=path,
                      key_type=detect_key)
 
+def annotate_commits(commits):
+    """
+    Adds the `CommitLog.annotations` attributes to each (hash, record) tuple from `iter_commits()`, as `CommitLog`
+    does when it is created. Used when commits are written to a store without building a `CommitLog` in memory.
+    """
+    for sha, record in commits:
+        for name, helper in CommitLog.annotations:
+            record[name] = helper(record)
+        yield sha, record
+
 def identify(s):
     """
     A helper function for `parse_commits()`. It takes a string and attempts to identify it as an entry
@@ -101,7 +142,8 @@ def identify(s):
                       " so was identified as 'other'.".format(s))
         return "none"
 
-def parse_commits(commit_str):
+@instrumented("parse_commits", records=lambda result, args: len(result))
+def parse_commits(commit_str, progress=None):
     """
     Parses a raw string containing a commit Log for a Git repository. It produces a dictionary
     of dictionaries keyed by an abbreviated commit hash, containing a series of data points indexed by short reference
@@ -113,6 +155,11 @@ def parse_commits(commit_str):
 
     >> Raw commit log data, as produced by retreive_commits. Modes currently supported: Basic, Raw, Stat.
 
+    > *progress* : `None` or `function`
+
+    >> A function called as `progress("parse_commits", count)` after every 1000 commits parsed, and with the final
+    >> count at the end.
+
     **Return** :
 
     > A dictionary of dictionaries keyed by an abbreviated commit hash. Each sub-dictionary contains a dictionary
@@ -130,6 +177,27 @@ def parse_commits(commit_str):
     > Multiple patterns matched during parse ("ER"), no patterns
     > matched during parse ("errors").
 
+    """
+    collection = {}
+    for sha, record in tracked(iter_commits(commit_str), progress, "parse_commits"):
+        collection[sha] = record
+    return collection
+
+def iter_commits(commit_str):
+    """
+    Parses a raw string containing a commit Log for a Git repository, as `parse_commits()` does, but yields each commit
+    as soon as it is complete instead of collecting them in a dictionary.
+
+    **Parameters** :
+
+    > *commit_str* :
+
+    >> Raw commit log data, as produced by retreive_commits. Modes currently supported: Basic, Raw, Stat.
+
+    **Return** :
+
+    > A generator of (abbreviated commit hash, record dictionary) tuples, in log order.
+
     """
     # Split and clean retrieved logs, creating a list of strings and removing empty strings.
     commit_list = list(filter(lambda s: s != "",commit_str.split("\n")))
@@ -141,63 +209,70 @@ def parse_commits(commit_str):
         raise ParseError("Invalid input. parse_commits() expected a string beginning with 'Mode =\n'. See documentation.")
     if mode not in mode_list:
         raise ParseError("Invalid input. {} is not a valid mode.".format(mode))
-    # Initialize a dictionary to store processed records, and a temporary short hash tracker, which tracks current commit.
-    collection = {}
+    # Initialize the record being processed, and a temporary short hash tracker, which tracks current commit.
+    cur = None
     sha = ""
     # Iterate through list of input lines. Process lines according to type using the identify() helper function.
     for line in commit_list:
         id = identify(line)
         # Commit Hash?
         if id == "hash":
+            # The previous commit is complete.
+            if cur is not None:
+                yield sha, cur
             sha = line[7:14]
-            collection[sha] = {}
-            collection[sha]["hash"] = line[7:]
-            collection[sha]["mode"] = mode
+            cur = {}
+            cur["hash"] = line[7:]
+            cur["mode"] = mode
+        elif cur is None:
+            raise KeyError(sha)
         # Author?
         elif id == "author":
-            collection[sha]["author"] = line.split("<")[0][8:-1]
-            collection[sha]["email"] = line.split("<")[1][:-1]
+            cur["author"] = line.split("<")[0][8:-1]
+            cur["email"] = line.split("<")[1][:-1]
         # Date?
         elif id == "date":
-            collection[sha]["date"] = line[8:]
+            cur["date"] = line[8:]
         # Message?
         elif id == "message":
-            if "message" in collection[sha].keys():
-                collection[sha]["message"] += " " + line[4:]
+            if "message" in cur.keys():
+                cur["message"] += " " + line[4:]
             else:
-                collection[sha]["message"] = line[4:]
+                cur["message"] = line[4:]
         # File change record?
         elif id == "change":
-            if "changes" in collection[sha].keys():
-                collection[sha]["changes"].append(line[1:])
-                collection[sha]["files"].append(line.split("|")[0].replace(" ",""))
+            if "changes" in cur.keys():
+                cur["changes"].append(line[1:])
+                cur["files"].append(line.split("|")[0].replace(" ",""))
             else:
-                collection[sha]["changes"] = [line[1:]]
-                collection[sha]["files"] = [line.split("|")[0].replace(" ","")]
+                cur["changes"] = [line[1:]]
+                cur["files"] = [line.split("|")[0].replace(" ","")]
         elif id == "summary":
-            collection[sha]["summary"] = line[1:]
+            cur["summary"] = line[1:]
             # Filter numbers
             temp = line.split(",")
             for s in temp:
                 num = int("".join(list(filter(str.isdigit, s))))
                 if "file" in s and "change" in s:
-                    collection[sha]["fedits"] = num
+                    cur["fedits"] = num
                 if "insert" in s:
-                    collection[sha]["inserts"] = num
+                    cur["inserts"] = num
                 if "delet" in s:
-                    collection[sha]["deletes"] = num
+                    cur["deletes"] = num
         elif id == "merge":
-            collection[sha]["merge"] = line[6:]
+            cur["merge"] = line[6:]
         elif id == "multiple" or id == "none":
-            if "errors" in collection[sha].keys():
-                collection[sha]["errors"].append(line)
+            if "errors" in cur.keys():
+                cur["errors"].append(line)
             else:
-                collection[sha]["errors"] = [line]
+                cur["errors"] = [line]
         else:
             warnings.warn("Parser was unable to identify {}. Identity string <{}> not recognized".format(line,id))
-    return collection
+    if cur is not None:
+        yield sha, cur
 
-def retrieve_commits(path, mode="stat"):
+@instrumented("retrieve_commits", size=lambda result, args: len(result.encode("utf-8")))
+def retrieve_commits(path, mode="stat", revisions=None):
     """
     Takes a file path string and a mode string and produces the  git log for the
     specified directory. The default mode, "stat" retrieves the logs by running "git log --stat".
@@ -213,30 +288,36 @@ def retrieve_commits(path, mode="stat"):
 
     >> A string identifying the git log mode to be retrieved. Default mode is "stat".
 
+    > *revisions* : `None` or `string`
+
+    >> A revision range to retrieve, such as "1a2b3c4..HEAD". By default, the whole history of HEAD is retrieved.
+
     **Return** :
 
     > Returns a large string containing the raw output from the repository's git log.
 
     """
-    print("Attempting local git log retrieval...")
+    logger.info("Attempting local git log retrieval...")
     # Log command modes, referenced by "mode" input.
     log_commands = {"basic": "git log", "raw": "git log --raw", "stat":"git log --stat"}
     if mode not in log_commands.keys():
         raise InputError("{} is not a valid retrieval mode.".format(mode))
+    command = log_commands[mode]
+    if revisions is not None:
+        command += " " + shlex.quote(revisions)
     # Save the current directory. Navigate to new directory. Retrieve logs. Return to original directory.
     work_dir = os.getcwd()
     os.chdir(path)
-    raw_logs = sh.bash(log_commands[mode]).stdout.decode("utf-8", "ignore")
+    raw_logs = sh.bash(command).stdout.decode("utf-8", "ignore")
     os.chdir(work_dir)
     # If the retrieval was unsuccessful, raise an error.
     if len(raw_logs) == 0:
-        print("Raising error.")
         if "true" in str(sh.bash("git rev-parse --is-inside-work-tree").stdout):
             raise RepositoryError("{} is not a Git repository.".format(path))
         else:
             raise RepositoryError("{} has no commits.".format(path))
-    # If the retrieval was successful, print a summary."
-    print("Got {} characters from: {}".format(len(raw_logs), path))
+    # If the retrieval was successful, log a summary.
+    logger.info("Got %d characters from: %s", len(raw_logs), path)
     # Record the retrieval mode.
     raw_logs = "Mode =\n{}\n".format(mode) + raw_logs
     return raw_logs
@@ -0,0 +1,120 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import os
+import shutil
+import tempfile
+import unittest
+import subprocess as sub
+from io import StringIO
+from unittest.mock import patch
+import gitnet
+from gitnet import cli
+from gitnet.exceptions import InputError
+
+
+class CLITests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="gitnet_cli_")
+        self.repo = os.path.join(self.dir, "small")
+        self.other = os.path.join(self.dir, "nx")
+        os.makedirs(self.repo)
+        os.makedirs(self.other)
+        sub.call(["cp", "-R", "small_network_repo.git", os.path.join(self.repo, ".git")])
+        sub.call(["cp", "-R", "repo_one.git", os.path.join(self.other, ".git")])
+        self.out = os.path.join(self.dir, "out")
+        self.cache = os.path.join(self.dir, "cache")
+
+    def test_batch(self):
+        """Are all formats written for each repository, with failures reported without stopping the batch?"""
+        missing = os.path.join(self.dir, "missing")
+        results = cli.run_batch([self.repo, missing, self.other], output=self.out,
+                                formats=["tsv", "edges", "graphml", "binary"], jobs=2)
+        results = {r["name"]: r for r in results}
+        self.assertEqual(len(results), 3)
+        self.assertIn("RepositoryError", results["missing"]["error"])
+        self.assertIsNone(results["small"]["error"])
+        self.assertEqual(results["small"]["commits"], 4)
+        self.assertEqual(sorted(os.listdir(self.out)), ["nx.graphml", "nx.npz", "nx.tsv", "nx_edges.txt",
+                                                        "small.graphml", "small.npz", "small.tsv", "small_edges.txt"])
+        graph = gitnet.MultiGraphPlus.load(os.path.join(self.out, "small.npz"))
+        self.assertEqual(graph.number_of_edges(), results["small"]["edges"])
+
+    def test_other_errors(self):
+        """Is an error other than a gitnet exception reported without losing the other repositories' results?"""
+        # A directory in the way of one repository's TSV file makes writing it raise an OSError.
+        os.makedirs(os.path.join(self.out, "small.tsv"))
+        results = cli.run_batch([self.repo, self.other], output=self.out, formats=["tsv", "graphml"], jobs=2)
+        results = {r["name"]: r for r in results}
+        self.assertEqual(len(results), 2)
+        self.assertTrue(results["small"]["error"].startswith("IsADirectoryError"))
+        self.assertIsNone(results["nx"]["error"])
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "nx.tsv")))
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "nx.graphml")))
+
+    def test_main(self):
+        """Does the command print a line per repository and a summary, and exit with 1 when one failed?"""
+        with patch("sys.stdout", new=StringIO()) as out:
+            status = cli.main([self.repo, os.path.join(self.dir, "missing"), "-o", self.out, "-j", "1"])
+        self.assertEqual(status, 1)
+        self.assertIn("4 commits (retrieved)", out.getvalue())
+        self.assertIn("failed after", out.getvalue())
+        self.assertIn("Processed 2 repositories (1 failed)", out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.out, "small.graphml")))
+        with patch("sys.stdout", new=StringIO()):
+            self.assertEqual(cli.main([self.repo, "-o", self.out, "-f", "tsv"]), 0)
+
+    def test_cache(self):
+        """Are cached logs reused while HEAD is unchanged, and updated with only new commits when it moves?"""
+        full = gitnet.get_log(self.repo)
+        log, how = cli.load_log(self.repo, cache=self.cache)
+        self.assertEqual(how, "retrieved")
+        log, how = cli.load_log(self.repo, cache=self.cache)
+        self.assertEqual(how, "cached")
+        self.assertEqual(len(log), len(full))
+        # Move HEAD back one commit, cache the shorter log, then move it forward again.
+        git = ["git", "--git-dir", os.path.join(self.repo, ".git")]
+        sub.check_call(git + ["reset", "-q", "--soft", "HEAD~1"])
+        log, how = cli.load_log(self.repo, cache=self.cache, incremental=True)
+        self.assertEqual((len(log), how), (len(full) - 1, "retrieved"))
+        sub.check_call(git + ["reset", "-q", "--soft", "ORIG_HEAD"])
+        log, how = cli.load_log(self.repo, cache=self.cache, incremental=True)
+        self.assertEqual(how, "updated")
+        self.assertListEqual(list(log.collection.keys()), list(full.collection.keys()))
+        self.assertDictEqual(log[list(full.collection.keys())[0]], full[list(full.collection.keys())[0]])
+        log, how = cli.load_log(self.repo, cache=self.cache, refresh=True)
+        self.assertEqual(how, "retrieved")
+
+    def test_names(self):
+        """Are repositories with the same directory name given different output names?"""
+        names = cli.output_names(["a/repo", "b/repo", "c/other"])
+        self.assertNotEqual(names[0], names[1])
+        self.assertTrue(names[0].startswith("repo-"))
+        self.assertEqual(names[2], "other")
+
+    def test_invalid(self):
+        """Are invalid formats rejected?"""
+        with self.assertRaises(InputError):
+            cli.run_batch([self.repo], output=self.out, formats=["pdf"])
+        with patch("sys.stderr", new=StringIO()), self.assertRaises(SystemExit):
+            cli.main([self.repo, "--incremental"])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+if __name__ == '__main__':
+    unittest.main(buffer=True)
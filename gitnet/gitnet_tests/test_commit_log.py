@@ -18,8 +18,11 @@ import gitnet
 import unittest
 import subprocess as sub
 import os
+import warnings
 from unittest.mock import patch
 from io import StringIO
+import gzip
+import pandas as pd
 from gitnet.exceptions import InputError
 
 
@@ -168,6 +171,19 @@ class DescribeTests(unittest.TestCase):
             self.assertNotIn("\nNumber of parsing errors: 0\n", output)
             self.assertEqual(output, "")
 
+    def test_exclude_aliases(self):
+        """Are the old date and domain tags still accepted, with a deprecation warning?"""
+        with patch('sys.stdout', new=StringIO()) as fake_out, warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            self.my_log.describe(exclude=["date", "utc_date", "utc_datetime", "domain"])
+            output = fake_out.getvalue()
+        self.assertEqual(len(w), 4)
+        self.assertTrue(all(issubclass(x.category, DeprecationWarning) for x in w))
+        self.assertIn("'domain' is deprecated, use 'emails'", str(w[3].message))
+        self.assertNotIn("Date range:", output)
+        self.assertNotIn("Most common email address domains:", output)
+        self.assertIn("Number of authors: 4", output)
+
     def test_filters(self):
         """Are the correct results obtained when the log has been filtered?"""
         with patch('sys.stdout', new=StringIO()) as fake_out:
@@ -225,6 +241,109 @@ class DescribeTests(unittest.TestCase):
         sub.call(["rm", "-rf", ".git"])
 
 
+class StatisticsTests(unittest.TestCase):
+    def setUp(self):
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        path = os.getcwd()
+        self.my_log = gitnet.get_log(path)
+
+    def test_values(self):
+        """Are the statistics those printed by describe?"""
+        stats = self.my_log.statistics()
+        self.assertEqual(stats.records, 4)
+        self.assertEqual(len(stats.authors), 4)
+        self.assertEqual(stats.authors["Randy"], 1)
+        self.assertEqual(stats.files, 7)
+        self.assertEqual(stats.domains, [(4, "@gmail.com")])
+        self.assertEqual(str(stats.earliest), "2016-05-20 09:19:20-04:00")
+        self.assertEqual(str(stats.latest), "2016-05-26 11:21:03-04:00")
+        self.assertEqual(round(stats.fedits[0], 3), 2.75)
+        self.assertEqual(round(stats.inserts[1], 3), 0.829)
+        self.assertNotEqual(stats.deletes[0], stats.deletes[0])
+        self.assertEqual(stats.merges, 0)
+        self.assertEqual(stats.errors, 0)
+
+    def test_cache(self):
+        """Are the statistics reused until the log changes?"""
+        stats = self.my_log.statistics()
+        self.assertIs(self.my_log.statistics(), stats)
+        self.my_log.mutate_attribute("author", lambda record: "Someone")
+        self.assertEqual(len(self.my_log.statistics().authors), 1)
+
+    def test_filtered(self):
+        """Does a filtered log get its own statistics?"""
+        self.my_log.statistics()
+        log = self.my_log.filter("author", "equals", "Randy", negate=True)
+        self.assertEqual(log.statistics().records, 3)
+        self.assertEqual(self.my_log.statistics().records, 4)
+
+    def test_empty(self):
+        """Are the statistics of an empty log defined?"""
+        stats = gitnet.CommitLog().statistics()
+        self.assertEqual(stats.records, 0)
+        self.assertIsNone(stats.earliest)
+        self.assertIsNone(stats.latest)
+        self.assertNotEqual(stats.fedits[0], stats.fedits[0])
+
+    def tearDown(self):
+        # Delete temporary .git file
+        sub.call(["rm", "-rf", ".git"])
+
+
+class FileChangesTests(unittest.TestCase):
+    def setUp(self):
+        # Set up small network
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        path = os.getcwd()
+        with patch('sys.stdout', new=StringIO()):
+            self.my_log = gitnet.get_log(path)
+        self.df = self.my_log.file_changes_df()
+
+    def test_rows(self):
+        """Is there one row per commit and file?"""
+        self.assertListEqual(list(self.df.columns), ["hash", "author", "timestamp", "path", "inserts", "deletes"])
+        self.assertEqual(len(self.df), len(self.my_log.vector("files")))
+        self.assertListEqual(list(self.df["path"]), self.my_log.vector("files"))
+        randy = self.df[self.df["author"] == "Randy"]
+        self.assertListEqual(list(randy["path"]), ["file1.md", "file2.md", "file3.md", "file4.md"])
+        self.assertEqual(randy["hash"].iloc[0], self.my_log["b3a4bac"]["hash"])
+
+    def test_values(self):
+        """Are timestamps in UTC, and line counts read from the changes?"""
+        self.assertEqual(str(self.df["timestamp"].iloc[0]), self.my_log["7965e62"]["utc_datetime"])
+        self.assertEqual(self.df["inserts"].sum(), sum(self.my_log.vector("inserts")))
+        self.assertEqual(self.df["deletes"].sum(), sum(self.my_log.vector("deletes")))
+        self.assertEqual(str(self.df["author"].dtype), "category")
+        self.assertEqual(self.df.groupby("author")["inserts"].sum()["Billy G"], 3)
+
+    def test_missing(self):
+        """Are commits without files skipped, and missing counts NaN?"""
+        log = gitnet.CommitLog({"a": {"hash": "a", "author": "X", "files": ["f.png"],
+                                      "changes": ["f.png | Bin 0 -> 10 bytes"]},
+                                "b": {"hash": "b", "author": "Y"}})
+        df = log.file_changes_df()
+        self.assertEqual(len(df), 1)
+        self.assertTrue(pd.isnull(df["inserts"].iloc[0]))
+        self.assertTrue(pd.isnull(df["timestamp"].iloc[0]))
+
+    def test_write(self):
+        """Does the writer produce the same table?"""
+        with patch('sys.stdout', new=StringIO()):
+            self.my_log.write_file_changes("temp_changes.tsv.gz")
+            self.my_log.write_file_changes("temp_changes.csv")
+        with gzip.open("temp_changes.tsv.gz", "rt") as f:
+            written = pd.read_csv(f, sep="\t", parse_dates=["timestamp"])
+        csv_written = pd.read_csv("temp_changes.csv", parse_dates=["timestamp"])
+        sub.call(["rm", "temp_changes.tsv.gz", "temp_changes.csv"])
+        for frame in (written, csv_written):
+            self.assertListEqual(list(frame["path"]), list(self.df["path"]))
+            self.assertListEqual(list(frame["timestamp"]), list(self.df["timestamp"]))
+            self.assertListEqual(list(frame["inserts"]), list(self.df["inserts"]))
+
+    def tearDown(self):
+        sub.call(["rm", "-rf", ".git"])
+
+
 class IgnoreTests(unittest.TestCase):
     def setUp(self):
         # Set up small network
@@ -265,6 +384,47 @@ class IgnoreTests(unittest.TestCase):
         sub.call(["rm", "-rf", ".git"])
 
 
+class IdentityTests(unittest.TestCase):
+    def setUp(self):
+        data = {"a1": {"author": "Alice", "email": "alice@gmail.com"},
+                "a2": {"author": "Alice", "email": "alice@uw.ca"},
+                "a3": {"author": "alice", "email": "alice@uw.ca"},
+                "a4": {"author": "Alice S", "email": "ALICE@gmail.com"},
+                "b1": {"author": "Bob", "email": "bob@gmail.com"},
+                "b2": {"author": "bobby", "email": "bobby@gmail.com"},
+                "c1": {"author": "Carol", "email": "none@none"},
+                "d1": {"author": "Dan", "email": "none@none"}}
+        self.log = gitnet.CommitLog(data)
+        self.mailmap = os.getcwd() + "/temp.mailmap"
+
+    def test_resolve(self):
+        """Are authors linked through shared emails?"""
+        self.assertDictEqual(self.log.resolve_identities(ignore_emails=["none@none"]),
+                             {"alice": "Alice", "Alice S": "Alice"})
+        self.assertDictEqual(self.log.resolve_identities(),
+                             {"alice": "Alice", "Alice S": "Alice", "Dan": "Carol"})
+
+    def test_mailmap(self):
+        """Are mailmap entries applied before linking, and are their names preferred?"""
+        with open(self.mailmap, "w") as f:
+            f.write("# Comment line\n"
+                    "Robert Smith <bob@gmail.com>\n"
+                    "<bob@gmail.com> bobby <bobby@gmail.com>\n"
+                    "Alice Smith <ALICE@uw.ca>\n")
+        resolved = self.log.resolve_identities(mailmap=self.mailmap, ignore_emails=["none@none"])
+        self.assertDictEqual(resolved, {"Bob": "Robert Smith", "bobby": "Robert Smith",
+                                        "Alice": "Alice Smith", "alice": "Alice Smith", "Alice S": "Alice Smith"})
+
+    def test_merge(self):
+        merged = self.log.merge_identities(ignore_emails=["none@none"])
+        self.assertSetEqual(set(merged.vector("author")), {"Alice", "Bob", "bobby", "Carol", "Dan"})
+        self.assertEqual(self.log["a4"]["author"], "Alice S")
+
+    def tearDown(self):
+        if os.path.exists(self.mailmap):
+            os.remove(self.mailmap)
+
+
 class NetworkTests(unittest.TestCase):
     def setUp(self):
         # Set up small network
@@ -430,5 +590,75 @@ class NetworkTests(unittest.TestCase):
         sub.call(["rm", "-rf", ".git"])
 
 
+class ConcatTests(unittest.TestCase):
+    def setUp(self):
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        self.my_log = gitnet.get_log(os.getcwd())
+        self.combined = gitnet.CommitLog.concat([self.my_log, self.my_log], names=["a", "b"])
+
+    def test_keys(self):
+        """Are keys namespaced by repository, with repo tags added and the inputs left unchanged?"""
+        self.assertEqual(len(self.combined), 8)
+        self.assertIn("a:7965e62", self.combined.collection)
+        self.assertIn("b:7965e62", self.combined.collection)
+        record = self.combined["b:b3a4bac"]
+        self.assertEqual(record["repo"], "b")
+        self.assertEqual(record["author"], "Randy")
+        self.assertNotIn("repo", self.my_log["b3a4bac"])
+        self.assertEqual(self.combined.key_type, "repo:hash")
+        self.assertIsNone(self.combined.path)
+        self.assertDictEqual(self.combined.repos, {"a": self.my_log.path, "b": self.my_log.path})
+        self.assertEqual(self.combined.statistics().authors["Randy"], 2)
+
+    def test_names(self):
+        """Are default names unique, and are invalid names rejected?"""
+        combined = gitnet.CommitLog.concat([self.my_log, self.my_log])
+        self.assertEqual(sorted(set(combined.vector("repo"))), ["gitnet_tests1", "gitnet_tests2"])
+        with self.assertRaises(InputError):
+            gitnet.CommitLog.concat([self.my_log, self.my_log], names=["a", "a"])
+        with self.assertRaises(InputError):
+            gitnet.CommitLog.concat([self.my_log], names=["a", "b"])
+        # A combined log has no single path, so combining it again uses a default name.
+        nested = gitnet.CommitLog.concat([self.combined, self.my_log])
+        self.assertEqual(sorted(nested.repos), ["gitnet_tests", "repo"])
+
+    def test_networks(self):
+        """Do the repository presets keep files from different repositories apart?"""
+        graph = self.combined.network("author/repo")
+        self.assertEqual(graph.number_of_edges(), 8)
+        self.assertEqual(graph.node["a"]["type"], "repo")
+        self.assertEqual(len(graph.neighbors("Randy")), 2)
+        graph = self.combined.network("author/repo_file")
+        files = [n for n in graph.nodes() if graph.node[n]["type"] == "repo_files"]
+        self.assertEqual(len(files), 14)
+        self.assertEqual(graph.node["a/file1.md"]["repo"], "a")
+        weighted = self.combined.network("author/repo_file/weighted")
+        single = self.my_log.network("author/file/weighted")
+        self.assertEqual(weighted["Randy"]["b/file1.md"][0]["weight"], single["Randy"]["file1.md"][0]["weight"])
+
+    def test_changed_files(self):
+        """Do repository-qualified paths follow files which were ignored or renamed after concat?"""
+        graph = self.combined.ignore("file1").network("author/repo_file")
+        self.assertNotIn("a/file1.md", graph.nodes())
+        self.assertIn("a/file2.md", graph.nodes())
+        graph = self.combined.merge_values("files", {"file2.md": "renamed.md"}).network("author/repo_file")
+        self.assertNotIn("b/file2.md", graph.nodes())
+        self.assertIn("b/renamed.md", graph.nodes())
+        self.assertNotIn("repo_files", self.combined.attributes())
+
+    def test_mailmap(self):
+        """Is the .mailmap of each repository used by resolve_identities?"""
+        with open(".mailmap", "w") as f:
+            f.write("Randy Proper <{}>\n".format(self.my_log["b3a4bac"]["email"]))
+        try:
+            self.assertDictEqual(self.combined.resolve_identities(mailmap=True), {"Randy": "Randy Proper"})
+        finally:
+            os.remove(".mailmap")
+        self.assertDictEqual(self.combined.resolve_identities(mailmap=True), {})
+
+    def tearDown(self):
+        sub.call(["rm", "-rf", ".git"])
+
+
 if __name__ == '__main__':
     unittest.main(buffer=True)
@@ -37,6 +37,17 @@ class DatetimeTests(unittest.TestCase):
         self.assertIn("Mon May 23 02:45:25 2016 -0400", self.data)
         sub.call(["rm", "-rf", "sample_datetime.txt"])
 
+    def test_git_timestamps(self):
+        dates = ["Mon May 23 02:45:25 2016 -0400", "Fri May 6 23:59:59 2016 +0530", "Thu Jan 1 00:00:00 1970 +0000",
+                 "Not a date", None]
+        times = helpers.git_timestamps(dates)
+        for date, time in zip(dates[:3], times[:3]):
+            self.assertEqual(time, helpers.git_timestamp(date))
+        self.assertEqual(times[2], 0)
+        self.assertNotEqual(times[3], times[3])
+        self.assertNotEqual(times[4], times[4])
+        self.assertEqual(len(helpers.git_timestamps([])), 0)
+
     def test_reference_datetime(self):
         # Unsure how to test beyond datetime_git testing.
         # There is no requirement to test for bad datetimes, since commits cannot be made with a bad datetime.
@@ -215,6 +226,18 @@ class ListTests(unittest.TestCase):
         self.assertEqual(helpers.list_to_scd(self.lofl), '[2, 3];[\'a\', \'b\'];[1, \'c\']')
 
 
+class ResolveAliasesTests(unittest.TestCase):
+    def test_chains(self):
+        self.assertDictEqual(helpers.resolve_aliases({'a': 'b', 'b': 'c'}), {'a': 'c', 'b': 'c'})
+        self.assertDictEqual(helpers.resolve_aliases({'b': 'c', 'a': 'b'}), {'a': 'c', 'b': 'c'})
+        self.assertDictEqual(helpers.resolve_aliases({'a': 'c', 'b': 'c', 'd': 'e'}), {'a': 'c', 'b': 'c', 'd': 'e'})
+
+    def test_cycle(self):
+        res = helpers.resolve_aliases({'a': 'b', 'b': 'a'})
+        self.assertEqual(len(res), 1)
+        self.assertEqual(len(set(res) | set(res.values())), 2)
+
+
 class EdgeGenTests(unittest.TestCase):
     def setUp(self):
         # Set up Repo One
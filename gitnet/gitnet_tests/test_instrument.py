@@ -0,0 +1,167 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import os
+import sys
+import logging
+import unittest
+import subprocess as sub
+from io import StringIO
+from unittest.mock import patch
+import gitnet
+from gitnet import instrument
+
+
+class InstrumentTests(unittest.TestCase):
+    def setUp(self):
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        self.path = os.getcwd()
+
+    def test_get_log(self):
+        """Are the stages of get_log reported, with their nesting?"""
+        with instrument.Recorder() as recorder:
+            log = gitnet.get_log(self.path)
+        stages = [event.stage for event in recorder.events]
+        self.assertListEqual(stages, ["retrieve_commits", "parse_commits", "CommitLog.annotate", "get_log"])
+        events = {event.stage: event for event in recorder.events}
+        self.assertEqual(events["get_log"].depth, 0)
+        self.assertEqual(events["parse_commits"].depth, 1)
+        self.assertEqual(events["parse_commits"].records, 4)
+        self.assertEqual(events["get_log"].records, 4)
+        self.assertGreater(events["retrieve_commits"].bytes, 0)
+        self.assertGreaterEqual(events["get_log"].seconds, events["parse_commits"].seconds)
+        self.assertIsNone(events["get_log"].error)
+        self.assertEqual(len(log), 4)
+        self.assertGreater(recorder.totals()["get_log"], 0)
+
+    def test_disabled(self):
+        """Is nothing reported without handlers?"""
+        recorder = instrument.Recorder()
+        self.assertFalse(instrument.enabled())
+        gitnet.get_log(self.path)
+        self.assertListEqual(recorder.events, [])
+        with recorder:
+            self.assertTrue(instrument.enabled())
+        self.assertFalse(instrument.enabled())
+
+    def test_network_and_writers(self):
+        """Are filtering, network generation and writers reported?"""
+        log = gitnet.get_log(self.path)
+        with instrument.Recorder() as recorder:
+            filtered = log.filter("author", "equals", "Randy", negate=True)
+            graph = filtered.generate_network("author", "files")
+            filtered.tsv(None)
+            graph.write_graphml("instrument_test.graphml")
+        sub.call(["rm", "-f", "instrument_test.graphml"])
+        events = {event.stage: event for event in recorder.events}
+        self.assertEqual(events["Log.filter"].records, 3)
+        self.assertEqual(events["Log.generate_network"].records, graph.number_of_edges())
+        self.assertEqual(events["Log.tsv"].records, 3)
+        self.assertEqual(events["MultiGraphPlus.write_graphml"].records, graph.number_of_edges())
+
+    def test_error(self):
+        """Is a failed stage reported with its exception?"""
+        log = gitnet.get_log(self.path)
+        with instrument.Recorder() as recorder:
+            with self.assertRaises(KeyError):
+                log.filter("author", "no such function", "Randy")
+        self.assertEqual(recorder.events[-1].stage, "Log.filter")
+        self.assertEqual(recorder.events[-1].error, "KeyError")
+
+    def test_stage(self):
+        """Can code report its own stages?"""
+        with instrument.Recorder() as recorder:
+            with instrument.Stage("custom", repo="x") as stage:
+                stage.records = 10
+        self.assertEqual(recorder.events[0].stage, "custom")
+        self.assertEqual(recorder.events[0].records, 10)
+        self.assertDictEqual(recorder.events[0].details, {"repo": "x"})
+
+    def test_reporter(self):
+        """Does the reporter print one indented line per stage?"""
+        out = StringIO()
+        with instrument.Reporter(out):
+            gitnet.get_log(self.path)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("  retrieve_commits: "))
+        self.assertTrue(lines[-1].startswith("get_log: "))
+        self.assertIn("4 records", lines[-1])
+
+    def tearDown(self):
+        sub.call(["rm", "-rf", ".git"])
+
+
+class LoggingTests(unittest.TestCase):
+    def setUp(self):
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        self.path = os.getcwd()
+
+    def test_quiet(self):
+        """Is nothing printed by default?"""
+        with patch('sys.stdout', new=StringIO()) as out, patch('sys.stderr', new=StringIO()) as err:
+            log = gitnet.get_log(self.path)
+            log.generate_network("author", "files")
+            log.replace_val("author", "Randy", "Randall")
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(err.getvalue(), "")
+
+    def test_enable_logging(self):
+        """Are messages written once logging is enabled?"""
+        out = StringIO()
+        handler = gitnet.enable_logging(stream=out)
+        try:
+            log = gitnet.get_log(self.path)
+            log.generate_network("author", "files")
+        finally:
+            logging.getLogger("gitnet").removeHandler(handler)
+            logging.getLogger("gitnet").setLevel(logging.NOTSET)
+        self.assertIn("Got ", out.getvalue())
+        self.assertIn("Created a MultiGraphPlus network object with", out.getvalue())
+
+    def test_progress(self):
+        """Are progress callbacks given the final counts?"""
+        calls = []
+        log = gitnet.get_log(self.path, progress=lambda stage, count: calls.append((stage, count)))
+        self.assertListEqual(calls, [("parse_commits", 4)])
+        calls = []
+        graph = log.network("author/file", progress=lambda stage, count: calls.append((stage, count)))
+        self.assertListEqual(calls, [("generate_network", graph.number_of_edges())])
+
+    def test_tracked(self):
+        """Are callbacks made every so many items, and is an untracked iterable returned as is?"""
+        items = list(range(25))
+        self.assertIs(instrument.tracked(items, None, "x"), items)
+        calls = []
+        self.assertListEqual(list(instrument.tracked(items, lambda s, n: calls.append(n), "x", every=10)), items)
+        self.assertListEqual(calls, [10, 20, 25])
+
+    def tearDown(self):
+        sub.call(["rm", "-rf", ".git"])
+
+
+class ImportTests(unittest.TestCase):
+    def test_lazy_imports(self):
+        """Does importing gitnet leave pandas and matplotlib unimported until they are needed?"""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(gitnet.__file__)))
+        script = "import sys, gitnet; print(' '.join(m for m in ('pandas', 'matplotlib') if m in sys.modules))"
+        env = dict(os.environ, PYTHONPATH=root)
+        out = sub.check_output([sys.executable, "-c", script], env=env)
+        self.assertEqual(out.decode("utf-8").strip(), "")
+
+
+if __name__ == '__main__':
+    unittest.main(buffer=True)
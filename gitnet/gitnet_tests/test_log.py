@@ -16,6 +16,7 @@
 
 import unittest
 import os
+import gzip
 import warnings
 import subprocess as sub
 import gitnet
@@ -24,6 +25,11 @@ from io import StringIO
 import pandas as pd
 from pandas.util.testing import assert_frame_equal
 import types
+import pickle
+import shutil
+import tempfile
+import copy
+from gitnet.storage import StoredCollection
 
 
 class MagicMethodTests(unittest.TestCase):
@@ -102,6 +108,24 @@ class AttributesTests(unittest.TestCase):
         # Delete the temporary .git folder
         sub.call(["rm", "-rf", ".git"])
 
+    def test_cache(self):
+        """Is the result cached, and updated when attributes are added?"""
+        self.log.collection["Alice"]["zip"] = "N2L"
+        self.assertListEqual(self.log.attributes(), ['email', 'loc', 'type'])
+        self.log.clear_cache()
+        self.assertListEqual(self.log.attributes(), ['email', 'loc', 'type', 'zip'])
+        self.log.mutate_attribute("initial", lambda record: record["email"][0])
+        self.assertIn("initial", self.log.attributes())
+        # Copies with new collections do not share the cache.
+        added = self.log.add_attribute("upper", lambda record: record["loc"].upper())
+        self.assertIn("upper", added.attributes())
+        self.assertNotIn("upper", self.log.attributes())
+        filtered = self.log.filter("loc", "equals", "Kitchener")
+        self.assertListEqual(filtered.attributes(), ['email', 'initial', 'loc', 'type'])
+        # The cached list cannot be changed by callers.
+        self.log.attributes().append("other")
+        self.assertNotIn("other", self.log.attributes())
+
 class AddAttributeTest(unittest.TestCase):
     """
     Tests for the add_attribute method.
@@ -546,6 +570,36 @@ class TsvTests(unittest.TestCase):
         self.assertIsInstance(tsv_str, str)
         self.assertIn('t', tsv_str)
 
+    def test_no_file(self):
+        """Is the data returned, without printing it, when no file name is given?"""
+        with patch('sys.stdout', new=StringIO()) as out:
+            tsv_str = self.log.tsv(None)
+        self.assertEqual(out.getvalue(), "")
+        lines = tsv_str.split("\n")
+        self.assertEqual(lines[0], "age\tbooks\temail\tloc\tstars\ttype")
+        self.assertIn("25\tBookA;BookB\talice@gmail.com\tWaterloo\t4;5\tauthor", lines)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[-1], "")
+        with open('temp.tsv') as f:
+            self.assertEqual(f.read(), tsv_str)
+
+    def test_file_object(self):
+        """Can the data be written to file objects, in chunks, and compressed?"""
+        expected = self.log.tsv(None)
+        buffer = StringIO()
+        with patch('sys.stdout', new=StringIO()):
+            self.log.tsv(buffer, chunksize=1)
+        self.assertEqual(buffer.getvalue(), expected)
+        with patch('sys.stdout', new=StringIO()):
+            with gzip.open('temp.tsv.gz', 'wt') as f:
+                self.log.tsv(f)
+            self.log.tsv('temp2.tsv.gz', ignore=["age"])
+        with gzip.open('temp.tsv.gz', 'rt') as f:
+            self.assertEqual(f.read(), expected)
+        with gzip.open('temp2.tsv.gz', 'rt') as f:
+            self.assertTrue(f.read().startswith("books\temail"))
+        sub.call(['rm', 'temp.tsv.gz', 'temp2.tsv.gz'])
+
     def test_empty_cols(self):
         tsv_str = self.log.tsv('temp.tsv', empty_cols=True)
         # Checking file is created
@@ -599,6 +653,58 @@ class DataFrameTests(unittest.TestCase):
         # Checking the created dataframe matches the expected dataframe
         assert_frame_equal(expected_df, self.df)
 
+    def test_from_dict(self):
+        """Is the dataframe the same as one built by pandas from the records?"""
+        data = {"a": {"author": "Alice", "inserts": 3, "deletes": 1.5, "merge": True},
+                "b": {"author": "Bobby", "inserts": 4, "files": ["f1", "f2"], "merge": False},
+                "c": {"author": "Alice", "files": ["f2"]}}
+        log = gitnet.Log(data)
+        expected = pd.DataFrame.from_dict(data, orient="index")[log.attributes()]
+        assert_frame_equal(expected, log.df())
+
+    def test_dtypes(self):
+        """Do numeric columns get numeric dtypes?"""
+        data = {"a": {"n": 1, "x": 1.5, "m": 2, "b": True},
+                "b": {"n": 2, "x": 2, "b": False}}
+        df = gitnet.Log(data).df()
+        self.assertEqual(df["n"].dtype, "int64")
+        self.assertEqual(df["x"].dtype, "float64")
+        self.assertEqual(df["m"].dtype, "float64")
+        self.assertTrue(pd.isnull(df.loc["b", "m"]))
+        self.assertEqual(df["b"].dtype, "bool")
+
+    def test_categorical(self):
+        """Are categorical columns converted?"""
+        df = self.log.df(categorical=["type", "loc"])
+        self.assertEqual(str(df["type"].dtype), "category")
+        self.assertListEqual(list(df["type"].cat.categories), ["author"])
+        self.assertEqual(df.loc["Bobby", "loc"], "Kitchener")
+        self.assertEqual(df["email"].dtype, object)
+
+    def test_explode(self):
+        """Does explode produce one row per item?"""
+        df = self.log.df(explode="books")
+        self.assertListEqual(list(df.columns), ["books"])
+        self.assertListEqual(list(df.index), ["Alice", "Alice", "Bobby", "Bobby"])
+        self.assertListEqual(list(df["books"]), ["BookA", "BookB", "BookC", "BookD"])
+        stars = self.log.df(explode="stars")
+        self.assertEqual(stars["stars"].dtype, "int64")
+        self.assertEqual(len(self.log.df(explode="email")), 2)
+
+    def test_mapped(self):
+        """Are numeric columns of a memory-mapped log read without decoding?"""
+        tmp = tempfile.mkdtemp()
+        data = {str(i): {"n": i, "s": "v{}".format(i % 3)} for i in range(50)}
+        with patch('sys.stdout', new=StringIO()):
+            gitnet.Log(data).to_mmap(os.path.join(tmp, "store"))
+        log = gitnet.Log.from_mmap(os.path.join(tmp, "store"))
+        self.assertEqual(len(log.collection.array("n")), 50)
+        self.assertIsNone(log.collection.array("s"))
+        assert_frame_equal(log.df(), gitnet.Log(data).df())
+        filtered = log.filter("s", "equals", "v1")
+        self.assertListEqual(list(filtered.df()["n"]), list(range(1, 50, 3)))
+        shutil.rmtree(tmp)
+
 
 class VectorTests(unittest.TestCase):
     def setUp(self):
@@ -643,6 +749,232 @@ class VectorTests(unittest.TestCase):
         vect_notag = log.vector("phone_num")
         self.assertListEqual(vect_notag, [])
 
+    def test_iter_vector(self):
+        """Does iter_vector yield the same values as vector, without a list?"""
+        self.assertIsInstance(self.log.iter_vector("books"), types.GeneratorType)
+        for tag in ["email", "books", "stars", "phone_num"]:
+            self.assertListEqual(list(self.log.iter_vector(tag)), self.log.vector(tag))
+
+    def test_unique(self):
+        """Are distinct values found, counting list items individually?"""
+        self.assertSetEqual(self.log.unique("type"), {"author"})
+        self.assertSetEqual(self.log.unique("stars"), {4, 5})
+        self.assertSetEqual(self.log.unique("phone_num"), set())
+
+    def test_value_counts(self):
+        """Are values counted, counting list items individually?"""
+        counts = self.log.value_counts("stars")
+        self.assertDictEqual(dict(counts), {4: 3, 5: 1})
+        self.assertListEqual(counts.most_common(1), [(4, 3)])
+        self.assertDictEqual(dict(self.log.value_counts("type")), {"author": 2})
+
+    def test_top(self):
+        """Are the most frequent values found, exactly or with a bounded summary?"""
+        self.assertListEqual(self.log.top("stars", 1), [(3, 4)])
+        self.assertListEqual(self.log.top("books", 1), [(1, "BookD"), (1, "BookC"), (1, "BookB"), (1, "BookA")])
+        self.assertListEqual(self.log.top("stars", 1, capacity=1), [(4, 4)])
+        self.assertListEqual(self.log.top("phone_num"), [])
+
+
+class MmapTests(unittest.TestCase):
+    def setUp(self):
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        self.good_path = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        self.store = os.path.join(self.tmp, "store")
+        with patch('sys.stdout', new=StringIO()):
+            self.my_log = gitnet.get_log(self.good_path)
+            self.my_log.to_mmap(self.store)
+        self.mapped = gitnet.CommitLog.from_mmap(self.store)
+
+    def test_round_trip(self):
+        """Are the records and metadata of a log preserved by the store?"""
+        self.assertIsInstance(self.mapped, gitnet.CommitLog)
+        self.assertEqual(len(self.mapped), len(self.my_log))
+        self.assertEqual(list(self.mapped.collection), list(self.my_log.collection))
+        for sha in self.my_log.collection:
+            self.assertEqual(self.mapped.collection[sha], self.my_log.collection[sha])
+        self.assertEqual(self.mapped.path, self.my_log.path)
+        self.assertEqual(self.mapped.timestamp, self.my_log.timestamp)
+
+    def test_vector(self):
+        """Does vector read the same values from the store?"""
+        self.assertListEqual(self.mapped.vector("files"), self.my_log.vector("files"))
+
+    def test_custom_store(self):
+        """Can a StoredCollection which only defines the mapping methods be filtered and copied?"""
+        class DictStore(StoredCollection):
+            def __init__(self, records):
+                self.records = records
+                self.meta = {}
+
+            def __getitem__(self, key):
+                return self.records[key]
+
+            def __iter__(self):
+                return iter(self.records)
+
+            def __len__(self):
+                return len(self.records)
+
+        store = DictStore(dict(self.my_log.collection))
+        log = gitnet.CommitLog(dofd=store, source="custom")
+        filtered = log.filter("author", "equals", "Randy")
+        self.assertIsInstance(filtered.collection, StoredCollection)
+        self.assertListEqual(list(filtered.collection), ["b3a4bac"])
+        self.assertEqual(filtered["b3a4bac"], self.my_log["b3a4bac"])
+        kept = [k for k in self.my_log.collection if k != "b3a4bac"]
+        self.assertListEqual(list(store.subset(reversed(kept))), kept)
+        copied = copy.deepcopy(filtered)
+        self.assertIs(type(copied.collection), dict)
+        self.assertEqual(copied.collection, {"b3a4bac": self.my_log["b3a4bac"]})
+        self.assertListEqual(self.mapped.vector("inserts"), self.my_log.vector("inserts"))
+        self.assertListEqual(self.mapped.vector("no_tag"), [])
+
+    def test_filter(self):
+        """Does filtering a mapped log produce a mapped view with the same records?"""
+        expected = self.my_log.filter("author", "equals", "Marcela")
+        filtered = self.mapped.filter("author", "equals", "Marcela")
+        self.assertIsInstance(filtered.collection, gitnet.storage.MappedCollection)
+        self.assertEqual(dict(filtered.collection.items()), expected.collection)
+        self.assertEqual(filtered.filters, expected.filters)
+        self.assertEqual(self.mapped.filters, [])
+        negated = self.mapped.filter("files", "equals", "file6.md", negate=True)
+        self.assertEqual(set(negated.collection), set(self.my_log.filter("files", "equals", "file6.md",
+                                                                         negate=True).collection))
+
+    def test_df(self):
+        """Is the dataframe of a mapped log the same as an in-memory log's?"""
+        expected = self.my_log.df()
+        mapped = self.mapped.df()
+        self.assertListEqual(list(mapped.columns), list(expected.columns))
+        self.assertEqual(set(mapped.index), set(expected.index))
+        self.assertEqual(mapped.loc["7965e62", "author"], expected.loc["7965e62", "author"])
+        self.assertEqual(mapped.loc["7965e62", "files"], expected.loc["7965e62", "files"])
+
+    def test_network(self):
+        """Are networks generated from a mapped log the same?"""
+        expected = self.my_log.generate_network("author", "files")
+        graph = self.mapped.generate_network("author", "files")
+        self.assertEqual(set(graph.nodes()), set(expected.nodes()))
+        self.assertEqual(graph.number_of_edges(), expected.number_of_edges())
+
+    def test_modify(self):
+        """Do modifying methods return in-memory copies?"""
+        with patch('sys.stdout', new=StringIO()):
+            replaced = self.mapped.replace_val("author", "Marcela", "Marcy")
+        self.assertIsInstance(replaced.collection, dict)
+        self.assertIn("Marcy", replaced.vector("author"))
+        self.assertIn("Marcela", self.mapped.vector("author"))
+
+    def test_pickle(self):
+        """Can a mapped view be pickled, e.g. to share it with worker processes?"""
+        filtered = self.mapped.filter("author", "equals", "Marcela")
+        copy = pickle.loads(pickle.dumps(filtered))
+        self.assertEqual(dict(copy.collection.items()), dict(filtered.collection.items()))
+
+    def test_get_log(self):
+        """Can get_log stream commits straight into a store?"""
+        store = os.path.join(self.tmp, "direct")
+        with patch('sys.stdout', new=StringIO()):
+            direct = gitnet.get_log(self.good_path, store=store)
+        self.assertIsInstance(direct.collection, gitnet.storage.MappedCollection)
+        self.assertEqual(dict(direct.collection.items()), self.my_log.collection)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+        sub.call(["rm", "-rf", ".git"])
+
+
+class SQLiteTests(unittest.TestCase):
+    def setUp(self):
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        self.good_path = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        self.db = os.path.join(self.tmp, "log.db")
+        with patch('sys.stdout', new=StringIO()):
+            self.my_log = gitnet.get_log(self.good_path)
+            self.my_log.to_sqlite(self.db)
+        self.stored = gitnet.CommitLog.from_sqlite(self.db)
+
+    def test_round_trip(self):
+        """Are the records and metadata of a log preserved by the database?"""
+        self.assertIsInstance(self.stored, gitnet.CommitLog)
+        self.assertEqual(list(self.stored.collection), list(self.my_log.collection))
+        self.assertEqual(dict(self.stored.collection.items()), self.my_log.collection)
+        self.assertEqual(self.stored["7965e62"], self.my_log["7965e62"])
+        self.assertEqual(self.stored.timestamp, self.my_log.timestamp)
+        self.assertListEqual(self.stored.attributes(), self.my_log.attributes())
+
+    def test_tables(self):
+        """Are authors, files and per-file line counts stored in their own tables?"""
+        conn = gitnet.database.connect(self.db)
+        authors = conn.execute("SELECT name FROM authors ORDER BY name").fetchall()
+        self.assertListEqual([a[0] for a in authors], ["Billy G", "Jenna", "Marcela", "Randy"])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 7)
+        counts = conn.execute("SELECT SUM(inserts), SUM(deletes) FROM commit_files").fetchone()
+        self.assertEqual(counts[0], sum(self.my_log.vector("inserts")))
+        self.assertEqual(counts[1], sum(self.my_log.vector("deletes")))
+        conn.close()
+
+    def test_change_counts(self):
+        """Are line counts read from change strings, including scaled graphs?"""
+        self.assertTupleEqual(gitnet.helpers.change_counts("README.md | 6 +++---"), (3, 3))
+        self.assertTupleEqual(gitnet.helpers.change_counts("big.py | 100 ++++++++-"), (89, 11))
+        self.assertTupleEqual(gitnet.helpers.change_counts("img.png | Bin 0 -> 10 bytes"), (None, None))
+
+    def test_filter_pushdown(self):
+        """Do filters evaluated by SQLite keep the same records as filters in Python?"""
+        checks = [("author", "equals", "Marcela", False),
+                  ("email", "has", "@gmail", False),
+                  ("files", "equals", "file6.md", False),
+                  ("files", "has", "file[35]", True),
+                  ("hash", "equals", "b3a4bac", False),
+                  ("date", "since", "Thu May 26 10:00:00 2016 -0400", False),
+                  ("date", "beforex", "Thu May 26 10:00:00 2016 -0400", True)]
+        for tag, fun, match, negate in checks:
+            expected = self.my_log.filter(tag, fun, match, negate=negate)
+            filtered = self.stored.filter(tag, fun, match, negate=negate)
+            self.assertIsInstance(filtered.collection, gitnet.database.SQLiteCollection)
+            self.assertEqual(filtered.collection._ids, None)
+            self.assertListEqual(list(filtered.collection), list(expected.collection))
+            self.assertListEqual(filtered.filters, expected.filters)
+
+    def test_filter_python(self):
+        """Are other filters evaluated in Python, and combined with pushed down filters?"""
+        expected = self.my_log.filter("author", "has", "a").filter("message", "has", "file")
+        filtered = self.stored.filter("author", "has", "a").filter("message", "has", "file")
+        self.assertIsInstance(filtered.collection, gitnet.database.SQLiteCollection)
+        self.assertListEqual(list(filtered.collection), list(expected.collection))
+        self.assertEqual(len(filtered), len(expected))
+        self.assertEqual(dict(filtered.collection.items()), expected.collection)
+
+    def test_where(self):
+        """Can records be selected with SQL when the log is opened?"""
+        stored = gitnet.CommitLog.from_sqlite(self.db, where="authors.name = ?", params=("Jenna",))
+        self.assertListEqual(stored.vector("author"), ["Jenna"])
+        self.assertEqual(len(stored.filters), 1)
+
+    def test_network(self):
+        """Are networks generated from joined tables the same as from records?"""
+        expected = self.my_log.generate_network("author", "files")
+        graph = self.stored.generate_network("author", "files")
+        self.assertEqual(set(graph.nodes()), set(expected.nodes()))
+        self.assertEqual(sorted((u, v) for u, v in graph.edges()), sorted((u, v) for u, v in expected.edges()))
+        edges = list(self.stored.filter("author", "equals", "Randy").generate_edges("author", "files"))
+        self.assertListEqual(edges, list(self.my_log.filter("author", "equals", "Randy").generate_edges("author",
+                                                                                                       "files")))
+
+    def test_pickle(self):
+        """Can a filtered view be pickled?"""
+        filtered = self.stored.filter("author", "equals", "Marcela").filter("message", "has", "file")
+        copy = pickle.loads(pickle.dumps(filtered))
+        self.assertListEqual(list(copy.collection), list(filtered.collection))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+        sub.call(["rm", "-rf", ".git"])
+
 
 class ReplaceValTests(unittest.TestCase):
     """Tests for the replace value function in the Log class."""
@@ -693,6 +1025,38 @@ class ReplaceValTests(unittest.TestCase):
         sub.call(["rm", "-rf", ".git"])
 
 
+class MergeValuesTests(unittest.TestCase):
+    """Tests for the merge_values method in the Log class."""
+
+    def setUp(self):
+        # Set up small network
+        sub.call(["cp", "-R", "small_network_repo.git", ".git"])
+        self.good_path = os.getcwd()
+        self.my_log = gitnet.get_log(self.good_path)
+
+    def test_chain(self):
+        """Are chains of aliases resolved in a single call?"""
+        merged = self.my_log.merge_values("author", {"Billy G": "Jenna", "Jenna": "Randy"})
+        self.assertEqual(merged["6cd4bbf"]["author"], "Randy")
+        self.assertEqual(merged["ee2c408"]["author"], "Randy")
+        self.assertEqual(merged["7965e62"]["author"], "Marcela")
+        # The original log is unchanged
+        self.assertEqual(self.my_log["6cd4bbf"]["author"], "Billy G")
+
+    def test_list_tag(self):
+        """Are values in list tags replaced item by item?"""
+        merged = self.my_log.merge_values("files", {"file7.md": "file6.md"})
+        self.assertListEqual(sorted(merged["7965e62"]["files"]), ["file6.md", "file6.md"])
+
+    def test_network(self):
+        net = self.my_log.merge_values("author", {"Billy G": "Marcela"}).generate_network("author", "files")
+        self.assertNotIn("Billy G", net.nodes())
+        self.assertSetEqual(set(net.edge["Marcela"]), {"file4.md", "file5.md", "file6.md", "file7.md"})
+
+    def tearDown(self):
+        sub.call(["rm", "-rf", ".git"])
+
+
 class GenEdgesTests(unittest.TestCase):
     def setUp(self):
         # Set up small network
@@ -1300,6 +1664,24 @@ class WriteEdgesTests(unittest.TestCase):
         # Close file
         f.close()
 
+    def test_quoting(self):
+        """Are values containing commas or quotes quoted?"""
+        data = {"a": {"author": 'Smith, "Jo"', "files": ["dir/a,b.py", "c.py"]}}
+        gitnet.Log(data).write_edges("temp_edges.txt", mode1="author", mode2="files", edge_attribute=[])
+        with open("temp_edges.txt", "r") as f:
+            f_str = f.read()
+        self.assertIn('"Smith, ""Jo""","dir/a,b.py"\n', f_str)
+        self.assertIn('"Smith, ""Jo""",c.py\n', f_str)
+
+    def test_compressed(self):
+        """Is a file name ending in .gz written as a gzip stream?"""
+        self.my_log.write_edges("temp_edges.txt.gz", mode1="author", mode2="files")
+        with gzip.open("temp_edges.txt.gz", "rt") as f:
+            f_str = f.read()
+        sub.call(["rm", "temp_edges.txt.gz"])
+        self.assertIn("id1,id2,weight,date\n", f_str)
+        self.assertIn("Marcela,file6.md,NA,5-26-2016\n", f_str)
+
     def tearDown(self):
         # Delete the temporary .git folder
         sub.call(["rm", "-rf", ".git"])
@@ -1359,6 +1741,16 @@ class WriteNodesTests(unittest.TestCase):
         # Close File
         f.close()
 
+    def test_compressed(self):
+        """Is a file name ending in .gz written as a gzip stream?"""
+        self.my_log.write_nodes(fname='temp_node.txt.gz', mode1="author", mode2="files",
+                                keep_atom1=['email'], keep_vector1=['records'])
+        with gzip.open("temp_node.txt.gz", "rt") as f:
+            f_str = f.read()
+        sub.call(["rm", "temp_node.txt.gz"])
+        self.assertIn("hashid,id,type,email,records", f_str)
+        self.assertIn("Randy,author,randy@gmail.com,b3a4bac", f_str)
+
     def tearDown(self):
         # Delete the temporary .git folder
         sub.call(["rm", "-rf", ".git"])
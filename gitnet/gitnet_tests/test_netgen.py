@@ -209,6 +209,31 @@ class TestNetworkGeneratorSmall(unittest.TestCase):
             self.assertEqual(n[1],net2.node[n[0]])
         self.assertEqual(len(net),len(net2))
 
+    def test_integer_ids(self):
+        net = self.my_log.generate_network("author", "files", mode1_atom_attrs=["email"], integer_ids=True)
+        self.assertEqual(net.number_of_nodes(), 6)
+        self.assertEqual(net.number_of_edges(), 5)
+        self.assertListEqual(sorted(net.nodes()), list(range(6)))
+        self.assertSetEqual(set(net.labels), {"Alice", "Bob", "basic_logs.txt", "stat_logs.txt", "raw_logs.txt",
+                                              "readme.md"})
+        for n in net.nodes():
+            self.assertEqual(net.label(n), net.node[n]["id"])
+        alice = net.labels.index("Alice")
+        self.assertEqual(net.node[alice]["email"], "alice@gmail.com")
+        self.assertSetEqual({net.label(n) for n in net.neighbors(alice)},
+                            {"basic_logs.txt", "stat_logs.txt", "raw_logs.txt", "readme.md"})
+
+    def test_integer_ids_interned_edges(self):
+        """Are repeated edge attribute values shared, and are all edges added?"""
+        # Equal strings built separately are distinct objects until they are interned.
+        log = gitnet.Log({"a": {"author": "".join(["Al", "ice"]), "files": ["x.py", "y.py"], "day": "".join(["Mon"])},
+                          "b": {"author": "".join(["Ali", "ce"]), "files": ["x.py"], "day": "".join(["Mo", "n"])}})
+        net = log.generate_network("author", "files", edge_attributes=["author", "day"], integer_ids=True)
+        self.assertEqual(net.number_of_edges(), 3)
+        data = [d for u, v, d in net.edges_iter(data=True)]
+        self.assertTrue(all(d["author"] is data[0]["author"] for d in data))
+        self.assertTrue(all(d["day"] is data[0]["day"] for d in data))
+
     def test_no_colours(self):
         net = self.my_log.generate_network('author', 'files', colours=None)
         nodes = str(net.nodes(data=True))
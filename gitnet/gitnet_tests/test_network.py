@@ -18,10 +18,16 @@ import unittest
 from unittest.mock import patch
 import gitnet
 from gitnet import multigraph
-from gitnet.exceptions import MergeError
+from gitnet import helpers
+from gitnet import layout
+from gitnet.exceptions import MergeError, InputError
 from gitnet.exceptions import GraphStatsError
 import os
+import random
+import numpy as np
+import matplotlib.pyplot as plt
 import networkx as nx
+from networkx.algorithms import bipartite
 import subprocess as sub
 from io import StringIO
 import warnings
@@ -187,12 +193,115 @@ class GraphMLTests(unittest.TestCase):
             # Check Warning didn't occurred
             self.assertEqual(len(w), 0)
 
+    def test_labels(self):
+        """Are integer node ids written using their labels?"""
+        mg = multigraph.MultiGraphPlus()
+        mg.labels = ['Alice', 'file01']
+        mg.add_node(0, attr_dict={'id': 'Alice', 'type': 'author'})
+        mg.add_node(1, attr_dict={'id': 'file01', 'type': 'file'})
+        mg.add_edge(0, 1, sha='hash1')
+        mg.write_graphml(self.path)
+        rev = nx.read_graphml(self.path)
+        self.assertSetEqual({'Alice', 'file01'}, set(rev.nodes()))
+        self.assertSetEqual({'file01'}, set(rev.edge['Alice']))
+        # The original network is unchanged
+        self.assertSetEqual({0, 1}, set(mg.nodes()))
+
+    def test_compressed(self):
+        """Are .gz and .bz2 files compressed and readable?"""
+        for ext in [".gz", ".bz2"]:
+            path = self.path + ext
+            self.mg.write_graphml(path)
+            with open(path, "rb") as f:
+                self.assertNotIn(b"graphml", f.read())
+            rev = nx.read_graphml(path)
+            os.remove(path)
+            self.assertSetEqual(set(self.mg.nodes()), set(rev.nodes()))
+            self.assertEqual("hash1;hash2", rev.node['Alice']['records'])
+
+    def test_types(self):
+        """Are attribute types kept, special characters escaped and None values omitted?"""
+        mg = multigraph.MultiGraphPlus()
+        mg.add_node('<A & "B">', attr_dict={'count': 3, 'score': 0.5, 'bot': False, 'email': None,
+                                            'name': 'a < b & c'})
+        mg.add_node('file01')
+        mg.add_edge('<A & "B">', 'file01', weight=2)
+        mg.write_graphml(self.path)
+        rev = nx.read_graphml(self.path)
+        data = rev.node['<A & "B">']
+        self.assertEqual(3, data['count'])
+        self.assertEqual(0.5, data['score'])
+        self.assertEqual(False, data['bot'])
+        self.assertEqual('a < b & c', data['name'])
+        self.assertNotIn('email', data)
+        self.assertEqual(2, rev.edges(data=True)[0][2]['weight'])
+
     def tearDown(self):
         if self.made_gml:
             os.remove(self.path)
             os.rmdir('temp')
 
 
+class SaveLoadTests(unittest.TestCase):
+    """Tests for the save() and load() methods."""
+    def setUp(self):
+        self.mg = multigraph.MultiGraphPlus()
+        self.mg.mode1 = 'author'
+        self.mg.mode2 = 'files'
+        self.mg.add_node('Alice', attr_dict={'type': 'author', 'email': None, 'records': ['hash1', 'hash2'],
+                                             'bot': False, 'score': 0.5})
+        self.mg.add_node('Bobby', attr_dict={'type': 'author', 'email': 'bob@gmail.com', 'records': []})
+        self.mg.add_node('file01', attr_dict={'type': 'files', 'records': ['hash1']})
+        self.mg.add_node(7, attr_dict={'type': 'files'})
+        self.mg.add_edge('Alice', 'file01', key='e01', sha='hash1', changed_lines=[1, 2, 3], weight=1)
+        self.mg.add_edge('Alice', 'file01', key='e02', sha='hash2', changed_lines=[], weight=2.5)
+        self.mg.add_edge('Bobby', 7, sha='hash3', changed_lines=[1, None, 'x'])
+        self.path = os.getcwd() + '/saved_network'
+
+    def assertSameNetwork(self, a, b):
+        self.assertEqual(a.node, b.node)
+        self.assertEqual(sorted(a.edges(keys=True, data=True), key=repr),
+                         sorted(b.edges(keys=True, data=True), key=repr))
+        self.assertEqual(a.mode1, b.mode1)
+        self.assertEqual(a.mode2, b.mode2)
+        self.assertEqual(a.labels, b.labels)
+
+    def test_npz(self):
+        """Does a .npz archive preserve nodes, edges, keys and vector attributes?"""
+        for compressed in [False, True]:
+            self.mg.save(self.path + '.npz', compressed=compressed)
+            loaded = multigraph.MultiGraphPlus.load(self.path + '.npz')
+            self.assertIsInstance(loaded, multigraph.MultiGraphPlus)
+            self.assertSameNetwork(self.mg, loaded)
+            self.assertIsInstance(loaded.node['Alice']['bot'], bool)
+            self.assertIsInstance(loaded.edge['Alice']['file01']['e01']['weight'], int)
+
+    def test_directory(self):
+        """Can a directory of arrays be memory-mapped when loaded?"""
+        self.mg.save(self.path)
+        self.assertTrue(os.path.isdir(self.path))
+        self.assertSameNetwork(self.mg, multigraph.MultiGraphPlus.load(self.path, mmap=True))
+
+    def test_labels(self):
+        """Are labels of integer-keyed networks kept?"""
+        mg = multigraph.MultiGraphPlus()
+        mg.labels = ['Alice', 'file01']
+        mg.add_edge(0, 1)
+        mg.save(self.path + '.npz')
+        loaded = multigraph.MultiGraphPlus.load(self.path + '.npz')
+        self.assertEqual(['Alice', 'file01'], loaded.labels)
+        self.assertEqual('file01', loaded.label(1))
+
+    def test_unsupported(self):
+        """Are attribute values which cannot be stored rejected?"""
+        self.mg.node['Alice']['position'] = (1, 2)
+        with self.assertRaisesRegex(InputError, "position"):
+            self.mg.save(self.path + '.npz')
+
+    def tearDown(self):
+        sub.call(["rm", "-rf", self.path, self.path + '.npz'])
+
+
 class TnetTests(unittest.TestCase):
     def setUp(self):
         """Setup to occur before each method executes"""
@@ -523,6 +632,129 @@ class QuickPlotTests(unittest.TestCase):
             os.rmdir('temp')
 
 
+class LayoutTests(unittest.TestCase):
+    """Tests for the layout() method and the built in layout engine."""
+    def setUp(self):
+        # Two dense clusters joined by a single edge, plus an isolate.
+        self.mg = multigraph.MultiGraphPlus()
+        for a in range(10):
+            for b in range(a):
+                self.mg.add_edge(a, b)
+                self.mg.add_edge(a + 100, b + 100)
+        self.mg.add_edge(0, 100)
+        self.mg.add_node("alone")
+
+    def test_positions(self):
+        """Does every node get a stored position?"""
+        pos = self.mg.layout(iterations=30, seed=1)
+        self.assertEqual(set(pos.keys()), set(self.mg.nodes()))
+        for n in self.mg.nodes():
+            self.assertEqual(pos[n], (self.mg.node[n]['x'], self.mg.node[n]['y']))
+
+    def test_clusters(self):
+        """Are the two clusters drawn apart?"""
+        pos = self.mg.layout(iterations=100, seed=1)
+        first = np.array([pos[n] for n in range(10)])
+        second = np.array([pos[n + 100] for n in range(10)])
+        spread = np.linalg.norm(first - first.mean(axis=0), axis=1).mean()
+        self.assertGreater(np.linalg.norm(first.mean(axis=0) - second.mean(axis=0)), 2 * spread)
+
+    def test_seed(self):
+        """Does the same seed give the same layout?"""
+        self.assertEqual(self.mg.layout(iterations=10, pos={}, seed=3), self.mg.layout(iterations=10, pos={}, seed=3))
+
+    def test_reuse(self):
+        """Are stored positions reused by subgraphs, and only new nodes placed?"""
+        pos = self.mg.layout(iterations=20, seed=1)
+        sub = self.mg.subgraph(list(range(10)))
+        self.assertEqual(sub.layout(), {n: pos[n] for n in range(10)})
+        self.mg.add_edge(0, "new")
+        new_pos = self.mg.layout(iterations=5)
+        self.assertIn("new", new_pos)
+        self.assertEqual(self.mg.node["new"]['x'], new_pos["new"][0])
+
+    def test_quickplot_keeps_attributes(self):
+        """Does quickplot's force layout leave the network's node attributes unchanged?"""
+        self.mg.node[1]["y"] = "user value"
+        path = os.path.join(os.getcwd(), "force_quickplot.png")
+        try:
+            self.mg.quickplot(path, layout="force", renderer="fast")
+        finally:
+            plt.clf()
+            if os.path.exists(path):
+                os.remove(path)
+        self.assertFalse(any("x" in d for n, d in self.mg.nodes_iter(data=True)))
+        self.assertEqual(self.mg.node[1]["y"], "user value")
+
+    def test_dense_cluster(self):
+        """Is repulsion in a dense cluster approximated, rather than computed for every pair of nodes?"""
+        rng = np.random.RandomState(0)
+        # 20000 nodes in one finest grid cell would need 4e8 exact pairs.
+        x = np.concatenate([rng.normal(0, 0.001, (20000, 2)), rng.uniform(-10, 10, (50, 2))])
+        force = layout._repulsion(x, np.ones(len(x)))
+        self.assertTrue(np.all(np.isfinite(force)))
+        # Nodes on the edge of the cluster are pushed outwards.
+        edge = np.argmax(x[:20000, 0])
+        self.assertGreater(force[edge, 0], 0)
+        # Sparse layouts are still computed exactly.
+        sparse = rng.uniform(0, 100, (500, 2))
+        self.assertTrue(np.allclose(layout._repulsion(sparse, np.ones(500)),
+                                    layout._repulsion(sparse, np.ones(500), max_exact=10 ** 9)))
+
+    def test_coarsen(self):
+        """Does the multilevel layout handle larger graphs?"""
+        g = multigraph.MultiGraphPlus()
+        rng = random.Random(0)
+        for i in range(600):
+            g.add_edge("a{}".format(rng.randrange(200)), "f{}".format(rng.randrange(400)))
+        pos = g.layout(iterations=10, coarsen=True, seed=0)
+        self.assertEqual(len(pos), g.number_of_nodes())
+        self.assertTrue(np.all(np.isfinite(np.array(list(pos.values())))))
+
+
+class FastRenderTests(unittest.TestCase):
+    """Tests for the fast and density renderers of quickplot()."""
+    def setUp(self):
+        self.mg = multigraph.MultiGraphPlus()
+        self.mg.add_node('Alice', attr_dict={'type': 'author', 'colour': 'blue', 'x': 0.0, 'y': 0.0})
+        self.mg.add_node('Bobby', attr_dict={'type': 'author', 'x': 0.0, 'y': 1.0})
+        self.mg.add_node('file01', attr_dict={'type': 'file', 'x': 1.0, 'y': 0.5})
+        self.mg.add_edge('file01', 'Alice')
+        self.mg.add_edge('file01', 'Bobby')
+        self.path = os.getcwd() + '/fast_quickplot.png'
+
+    def test_fast(self):
+        """Does the fast renderer write a plot?"""
+        self.assertIsNone(self.mg.quickplot(self.path, layout="force", renderer="fast"))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_density(self):
+        """Does the density renderer write a plot?"""
+        self.assertIsNone(self.mg.quickplot(self.path, layout="force", renderer="density", resolution=50))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_bad_renderer(self):
+        """Is an unknown renderer rejected?"""
+        with self.assertRaisesRegex(InputError, "not a valid renderer"):
+            self.mg.quickplot(self.path, layout="force", renderer="svg")
+
+    def test_edge_density(self):
+        """Are pixels counted once for each segment crossing them?"""
+        image, extent = layout.edge_density(np.array([[0.0, 0.0], [0.0, 0.0]]),
+                                            np.array([[9.0, 0.0], [0.0, 9.0]]), resolution=10)
+        self.assertEqual(image.shape, (10, 10))
+        self.assertEqual(image[0, 0], 2)
+        self.assertEqual(image[0, 1:].tolist(), [1] * 9)
+        self.assertEqual(image[1:, 0].tolist(), [1] * 9)
+        self.assertEqual(image.sum(), 20)
+        self.assertEqual(extent, (-0.5, 9.5, -0.5, 9.5))
+
+    def tearDown(self):
+        plt.clf()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class DescribeTest(unittest.TestCase):
     """Testing of the describe method in the MultiGraphPlus class."""
     # A small network containing 11 nodes and 11 edges, 4 authors and 7 files.
@@ -558,6 +790,63 @@ class DescribeTest(unittest.TestCase):
         self.assertIn("Mean Betweenness Centrality for 'files'", description)
         self.assertIn("Mean Betweenness Centrality for 'author'", description)
 
+    def test_approx(self):
+        """Are sampled estimates reported with confidence intervals?"""
+        description = self.mgraph.describe(extra="approx", samples=20, seed=1)
+        self.assertIn("Density: 0.39285", description)
+        self.assertIn("Transitivity: ", description)
+        self.assertIn("Mean Betweenness Centrality for 'author': ", description)
+        self.assertEqual(description.count("95% CI"), 3)
+        self.assertEqual(description, self.mgraph.describe(extra="approx", samples=20, seed=1))
+
+    def test_approx_exhaustive(self):
+        """Does sampling every source node reproduce the exact betweenness?"""
+        top = [n for n in self.mgraph.nodes() if self.mgraph.node[n]['type'] == 'author']
+        bottom = [n for n in self.mgraph.nodes() if self.mgraph.node[n]['type'] == 'files']
+        exact = bipartite.betweenness_centrality(self.mgraph, top)
+        (est1, half1), (est2, half2) = helpers.sample_betweenness(self.mgraph, top, 100, random.Random(0))
+        self.assertAlmostEqual(est1, np.mean([exact[n] for n in top]))
+        self.assertAlmostEqual(est2, np.mean([exact[n] for n in bottom]))
+        self.assertEqual(half1, 0)
+        self.assertEqual(half2, 0)
+
+    def test_degree_centrality(self):
+        """Is mean degree centrality computed within each mode?"""
+        description = self.mgraph.describe(extra=True)
+        # 11 edges, so the mean author degree is 11/4 and the mean file degree is 11/7.
+        self.assertIn("Mean Degree Centrality for 'author': {}.".format(str((11 / 4) / 7)), description)
+        self.assertIn("Mean Degree Centrality for 'files': {}.".format(str((11 / 7) / 4)), description)
+
+    def test_betweenness_centrality(self):
+        """Is mean betweenness centrality computed within each mode, rather than over every node?"""
+        description = self.mgraph.describe(extra=True)
+        top = [n for n in self.mgraph.nodes() if self.mgraph.node[n]['type'] == 'author']
+        exact = bipartite.betweenness_centrality(self.mgraph, top)
+        self.assertIn("Mean Betweenness Centrality for 'author': 0.34523809523809", description)
+        self.assertIn("Mean Betweenness Centrality for 'files': 0.16602316602316", description)
+        # Before the per-mode means, both modes reported the mean over all 11 nodes.
+        self.assertAlmostEqual(np.mean(list(exact.values())), 0.2311922311922312)
+
+    def test_cache_invalidation(self):
+        """Does the cached partition update when the graph changes?"""
+        self.mgraph.describe()
+        self.assertIsNotNone(self.mgraph._stats)
+        self.mgraph.add_node("new_file", type="files")
+        self.assertIsNone(self.mgraph._stats)
+        description = self.mgraph.describe()
+        self.assertIn("8 nodes are of the type 'files'", description)
+        self.mgraph.remove_node("new_file")
+        description = self.mgraph.describe()
+        self.assertIn("7 nodes are of the type 'files'", description)
+
+    def test_untyped(self):
+        """Are modes found by colouring when nodes have no type?"""
+        g = multigraph.MultiGraphPlus()
+        g.add_edges_from([(1, "a"), (2, "a"), (2, "b")])
+        description = g.describe()
+        self.assertIn("There are 3 edges", description)
+        self.assertIn("Density: 0.75", description)
+
     def tearDown(self):
         sub.call(["rm","-rf",".git"])
 
@@ -772,6 +1061,56 @@ class NodeMergeTest(unittest.TestCase):
             mg.node_merge('file02', 'Alice')
 
 
+class MergeNodesTest(unittest.TestCase):
+    """Tests for the merge_nodes() method within multigraph.py"""
+
+    def setUp(self):
+        self.mg = multigraph.MultiGraphPlus()
+        self.mg.add_node('Alice', attr_dict={'type': 'author', 'email': 'alice@gmail.com', 'records': ['hash1']})
+        self.mg.add_node('alice', attr_dict={'type': 'author', 'email': 'alice@gmail.com', 'records': ['hash2']})
+        self.mg.add_node('A. Smith', attr_dict={'type': 'author', 'email': 'as@uw.ca', 'records': ['hash3']})
+        self.mg.add_node('Bob', attr_dict={'type': 'author', 'records': ['hash4']})
+        self.mg.add_node('file01', attr_dict={'type': 'file'})
+        self.mg.add_edge('Alice', 'file01', date='Jan 1')
+        self.mg.add_edge('alice', 'file01', date='Jan 2')
+        self.mg.add_edge('A. Smith', 'file01', date='Jan 3')
+        self.mg.add_edge('Bob', 'file01', date='Jan 4')
+
+    def test_chain(self):
+        """Are chains of aliases merged into one node?"""
+        with patch('sys.stdout', new=StringIO()):
+            merged = self.mg.merge_nodes({'alice': 'Alice', 'Alice': 'A. Smith'})
+        self.assertSetEqual(set(merged.nodes()), {'A. Smith', 'Bob', 'file01'})
+        self.assertSetEqual(set(merged.node['A. Smith']['records']), {'hash1', 'hash2', 'hash3'})
+        self.assertEqual(merged.node['A. Smith']['email'], 'as@uw.ca')
+        self.assertEqual(len(merged.edge['A. Smith']['file01']), 3)
+        self.assertEqual(merged.number_of_edges(), 4)
+        # The original network is unchanged
+        self.assertEqual(self.mg.number_of_nodes(), 5)
+        self.assertListEqual(self.mg.node['A. Smith']['records'], ['hash3'])
+
+    def test_conflicts(self):
+        """Are conflicting atomic attributes reported for each merged pair?"""
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self.mg.merge_nodes({'alice': 'Alice', 'Alice': 'A. Smith'})
+            self.assertIn("Note: nodes 'A. Smith' and 'Alice'", fake_out.getvalue())
+            self.assertIn("Note: nodes 'A. Smith' and 'alice'", fake_out.getvalue())
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self.mg.merge_nodes({'alice': 'Alice', 'Alice': 'A. Smith'}, show_warning=False)
+            self.assertEqual(fake_out.getvalue(), "")
+        with patch('sys.stdout', new=StringIO()) as fake_out:
+            self.mg.merge_nodes({'alice': 'Alice'})
+            self.assertEqual(fake_out.getvalue(), "")
+
+    def test_errors(self):
+        with self.assertRaises(MergeError):
+            self.mg.merge_nodes({'Carol': 'Alice'})
+        with self.assertRaises(MergeError):
+            self.mg.merge_nodes({'Alice': 'Carol'})
+        with self.assertRaises(MergeError):
+            self.mg.merge_nodes({'Bob': 'Alice', 'file01': 'Bob'})
+
+
 class CollapseEdgesTest(unittest.TestCase):
     """Tests for the collapse_edges() method within multigraph.py"""
     def setUp(self):
@@ -925,5 +1264,40 @@ class CollapseEdgesTest(unittest.TestCase):
         self.assertIsInstance(diff_attr.edge['file02'], dict)
 
 
+    def test_reducers(self):
+        """Are reducers applied to the values of collapsed edges?"""
+        red = self.diff.collapse_edges(sum_weights=True, reducers={'type': 'count',
+                                                                   'date': 'first',
+                                                                   'changed_lines': 'sum',
+                                                                   'importance': lambda vals: sorted(vals)})
+        self.assertDictEqual(red.edge['Dawn']['file02'][0], {'weight': 6,
+                                                             'type': 3,
+                                                             'date': 'Jan 3',
+                                                             'changed_lines': 6,
+                                                             'importance': ['high', 'low']})
+        self.assertEqual(red.edge['Elise']['file02'][0]['type'], 1)
+        self.assertEqual(red.edge['Elise']['file02'][0]['changed_lines'], 9)
+
+    def test_date_reducers(self):
+        """Are git dates compared by time rather than alphabetically?"""
+        mg = multigraph.MultiGraphPlus()
+        mg.add_edge('Alice', 'file01', date='Fri May 6 15:41:25 2016 -0400')
+        mg.add_edge('Alice', 'file01', date='Sat Apr 30 10:00:00 2016 -0400')
+        mg.add_edge('Alice', 'file01', date='Thu May 26 11:21:03 2016 -0400')
+        red = mg.collapse_edges(reducers={'date': 'min_date'})
+        self.assertEqual(red.edge['Alice']['file01'][0]['date'], 'Sat Apr 30 10:00:00 2016 -0400')
+        red = mg.collapse_edges(reducers={'date': 'max_date'})
+        self.assertEqual(red.edge['Alice']['file01'][0]['date'], 'Thu May 26 11:21:03 2016 -0400')
+
+    def test_bad_reducer(self):
+        with self.assertRaises(gitnet.InputError):
+            self.diff.collapse_edges(reducers={'date': 'median'})
+
+    def test_no_mutation(self):
+        """Is the original network left unchanged?"""
+        self.now.collapse_edges()
+        self.assertListEqual(self.now.edge['Alice']['file01'][0]['changed_lines'], [5, 18, 38, 44])
+
+
 if __name__ == '__main__':
     unittest.main(buffer=True)
@@ -0,0 +1,131 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import unittest
+import random
+from collections import Counter
+from gitnet import summary
+from gitnet.exceptions import InputError
+
+
+class TopKTests(unittest.TestCase):
+    def setUp(self):
+        self.counts = Counter(["a", "a", "a", "a", "b", "b", "c", "c", "d", "d", "d", "e"])
+
+    def test_top_k(self):
+        """Are the n most frequent values returned, with ties?"""
+        self.assertListEqual(summary.top_k(self.counts, 1), [(4, "a")])
+        self.assertListEqual(summary.top_k(self.counts, 2), [(4, "a"), (3, "d")])
+        self.assertListEqual(summary.top_k(self.counts, 3), [(4, "a"), (3, "d"), (2, "c"), (2, "b")])
+        self.assertEqual(len(summary.top_k(self.counts, 10)), 5)
+
+    def test_minimum(self):
+        """Are values counted fewer than minimum times left out?"""
+        self.assertListEqual(summary.top_k(self.counts, 10, minimum=3), [(4, "a"), (3, "d")])
+        self.assertListEqual(summary.top_k(Counter("abc"), 1, minimum=2), [])
+
+    def test_empty(self):
+        self.assertListEqual(summary.top_k({}, 3), [])
+        self.assertListEqual(summary.top_k(self.counts, 0), [])
+
+    def test_mixed_types(self):
+        """Can values which cannot be ordered be returned?"""
+        self.assertListEqual(summary.count_top_k([1, "a", "a", 1, None], 1), [(2, 1), (2, "a")])
+
+
+class SpaceSavingTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        # A skewed stream, with a few heavy hitters and many rare values.
+        self.stream = ["heavy{}".format(i % 5) for i in range(5000)] + \
+                      ["rare{}".format(rng.randint(0, 20000)) for i in range(5000)]
+        rng.shuffle(self.stream)
+        self.counts = Counter(self.stream)
+
+    def test_exact(self):
+        """Are the counts exact when every value fits?"""
+        s = summary.SpaceSaving(capacity=100)
+        s.extend("abracadabra")
+        self.assertListEqual(s.top(2), summary.count_top_k("abracadabra", 2))
+        self.assertEqual(s.total, 11)
+        self.assertEqual(s.error("a"), 0)
+
+    def test_heavy_hitters(self):
+        """Are the frequent values kept, with counts within their errors?"""
+        s = summary.SpaceSaving(capacity=50)
+        s.extend(self.stream)
+        self.assertEqual(len(s), 50)
+        self.assertSetEqual({value for count, value in s.top(5)}, {"heavy{}".format(i) for i in range(5)})
+        for value, count in s.items():
+            self.assertGreaterEqual(count, self.counts[value])
+            self.assertLessEqual(count - s.error(value), self.counts[value])
+        self.assertEqual(s["missing"], 0)
+        self.assertNotIn("missing", s)
+
+    def test_merge(self):
+        """Can summaries be merged by adding their items?"""
+        first = summary.SpaceSaving(capacity=50)
+        first.extend(self.stream[:5000])
+        second = summary.SpaceSaving(capacity=50)
+        second.extend(self.stream[5000:])
+        for value, count in second.items():
+            first.update(value, count)
+        self.assertEqual(first.total, len(self.stream))
+        self.assertSetEqual({value for count, value in first.top(5)}, {"heavy{}".format(i) for i in range(5)})
+
+    def test_capacity(self):
+        with self.assertRaises(InputError):
+            summary.SpaceSaving(capacity=0)
+
+
+class CountMinTests(unittest.TestCase):
+    def setUp(self):
+        self.stream = ["v{}".format(i % 300) for i in range(3000)] + ["v0"] * 100
+
+    def test_estimates(self):
+        """Are estimates never below the true counts?"""
+        sketch = summary.CountMinSketch(width=64, depth=3)
+        sketch.extend(self.stream)
+        self.assertEqual(sketch.total, len(self.stream))
+        for value, count in Counter(self.stream).items():
+            self.assertGreaterEqual(sketch[value], count)
+        self.assertGreaterEqual(sketch["v0"], 110)
+
+    def test_exact(self):
+        """Are counts exact when the sketch is much wider than the number of values?"""
+        sketch = summary.CountMinSketch(width=4096, depth=4)
+        sketch.extend("abracadabra")
+        self.assertEqual(sketch["a"], 5)
+        self.assertEqual(sketch["r"], 2)
+        self.assertEqual(sketch["z"], 0)
+
+    def test_merge(self):
+        """Does merging give the sketch of both streams?"""
+        first = summary.CountMinSketch(width=256)
+        first.extend(self.stream[:1000])
+        second = summary.CountMinSketch(width=256)
+        second.extend(self.stream[1000:])
+        whole = summary.CountMinSketch(width=256)
+        whole.extend(self.stream)
+        first.merge(second)
+        self.assertTrue((first.table == whole.table).all())
+        self.assertEqual(first.total, whole.total)
+        with self.assertRaises(InputError):
+            first.merge(summary.CountMinSketch(width=128))
+
+
+if __name__ == '__main__':
+    unittest.main(buffer=True)
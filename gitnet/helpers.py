@@ -15,9 +15,18 @@
 # *********************************************************************************************
 
 import re
+import sys
+import math
+import calendar
+import numpy as np
+import bz2
+import gzip
+import lzma
 import warnings
 import datetime as dt
+from collections import deque, Counter
 from gitnet.exceptions import InputError
+from gitnet.summary import top_k
 
 # Working with Git Log date strings
 def datetime_git(s):
@@ -34,6 +43,89 @@ def datetime_git(s):
     return dt.datetime.strptime(s,"%a %b %d %H:%M:%S %Y %z")
 
 
+_git_months = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+               "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
+
+
+def git_timestamp(s):
+    """
+    Turns a git date string into the number of seconds since the epoch. Much faster than `datetime_git`, for
+    converting many dates.
+
+    **Parameters**
+
+    >*s* : `str`
+    >> A git-formatted date string such as "Fri Jan 10 10:12:34 2016 -0400"
+
+    **Return** `int`
+    > The time in seconds since 1970-01-01 00:00:00 UTC, or None if `s` is not a git date string.
+    """
+    try:
+        weekday, month, day, clock, year, offset = s.split()
+        hour, minute, second = clock.split(":")
+        seconds = calendar.timegm((int(year), _git_months[month], int(day), int(hour), int(minute), int(second)))
+        sign = -1 if offset[0] == "-" else 1
+        return seconds - sign * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+
+def git_timestamps(dates):
+    """
+    Turns many git date strings into numbers of seconds since the epoch at once, as `git_timestamp` does for one. The
+    fields of the dates are read from a NumPy array of their characters, without parsing each string in Python.
+
+    **Parameters**
+
+    >*dates* : `list`
+    >> A list of git-formatted date strings such as "Fri Jan 10 10:12:34 2016 -0400". Other values are allowed.
+
+    **Return** `numpy.ndarray`
+    > A float array of the times in seconds since 1970-01-01 00:00:00 UTC, with NaN for values which are not git
+    > date strings.
+    """
+    n = len(dates)
+    text = np.array([d if type(d) is str else "" for d in dates], dtype="U31")
+    chars = text.view(np.uint32).reshape(n, 31)
+    length = (chars != 0).sum(axis=1)
+    # Give one-digit days a leading zero, so that every field is at a fixed position.
+    c = chars[:, :30].copy()
+    short = length == 29
+    c[short, 9:] = chars[short, 8:29]
+    c[short, 8] = ord("0")
+    valid = (length == 29) | (length == 30)
+    for i, ch in ((3, " "), (7, " "), (10, " "), (13, ":"), (16, ":"), (19, " "), (24, " ")):
+        valid &= c[:, i] == ord(ch)
+    valid &= (c[:, 25] == ord("+")) | (c[:, 25] == ord("-"))
+    digits = c[:, [8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 22, 23, 26, 27, 28, 29]].astype(np.int32) - ord("0")
+    valid &= np.all((digits >= 0) & (digits <= 9), axis=1)
+    day, hour, minute, second = (digits[:, i] * 10 + digits[:, i + 1] for i in (0, 2, 4, 6))
+    year = digits[:, 8] * 1000 + digits[:, 9] * 100 + digits[:, 10] * 10 + digits[:, 11]
+    offset = (digits[:, 12] * 10 + digits[:, 13]) * 3600 + (digits[:, 14] * 10 + digits[:, 15]) * 60
+    offset[c[:, 25] == ord("-")] *= -1
+    names = c[:, 4] * 65536 + c[:, 5] * 256 + c[:, 6]
+    keys = np.array([ord(m[0]) * 65536 + ord(m[1]) * 256 + ord(m[2]) for m in _git_months], dtype=np.uint32)
+    order = np.argsort(keys)
+    found = np.searchsorted(keys[order], names).clip(0, len(keys) - 1)
+    valid &= keys[order][found] == names
+    month = np.array(list(_git_months.values()), dtype=np.int32)[order][found]
+    # Days since the epoch of a proleptic Gregorian date, counting years from March.
+    y = year - (month <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = (era * 146097 + doe - 719468).astype(np.int64)
+    seconds = (days * 86400 + (hour * 3600 + minute * 60 + second - offset)).astype(np.float64)
+    seconds[~valid] = np.nan
+    # Unusual strings (such as five digit years) are left to git_timestamp.
+    for i in np.nonzero(~valid & (length > 0))[0].tolist():
+        value = git_timestamp(dates[i])
+        if value is not None:
+            seconds[i] = value
+    return seconds
+
+
 def datetime_reference(s):
     """
     Turns a Git date string, or a datetime object into a datetime.
@@ -230,6 +322,31 @@ def list_to_scd(lst):
 
     return string
 
+def open_output(fname, buffering=1048576):
+    """
+    Opens a text file for writing. File names which end in `.gz`, `.bz2` or `.xz` are compressed as they are written,
+    using the matching standard library module. Newline translation is disabled, as expected by the `csv` module.
+
+    **Parameters**
+
+    >*fname* : `str`
+    >> A string indicating the path or file name to write to.
+
+    >*buffering* : `int`
+    >> The size, in bytes, of the write buffer used for uncompressed files. Defaults to 1 MiB.
+
+    **Return** `file object`
+    > A writable, UTF-8 encoded text stream.
+    """
+    if fname.endswith(".gz"):
+        return gzip.open(fname, "wt", encoding="utf-8", newline="")
+    elif fname.endswith(".bz2"):
+        return bz2.open(fname, "wt", encoding="utf-8", newline="")
+    elif fname.endswith(".xz"):
+        return lzma.open(fname, "wt", encoding="utf-8", newline="")
+    else:
+        return open(fname, "w", encoding="utf-8", newline="", buffering=buffering)
+
 def most_common(lst, n=1):
     """
     Produces a list containing the n most common entries (occurring more than once) in a list. If the nth most common
@@ -246,37 +363,7 @@ def most_common(lst, n=1):
     **Return**
     > A list of tuples, each containing a frequency integer and a value.
     """
-    occurrences = {}
-    # Count occurrences
-    for i in lst:
-        if i in occurrences:
-            occurrences[i] += 1
-        else:
-            occurrences[i] = 1
-
-    # Remove entries with one occurrence
-    s_list = []
-    for j in occurrences:
-        if occurrences[j] > 1:
-            s_list.append((occurrences[j], j))
-    s_list = sorted(s_list, reverse=True)
-
-    # Select top n
-    num_count = 1
-    ret_list = []
-    min = 2
-    for item in s_list:
-        if num_count < n:
-            ret_list.append(item)
-        elif num_count == n:
-            ret_list.append(item)
-            min = item[0]
-        else:
-            if item[0] == min:
-                ret_list.append(item)
-        num_count += 1
-
-    return sorted(ret_list, reverse=True)
+    return top_k(Counter(lst), n, minimum=2)
 
 def most_occurrences(lst):
     """
@@ -290,20 +377,94 @@ def most_occurrences(lst):
     **Return** `int`
     > The number of times the most common value occurs.
     """
-    occurrences = {}
-    max = 0
-    m_common = []
-    for i in lst:
-        if i in occurrences:
-            occurrences[i] += 1
-        else:
-            occurrences[i] = 1
-        if occurrences[i] > max:
-            max = occurrences[i]
-            m_common = [i]
-        elif occurrences[i] == max:
-            m_common.append(i)
-    return max
+    counts = Counter(lst)
+    if len(counts) == 0:
+        return 0
+    return max(counts.values())
+
+def union_roots(pairs):
+    """
+    Groups items into connected components using a union-find structure. Each pair joins its two items, and the
+    component takes the root of the second item of the pair which joined it.
+
+    **Parameters**
+
+    >*pairs* : `iterable`
+    >> An iterable of (item, item) tuples. Items must be hashable.
+
+    **Return** `dict`
+    > A dictionary mapping every item which appears in `pairs` to the root item of its component.
+    """
+    parent = {}
+
+    def find(x):
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        # Compress the path, so later lookups are constant time.
+        while x != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for item, target in pairs:
+        item_root = find(item)
+        target_root = find(target)
+        parent.setdefault(target_root, target_root)
+        if item_root != target_root:
+            parent[item_root] = target_root
+    return {x: find(x) for x in list(parent)}
+
+
+def resolve_aliases(mapping):
+    """
+    Resolves chains of aliases using a union-find structure. If "a" is an alias of "b", and "b" is an alias of "c",
+    both "a" and "b" resolve to "c". Values which are not themselves aliases are kept as canonical values.
+
+    **Parameters**
+
+    >*mapping* : `dict`
+    >> A dictionary whose keys are aliases and whose values are the value each alias should be replaced with.
+
+    **Return** `dict`
+    > A dictionary mapping every alias to its canonical value, with all chains resolved.
+    """
+    return {x: root for x, root in union_roots(mapping.items()).items() if x != root}
+
+
+def parse_mailmap(fname):
+    """
+    Reads a git `.mailmap` file. Each line maps the name and/or email used in commits to a proper name and/or email,
+    in one of the forms documented by `git check-mailmap`:
+
+    > `Proper Name <commit@email>`
+    > `<proper@email> <commit@email>`
+    > `Proper Name <proper@email> <commit@email>`
+    > `Proper Name <proper@email> Commit Name <commit@email>`
+
+    **Parameters**
+
+    >*fname* : `str`
+    >> The path of a `.mailmap` file.
+
+    **Return** `dict`
+    > A dictionary keyed by (commit name, commit email) tuples, where the commit name is None when any name matches
+    and emails are lower case. Values are (proper name, proper email) tuples, where either item may be None.
+    """
+    entry_re = re.compile(r"^\s*([^<]*?)\s*<([^>]*)>\s*(?:([^<]*?)\s*<([^>]*)>)?\s*$")
+    mailmap = {}
+    with open(fname, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#")[0]
+            match = entry_re.match(line)
+            if line.strip() == "" or match is None:
+                continue
+            proper_name, proper_email, commit_name, commit_email = match.groups()
+            if commit_email is None:
+                # Only one email given, so it is both the commit email and (for a name-only entry) the proper email.
+                commit_email = proper_email
+                proper_email = None
+            mailmap[(commit_name or None, commit_email.lower())] = (proper_name or None, proper_email or None)
+    return mailmap
 
 # Network Edge Generator Functions
 def net_edges_simple(v1, v2, record, keep):
@@ -380,6 +541,92 @@ def net_edges_changes(v1, v2, record, keep):
         properties["weight"] = int(weight)
     return (v1, v2, properties)
 
+def net_edges_repo_changes(v1, v2, record, keep):
+    """
+    A helper function for the Log.generate_edges() method. Creates an edge weighted by the number of lines changed, as
+    `net_edges_changes` does, for a second vertex (`v2`) of the type "repo_files", as in the "author/repo_file/weighted"
+    network of a `CommitLog` made by `CommitLog.concat`.
+
+    **Parameters**
+
+    >*v1* : `any`
+    >> The first vertex.
+
+    >*v2* : `str`
+    >> A repository-qualified path, in the format "repository/path".
+
+    >*record* : `str`
+    >> The short hash string for the current record in edge generation.
+
+    >*keep* : `list`
+    >> A list of edge attributes to be kept from the CommitLog record.
+
+    **Return**
+    > A tuple, in the format (id1, id2, {edge attribute dictionary}), representing an edge between `v1` and `v2`.
+    """
+    edge = net_edges_changes(v1, v2[len(record["repo"]) + 1:], record, keep)
+    return (v1, v2, edge[2])
+
+def change_counts(change, cache=None):
+    """
+    Gets the number of lines inserted and deleted from a "git log --stat" change string, such as
+    "README.md | 6 +++---". When git has scaled the graph to fit the terminal, the total is split between insertions
+    and deletions in proportion to the graph.
+
+    **Parameters**
+
+    >*change* : `str`
+    >> A change string, as in the "changes" attribute of a `CommitLog` record.
+
+    >*cache* : `None` or `dict`
+    >> A dictionary for remembering results. The part of a change string after the file name (" 6 +++---") repeats
+    >> often in a log, so passing the same dictionary for many changes avoids parsing each one.
+
+    **Return** `tuple`
+    > A tuple of (inserts, deletes), or (None, None) for binary files and changes without counts.
+    """
+    if type(change) is not str or "|" not in change:
+        return None, None
+    stat = change[change.rfind("|") + 1:]
+    if cache is not None and stat in cache:
+        return cache[stat]
+    parts = stat.split()
+    if len(parts) == 0 or not parts[0].isdigit():
+        counts = (None, None)
+    else:
+        total = int(parts[0])
+        graph = parts[1] if len(parts) > 1 else ""
+        plus = graph.count("+")
+        minus = graph.count("-")
+        if plus + minus == 0:
+            counts = (0, 0) if total == 0 else (None, None)
+        else:
+            inserts = int(round(total * plus / (plus + minus)))
+            counts = (inserts, total - inserts)
+    if cache is not None:
+        cache[stat] = counts
+    return counts
+
+def intern_attrs(d):
+    """
+    Interns the string values of an attribute dictionary, including strings held in list attributes, so that repeated
+    values (such as node types, emails, and commit hashes) share one copy in memory. The dictionary is modified in place.
+
+    **Parameters**
+
+    >*d* : `dict`
+    >> A node or edge attribute dictionary.
+
+    **Return** `dict`
+    > The same dictionary, with its string values interned.
+    """
+    for k, v in d.items():
+        if type(v) is str:
+            d[k] = sys.intern(v)
+        elif type(v) is list:
+            d[k] = [sys.intern(i) if type(i) is str else i for i in v]
+    return d
+
 # Network Attribute Helper Functions
 def node_colours(d):
     """
@@ -417,6 +664,186 @@ def node_colours(d):
         else:
             return "lightgrey"
 
+# Network Statistics Sampling Functions
+def confidence_interval(values, population=None):
+    """
+    Computes the mean of a sample and the half-width of its normal-approximation 95% confidence interval.
+
+    **Parameters** :
+
+    > *values* : `list`
+
+    >> The sampled values.
+
+    > *population* : `int`
+
+    >> The size of the population sampled without replacement, if any. When given, a finite population correction
+    >> is applied, so that sampling the whole population gives an interval of width zero.
+
+    **Return** : `tuple`
+
+    > A tuple of the sample mean and the half-width of the confidence interval.
+    """
+    k = len(values)
+    if k == 0:
+        return 0.0, 0.0
+    mean = sum(values) / k
+    if k == 1:
+        return mean, 0.0
+    sd = math.sqrt(sum((v - mean) ** 2 for v in values) / (k - 1))
+    half = 1.96 * sd / math.sqrt(k)
+    if population is not None:
+        half *= math.sqrt(max(population - k, 0) / (population - 1)) if population > 1 else 0.0
+    return mean, half
+
+
+def sample_betweenness(graph, top, samples, rng):
+    """
+    Estimates the mean normalized bipartite betweenness centrality of each mode of a bipartite graph. Brandes'
+    dependency accumulation is run from a random sample of source nodes, and each source yields one estimate of the
+    mean; the results are normalized as in `networkx.algorithms.bipartite.betweenness_centrality`.
+
+    **Parameters** :
+
+    > *graph* : `networkx.Graph`
+
+    >> A bipartite graph (multigraphs are treated as simple graphs).
+
+    > *top* : `list`
+
+    >> The nodes of the first mode. All other nodes belong to the second mode.
+
+    > *samples* : `int`
+
+    >> The number of source nodes to sample. If it is at least the number of nodes, the result is exact.
+
+    > *rng* : `random.Random`
+
+    >> The random number generator used to choose source nodes.
+
+    **Return** : `tuple`
+
+    > Two (estimate, confidence interval half-width) tuples, for the first and second modes.
+    """
+    nodes = graph.nodes()
+    top = set(top)
+    total = len(nodes)
+    n = float(len(top))
+    m = float(total - len(top))
+    if n == 0 or m == 0:
+        return (0.0, 0.0), (0.0, 0.0)
+    s, t = (n - 1) // m, (n - 1) % m
+    bet_max_top = ((m ** 2) * ((s + 1) ** 2) + m * (s + 1) * (2 * t - s - 1) - t * (2 * s - t + 3)) / 2.0
+    p, r = (m - 1) // n, (m - 1) % n
+    bet_max_bot = ((n ** 2) * ((p + 1) ** 2) + n * (p + 1) * (2 * r - p - 1) - r * (2 * p - r + 3)) / 2.0
+    # Each source's dependencies, scaled by the number of nodes, are an unbiased estimate of total betweenness.
+    # The 0.5 counts each undirected path once.
+    scale_top = 0.5 * total / (n * bet_max_top) if bet_max_top > 0 else 0.0
+    scale_bot = 0.5 * total / (m * bet_max_bot) if bet_max_bot > 0 else 0.0
+    k = min(samples, total)
+    est_top = []
+    est_bot = []
+    adj = graph.adj
+    for source in rng.sample(nodes, k):
+        order = []
+        preds = {source: []}
+        sigma = {source: 1}
+        dist = {source: 0}
+        queue = deque([source])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            for w in adj[v]:
+                if w not in dist:
+                    dist[w] = dist[v] + 1
+                    preds[w] = []
+                    sigma[w] = 0
+                    queue.append(w)
+                if dist[w] == dist[v] + 1:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+        delta = dict.fromkeys(order, 0.0)
+        sum_top = 0.0
+        sum_bot = 0.0
+        while order:
+            w = order.pop()
+            coeff = (1.0 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coeff
+            if w != source:
+                if w in top:
+                    sum_top += delta[w]
+                else:
+                    sum_bot += delta[w]
+        est_top.append(sum_top * scale_top)
+        est_bot.append(sum_bot * scale_bot)
+    return confidence_interval(est_top, total), confidence_interval(est_bot, total)
+
+
+def sample_transitivity(graph, top, samples, rng):
+    """
+    Estimates the transitivity of the projection of a bipartite graph onto one of its modes by wedge sampling,
+    without building the projection. Centres are drawn uniformly from `top`, a pair of each centre's projected
+    neighbours is drawn and checked for closure, and the results are combined with a ratio estimator weighted by
+    each centre's number of wedges.
+
+    **Parameters** :
+
+    > *graph* : `networkx.Graph`
+
+    >> A bipartite graph.
+
+    > *top* : `list`
+
+    >> The nodes of the mode to project onto.
+
+    > *samples* : `int`
+
+    >> The number of wedges to sample.
+
+    > *rng* : `random.Random`
+
+    >> The random number generator used to choose wedges.
+
+    **Return** : `tuple`
+
+    > A tuple of the transitivity estimate and the half-width of its 95% confidence interval.
+    """
+    top = list(top)
+    if len(top) == 0 or samples < 1:
+        return 0.0, 0.0
+    adj = graph.adj
+    projected = {}
+    weights = []
+    closed = []
+    for i in range(samples):
+        u = rng.choice(top)
+        if u not in projected:
+            nbrs = set()
+            for f in adj[u]:
+                nbrs.update(adj[f])
+            nbrs.discard(u)
+            projected[u] = list(nbrs)
+        nbrs = projected[u]
+        d = len(nbrs)
+        if d < 2:
+            weights.append(0.0)
+            closed.append(0.0)
+            continue
+        a, b = rng.sample(nbrs, 2)
+        weights.append(d * (d - 1) / 2.0)
+        closed.append(0.0 if adj[a].keys().isdisjoint(adj[b]) else 1.0)
+    total_weight = sum(weights)
+    if total_weight == 0:
+        return 0.0, 0.0
+    estimate = sum(w * x for w, x in zip(weights, closed)) / total_weight
+    # Delta method variance of a ratio estimator.
+    k = len(weights)
+    mean_weight = total_weight / k
+    residuals = [w * (x - estimate) for w, x in zip(weights, closed)]
+    variance = sum(e ** 2 for e in residuals) / (k * max(k - 1, 1) * mean_weight ** 2)
+    return estimate, 1.96 * math.sqrt(variance)
+
 # Helpers for making UTC time strings from git time strings.
 
 def make_utc_date(dict):
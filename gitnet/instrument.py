@@ -0,0 +1,287 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import sys
+import time
+import logging
+import functools
+import threading
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Stages of gitnet (retrieving and parsing logs, annotating, filtering, building networks and writing files) report an
+# Event to every registered handler when they finish. With no handlers registered, an instrumented function only checks
+# that the handler list is empty before running as usual.
+
+# The report of a finished stage:
+#   stage: the name of the stage, such as "parse_commits" or "Log.filter".
+#   seconds: the wall-clock duration of the stage.
+#   records: the number of records (commits, rows or edges) produced or written, or None.
+#   bytes: the number of bytes read, or None.
+#   peak_rss_mb: the peak resident memory of the process when the stage finished, in megabytes, or None.
+#   depth: the number of enclosing stages, e.g. 1 for parse_commits run by get_log.
+#   error: the name of the exception raised by the stage, or None.
+#   details: a dictionary of other information about the stage.
+Event = namedtuple("Event", ["stage", "seconds", "records", "bytes", "peak_rss_mb", "depth", "error", "details"])
+
+_handlers = []
+_local = threading.local()
+
+
+def add_handler(handler):
+    """
+    Registers a function to be called with an `Event` whenever an instrumented stage finishes.
+
+    **Parameters** :
+
+    > *handler* : `function`
+
+    >> A function of one `Event`.
+
+    **Return** : `None`
+
+    """
+    if handler not in _handlers:
+        _handlers.append(handler)
+
+
+def remove_handler(handler):
+    """
+    Unregisters a handler added with `add_handler`. Does nothing if it is not registered.
+    """
+    if handler in _handlers:
+        _handlers.remove(handler)
+
+
+def enabled():
+    """
+    Returns True if any handler is registered.
+    """
+    return len(_handlers) > 0
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident memory of the process in megabytes, or None where it is not available.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    if sys.platform == "darwin":
+        return rss / 1048576
+    return rss / 1024
+
+
+class Stage(object):
+    """
+    A context manager timing a block of code as a stage, and reporting it to the registered handlers when the block
+    exits. The block can set the `records` and `bytes` attributes, and add to the `details` dictionary.
+    """
+
+    def __init__(self, name, **details):
+        self.name = name
+        self.records = None
+        self.bytes = None
+        self.details = details
+        self._start = None
+
+    def __enter__(self):
+        if _handlers:
+            self._depth = getattr(_local, "depth", 0)
+            _local.depth = self._depth + 1
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._start is None:
+            return False
+        seconds = time.perf_counter() - self._start
+        _local.depth = self._depth
+        error = None if exc_type is None else exc_type.__name__
+        event = Event(self.name, seconds, self.records, self.bytes, peak_rss_mb(), self._depth, error, self.details)
+        for handler in list(_handlers):
+            handler(event)
+        return False
+
+
+def instrumented(name, records=None, size=None):
+    """
+    A decorator reporting each call of a function as a stage.
+
+    **Parameters** :
+
+    > *name* : `string`
+
+    >> The name of the stage.
+
+    > *records* : `function`
+
+    >> A function of the result and the positional arguments of the call, giving the number of records. Optional.
+
+    > *size* : `function`
+
+    >> A function of the result and the positional arguments of the call, giving the number of bytes read. Optional.
+
+    **Return** : `function`
+
+    """
+    def decorate(fun):
+        @functools.wraps(fun)
+        def wrapper(*args, **kwargs):
+            if not _handlers:
+                return fun(*args, **kwargs)
+            with Stage(name) as stage:
+                result = fun(*args, **kwargs)
+                if records is not None:
+                    stage.records = records(result, args)
+                if size is not None:
+                    stage.bytes = size(result, args)
+            return result
+        return wrapper
+    return decorate
+
+
+def tracked(items, progress, stage, every=1000):
+    """
+    Reports the progress of a loop over an iterable to a progress callback. Returns `items` itself if there is no
+    callback, so that untracked loops run as usual.
+
+    **Parameters** :
+
+    > *items* : `iterable`
+
+    >> The items of the loop.
+
+    > *progress* : `function` or `None`
+
+    >> A function called as `progress(stage, count)` after every `every` items, and once more with the final count
+    >> when the loop ends.
+
+    > *stage* : `string`
+
+    >> The name of the stage passed to the callback, such as "parse_commits".
+
+    > *every* : `int`
+
+    >> The number of items between calls. Defaults to 1000.
+
+    **Return** : `iterable`
+
+    """
+    if progress is None:
+        return items
+    return _tracked(items, progress, stage, every)
+
+
+def _tracked(items, progress, stage, every):
+    count = 0
+    for item in items:
+        yield item
+        count += 1
+        if count % every == 0:
+            progress(stage, count)
+    progress(stage, count)
+
+
+def enable_logging(level=logging.INFO, stream=None):
+    """
+    Shows the messages of gitnet (such as "Wrote edgelist with attributes to ...") on a stream. By default gitnet is
+    quiet, and its messages only reach handlers configured by the application with the `logging` module.
+
+    **Parameters** :
+
+    > *level* : `int`
+
+    >> The lowest level of messages to show. Defaults to `logging.INFO`.
+
+    > *stream* :
+
+    >> The stream to write to. Defaults to `sys.stderr`.
+
+    **Return** : `logging.Handler`
+
+    > The handler added to the "gitnet" logger, which can be removed with `logging.getLogger("gitnet").removeHandler`.
+
+    """
+    logger = logging.getLogger("gitnet")
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+
+class Recorder(object):
+    """
+    A handler keeping every `Event` in a list. Registers itself while used as a context manager:
+
+        with Recorder() as recorder:
+            log = gitnet.get_log(path)
+        print(recorder.events)
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def __enter__(self):
+        add_handler(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        remove_handler(self)
+        return False
+
+    def totals(self):
+        """
+        Returns the total seconds spent in each stage, as a dictionary.
+        """
+        totals = {}
+        for event in self.events:
+            totals[event.stage] = totals.get(event.stage, 0) + event.seconds
+        return totals
+
+
+class Reporter(Recorder):
+    """
+    A handler printing one line for each `Event`, indented by its depth, to a stream (by default `sys.stderr`). Like
+    `Recorder`, it registers itself while used as a context manager, and keeps the events.
+    """
+
+    def __init__(self, stream=None):
+        Recorder.__init__(self)
+        self.stream = stream
+
+    def __call__(self, event):
+        Recorder.__call__(self, event)
+        stream = sys.stderr if self.stream is None else self.stream
+        parts = ["{:.3f}s".format(event.seconds)]
+        if event.records is not None:
+            parts.append("{} records".format(event.records))
+        if event.bytes is not None:
+            parts.append("{} bytes".format(event.bytes))
+        if event.peak_rss_mb is not None:
+            parts.append("peak RSS {:.1f} MB".format(event.peak_rss_mb))
+        if event.error is not None:
+            parts.append("failed with {}".format(event.error))
+        stream.write("{}{}: {}\n".format("  " * event.depth, event.stage, ", ".join(parts)))
@@ -0,0 +1,348 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import numpy as np
+
+
+def force_layout(graph, iterations=50, pos=None, coarsen=False, seed=None):
+    """
+    Computes a ForceAtlas2-style force directed layout of a graph. Nodes repel each other in proportion to the product
+    of their degrees, edges pull their nodes together in proportion to their length, and a weak gravity keeps
+    disconnected components close. Repulsion is approximated Barnes-Hut style: distant groups of nodes are replaced
+    by their centre of mass using a hierarchy of grids, so each iteration costs roughly O(V log V + E).
+
+    **Parameters** :
+
+    > *graph* : `networkx.Graph`
+
+    >> The graph to lay out. Parallel edges pull harder than single edges.
+
+    > *iterations* : `int`
+
+    >> The number of iterations to run (at each level, when `coarsen` is True).
+
+    > *pos* : `dict`
+
+    >> An optional dictionary of starting positions, keyed by node. If every node has a position, these are returned
+    >> unchanged. Otherwise, nodes without a position are placed beside their positioned neighbours, and the layout is
+    >> refined from there rather than computed from scratch.
+
+    > *coarsen* : `bool`
+
+    >> If True (and `pos` is not given), the graph is repeatedly coarsened by merging neighbouring nodes, the
+    >> coarsest graph is laid out, and the layout is refined at each finer level. Recommended for large graphs.
+
+    > *seed* : `int`
+
+    >> An optional seed for the random initial positions.
+
+    **Return** : `dict`
+
+    > A dictionary mapping each node to an (x, y) tuple.
+
+    """
+    nodes = graph.nodes()
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    pairs = [(index[u], index[v]) for u, v in graph.edges_iter() if u != v]
+    src = np.array([p[0] for p in pairs], dtype=np.int64)
+    dst = np.array([p[1] for p in pairs], dtype=np.int64)
+    weight = np.ones(len(pairs))
+    mass = 1.0 + np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+    rng = np.random.RandomState(seed)
+    if pos is None:
+        pos = {}
+    known = np.array([node in pos for node in nodes], dtype=bool)
+    if known.all():
+        return {node: tuple(pos[node]) for node in nodes}
+    if known.any():
+        x = np.zeros((n, 2))
+        x[known] = [pos[node] for node in nodes if node in pos]
+        x = _place_new(x, known, src, dst, rng)
+        x = _run(x, src, dst, weight, mass, iterations, 0.02)
+    elif coarsen:
+        x = _multilevel(src, dst, weight, mass, iterations, rng)
+    else:
+        x = rng.uniform(-1, 1, (n, 2)) * np.sqrt(n)
+        x = _run(x, src, dst, weight, mass, iterations, 0.1)
+    return {node: (x[i, 0], x[i, 1]) for i, node in enumerate(nodes)}
+
+
+def _place_new(x, known, src, dst, rng):
+    """Places each node without a position at the mean position of its positioned neighbours, plus some jitter."""
+    n = len(x)
+    new = ~known
+    lo = x[known].min(axis=0)
+    hi = x[known].max(axis=0)
+    jitter = max((hi - lo).max(), 1.0) * 0.01
+    for i in range(3):
+        # Repeated sweeps let positions spread a few steps into unpositioned parts of the graph.
+        k = known.astype(float)
+        count = np.bincount(src, weights=k[dst], minlength=n) + np.bincount(dst, weights=k[src], minlength=n)
+        placed = ~known & (count > 0)
+        if not placed.any():
+            break
+        for d in range(2):
+            total = np.bincount(src, weights=(x[:, d] * k)[dst], minlength=n) + \
+                np.bincount(dst, weights=(x[:, d] * k)[src], minlength=n)
+            x[placed, d] = total[placed] / count[placed]
+        known = known | placed
+    x[~known] = rng.uniform(lo, hi + 1e-9, ((~known).sum(), 2))
+    x[new] += rng.normal(scale=jitter, size=(new.sum(), 2))
+    return x
+
+
+def _run(x, src, dst, weight, mass, iterations, temperature):
+    """
+    Runs force directed iterations on an array of positions. Each node moves along its net force by at most the
+    current temperature, which starts at `temperature` times the width of the layout and cools linearly.
+    """
+    n = len(x)
+    if n < 2:
+        return x
+    x = x.copy()
+    step = temperature * max(np.ptp(x, axis=0).max(), 1.0)
+    for it in range(iterations):
+        force = _repulsion(x, mass)
+        delta = x[dst] - x[src]
+        for d in range(2):
+            pull = delta[:, d] * weight
+            force[:, d] += np.bincount(src, weights=pull, minlength=n) - np.bincount(dst, weights=pull, minlength=n)
+        # Gravity of constant strength towards the centre of the layout.
+        centred = x - x.mean(axis=0)
+        dist = np.sqrt((centred ** 2).sum(axis=1))
+        force -= centred * (mass / np.maximum(dist, 1e-9))[:, None]
+        length = np.sqrt((force ** 2).sum(axis=1))
+        limit = step * (1.0 - it / float(iterations))
+        x += force * (np.minimum(length, limit) / np.maximum(length, 1e-9))[:, None]
+    return x
+
+
+def _repulsion(x, mass, leaf_size=1, max_exact=32):
+    """
+    Computes the repulsive force on every node. Nodes are binned into a hierarchy of square grids. At each level, a
+    node interacts with the centres of mass of the cells which are not adjacent to its own cell, but whose parent
+    cells are adjacent to its parent; at the finest level, nodes in adjacent cells interact exactly. The grid is at
+    most 1024 cells wide, so a dense cluster can put many nodes in one finest cell. Cells with more than `max_exact`
+    nodes interact through their centre of mass instead (excluding the node itself, for its own cell), which keeps
+    the cost of an iteration linear in the number of nodes however clustered the layout is.
+    """
+    n = len(x)
+    force = np.zeros_like(x)
+    lo = x.min(axis=0)
+    extent = np.ptp(x, axis=0).max()
+    if extent == 0:
+        extent = 1.0
+    depth = int(min(max(np.ceil(np.log(max(n / float(leaf_size), 1.0)) / np.log(4)), 1), 10))
+    side = 2 ** depth
+    cell = np.minimum(((x - lo) / extent * side).astype(np.int64), side - 1)
+
+    xs = x[:, 0]
+    ys = x[:, 1]
+
+    def push(i, other_x, other_y, other_mass):
+        # Repulsion of strength mass_i * mass_j / distance, directed away from the other point.
+        dx = xs[i] - other_x
+        dy = ys[i] - other_y
+        scale = mass[i] * other_mass / np.maximum(dx * dx + dy * dy, 1e-9)
+        force[:, 0] += np.bincount(i, weights=dx * scale, minlength=n)
+        force[:, 1] += np.bincount(i, weights=dy * scale, minlength=n)
+
+    for level in range(2, depth + 1):
+        size = 2 ** level
+        c = cell >> (depth - level)
+        flat = c[:, 0] * size + c[:, 1]
+        cell_mass = np.bincount(flat, weights=mass, minlength=size * size)
+        occupied = cell_mass > 0
+        safe_mass = np.where(occupied, cell_mass, 1.0)
+        centre_x = np.bincount(flat, weights=mass * xs, minlength=size * size) / safe_mass
+        centre_y = np.bincount(flat, weights=mass * ys, minlength=size * size) / safe_mass
+        base = (c >> 1) << 1
+        sources = []
+        targets = []
+        for ox in range(-2, 4):
+            tx = base[:, 0] + ox
+            for oy in range(-2, 4):
+                ty = base[:, 1] + oy
+                ok = (tx >= 0) & (tx < size) & (ty >= 0) & (ty < size) & \
+                    ((np.abs(tx - c[:, 0]) > 1) | (np.abs(ty - c[:, 1]) > 1))
+                i = np.flatnonzero(ok)
+                target = tx[i] * size + ty[i]
+                filled = occupied[target]
+                sources.append(i[filled])
+                targets.append(target[filled])
+        i = np.concatenate(sources)
+        target = np.concatenate(targets)
+        if len(i) > 0:
+            push(i, centre_x[target], centre_y[target], cell_mass[target])
+
+    flat = cell[:, 0] * side + cell[:, 1]
+    order = np.argsort(flat, kind="mergesort")
+    count = np.bincount(flat, minlength=side * side)
+    start = np.cumsum(count) - count
+    crowded = count > max_exact
+    if crowded.any():
+        cell_mass = np.bincount(flat, weights=mass, minlength=side * side)
+        mass_x = np.bincount(flat, weights=mass * xs, minlength=side * side)
+        mass_y = np.bincount(flat, weights=mass * ys, minlength=side * side)
+    sources = []
+    targets = []
+    for ox in range(-1, 2):
+        tx = cell[:, 0] + ox
+        for oy in range(-1, 2):
+            ty = cell[:, 1] + oy
+            ok = (tx >= 0) & (tx < side) & (ty >= 0) & (ty < side)
+            i = np.flatnonzero(ok)
+            target = tx[i] * side + ty[i]
+            if crowded.any():
+                dense = crowded[target]
+                di = i[dense]
+                dt = target[dense]
+                # Remove the node's own contribution when the crowded cell is its own.
+                own = (ox == 0 and oy == 0)
+                other_mass = cell_mass[dt] - (mass[di] if own else 0)
+                keep = other_mass > 0
+                di, dt, other_mass = di[keep], dt[keep], other_mass[keep]
+                if len(di) > 0:
+                    own_x = mass[di] * xs[di] if own else 0
+                    own_y = mass[di] * ys[di] if own else 0
+                    push(di, (mass_x[dt] - own_x) / other_mass, (mass_y[dt] - own_y) / other_mass, other_mass)
+                i = i[~dense]
+                target = target[~dense]
+            members = count[target]
+            # Expand each node into one pair per member of the neighbouring cell.
+            ii = np.repeat(i, members)
+            offset = np.arange(len(ii)) - np.repeat(np.cumsum(members) - members, members)
+            jj = order[np.repeat(start[target], members) + offset]
+            distinct = ii != jj
+            sources.append(ii[distinct])
+            targets.append(jj[distinct])
+    ii = np.concatenate(sources)
+    jj = np.concatenate(targets)
+    if len(ii) > 0:
+        push(ii, xs[jj], ys[jj], mass[jj])
+    return force
+
+
+def _coarsen(n, src, dst, weight, mass, rng):
+    """
+    Merges nodes into groups: a random maximal matching of neighbours is taken, and each unmatched node joins the
+    group of one of its neighbours. Returns the group of each node, and the coarse edges, weights and masses.
+    """
+    group = -np.ones(n, dtype=np.int64)
+    groups = 0
+    edge_order = rng.permutation(len(src))
+    for e in edge_order:
+        u = src[e]
+        v = dst[e]
+        if group[u] < 0 and group[v] < 0:
+            group[u] = group[v] = groups
+            groups += 1
+    for e in edge_order:
+        u = src[e]
+        v = dst[e]
+        if group[u] < 0 and group[v] >= 0:
+            group[u] = group[v]
+        elif group[v] < 0 and group[u] >= 0:
+            group[v] = group[u]
+    alone = group < 0
+    group[alone] = groups + np.arange(alone.sum())
+    groups += int(alone.sum())
+    coarse_mass = np.bincount(group, weights=mass, minlength=groups)
+    a = group[src]
+    b = group[dst]
+    keep = a != b
+    key = np.minimum(a, b)[keep] * groups + np.maximum(a, b)[keep]
+    key, inverse = np.unique(key, return_inverse=True)
+    coarse_weight = np.bincount(inverse, weights=weight[keep])
+    return group, key // groups, key % groups, coarse_weight, coarse_mass
+
+
+def _multilevel(src, dst, weight, mass, iterations, rng):
+    """Lays out a graph by coarsening it, laying out the coarsest graph and refining the layout level by level."""
+    levels = []
+    n = len(mass)
+    while n > 100:
+        group, c_src, c_dst, c_weight, c_mass = _coarsen(n, src, dst, weight, mass, rng)
+        if len(c_mass) > 0.8 * n:
+            break
+        levels.append((src, dst, weight, mass, group))
+        src, dst, weight, mass = c_src, c_dst, c_weight, c_mass
+        n = len(mass)
+    x = _run(rng.uniform(-1, 1, (n, 2)) * np.sqrt(n), src, dst, weight, mass, iterations, 0.1)
+    for src, dst, weight, mass, group in reversed(levels):
+        x = x[group] + rng.normal(scale=0.5, size=(len(group), 2))
+        x = _run(x, src, dst, weight, mass, iterations, 0.02)
+    return x
+
+
+def edge_density(start, end, resolution=1000, chunk_size=4000000):
+    """
+    Rasterizes line segments into an image counting how many segments cross each pixel. Each segment is sampled once
+    per pixel along its longer axis, and segments are processed in chunks so that memory use stays bounded.
+
+    **Parameters** :
+
+    > *start* : `numpy.ndarray`
+
+    >> An array of shape (number of segments, 2) holding the start point of each segment.
+
+    > *end* : `numpy.ndarray`
+
+    >> An array of the same shape holding the end point of each segment.
+
+    > *resolution* : `int`
+
+    >> The number of pixels along the longer side of the image.
+
+    > *chunk_size* : `int`
+
+    >> The approximate number of sample points processed at a time.
+
+    **Return** : `tuple`
+
+    > A tuple of the image (a 2D array indexed by row, then column) and its extent (left, right, bottom, top) in the
+    > coordinates of the segments, suitable for `matplotlib.pyplot.imshow(..., origin="lower")`.
+
+    """
+    points = np.concatenate([start, end]).reshape(-1, 2)
+    if len(points) == 0:
+        return np.zeros((1, 1)), (0.0, 1.0, 0.0, 1.0)
+    lo = points.min(axis=0)
+    span = np.ptp(points, axis=0)
+    scale = (resolution - 1) / span.max() if span.max() > 0 else 1.0
+    width, height = (np.floor(span * scale).astype(np.int64) + 1)
+    p0 = (start - lo) * scale
+    delta = (end - lo) * scale - p0
+    steps = np.ceil(np.abs(delta).max(axis=1)).astype(np.int64) + 1
+    image = np.zeros(width * height)
+    bounds = np.cumsum(steps)
+    first = 0
+    while first < len(steps):
+        last = max(int(np.searchsorted(bounds, bounds[first] - steps[first] + chunk_size, side="right")), first + 1)
+        counts = steps[first:last]
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        t = offset / np.repeat(np.maximum(counts - 1, 1), counts).astype(float)
+        px = np.rint(np.repeat(p0[first:last, 0], counts) + t * np.repeat(delta[first:last, 0], counts))
+        py = np.rint(np.repeat(p0[first:last, 1], counts) + t * np.repeat(delta[first:last, 1], counts))
+        px = np.clip(px.astype(np.int64), 0, width - 1)
+        py = np.clip(py.astype(np.int64), 0, height - 1)
+        image += np.bincount(py * width + px, minlength=width * height)
+        first = last
+    extent = (lo[0] - 0.5 / scale, lo[0] + (width - 0.5) / scale, lo[1] - 0.5 / scale, lo[1] + (height - 0.5) / scale)
+    return image.reshape(height, width), extent
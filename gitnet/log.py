@@ -14,15 +14,26 @@
 # If not, see <http://www.gnu.org/licenses/>.
 # *********************************************************************************************
 
+import io
 import os
+import sys
+import csv
 import copy
+import logging
 import warnings
-import pandas as pd
+from collections import Counter
 import datetime as dt
 import subprocess as sub
 from gitnet.multigraph import MultiGraphPlus
+from gitnet.storage import StoredCollection, MappedCollection, MISSING, write_store, column_array
+from gitnet.database import SQLiteCollection, write_database
+from gitnet.summary import SpaceSaving, top_k
+from gitnet.instrument import instrumented, tracked
 from gitnet.helpers import datetime_git, filter_before, filter_beforex, filter_since, filter_sincex, \
-    filter_has, filter_equals, net_edges_simple, net_edges_changes
+    filter_has, filter_equals, net_edges_simple, net_edges_changes, list_to_scd, open_output, intern_attrs, \
+    resolve_aliases
+
+logger = logging.getLogger(__name__)
 
 
 class Log(object):
@@ -32,6 +43,9 @@ class Log(object):
 
     """
 
+    # The result of attributes(), with the collection it was computed for.
+    _attributes = None
+
     def __init__(self, dofd={}, source=None, path=None, key_type=None, filters=[]):
         """
         Initializes the `Log` with a timestamp. Other fields default to an empty dictionary, or `none` unless otherwise specified.
@@ -71,8 +85,10 @@ class Log(object):
         self.path = path
         self.key_type = key_type
         self.filters = filters
-        # Annotate and tags must be updated as tags/subclasses are added.
-        self.annotate()
+        # Annotate and tags must be updated as tags/subclasses are added. Memory-mapped records are read-only, and were
+        #   annotated before they were stored.
+        if not isinstance(self.collection, StoredCollection):
+            self.annotate()
         self.tags = self.get_tags()
 
     def __iter__(self):
@@ -125,11 +141,22 @@ class Log(object):
         > If the `self.tags` attribute has been defined for this object, tags appear by their order in `self.tags`. Any
         > unrecognized tags will be added at the end.
 
+        **Notes** :
+
+        > The result is cached until the collection is replaced or a method adds attributes to it in place (such as
+        > `mutate_attribute`). Call `clear_cache` after adding keys to records directly.
+
         """
+        # The cache is kept with the collection it describes, so copies with new collections never reuse it.
+        if self._attributes is not None and self._attributes[0] is self.collection:
+            return list(self._attributes[1])
         attr = set()
+        if isinstance(self.collection, StoredCollection):
+            attr.update(self.collection.attributes())
         # Add every key in the collection to a set object.
-        for record in self.collection:
-            attr = attr.union(self.collection[record].keys())
+        else:
+            for record in self.collection.values():
+                attr.update(record.keys())
         # Tracking attributes
         attr_list = []
         # For every tag defined for the subclass, add to the list of attributes in order, and remove from set.
@@ -141,7 +168,29 @@ class Log(object):
         #   add them to the end of the list (sorted).
         if len(attr) > 0:
             attr_list = attr_list + sorted(list(attr))
-        return attr_list
+        self._attributes = (self.collection, attr_list)
+        return list(attr_list)
+
+    def clear_cache(self):
+        """
+        Clears the cached result of `attributes`. Only needed after keys have been added to, or removed from, records
+        in `self.collection` directly.
+        """
+        self._attributes = None
+
+    def _shallow_copy(self):
+        """
+        Produces a copy of the `Log` whose records are new dictionaries, without copying the values they hold. Values
+        (including lists) are shared with the original, so methods using this copy must replace values rather than
+        mutate them. Much faster than `copy.deepcopy` for large logs.
+
+        **Return** : `Log`
+
+        """
+        self_copy = copy.copy(self)
+        self_copy.collection = {key: dict(record) for key, record in self.collection.items()}
+        self_copy.filters = list(self.filters)
+        return self_copy
 
     def add_attribute(self,name,helper):
         """
@@ -164,6 +213,7 @@ class Log(object):
         self_copy = copy.deepcopy(self)
         for n in self_copy:
             self_copy[n][name] = helper(self_copy[n])
+        self_copy.clear_cache()
         return self_copy
 
     def mutate_attribute(self,name,helper):
@@ -186,6 +236,7 @@ class Log(object):
         """
         for n in self:
             self[n][name] = helper(self[n])
+        self.clear_cache()
 
     def author_email_list(self):
         """
@@ -193,16 +244,11 @@ class Log(object):
         The intention is that the user can use these author names in the `replace_val` function.
 
         """
-        duplicates = []
-        selfcopy = copy.deepcopy(self)
-        for record in selfcopy.collection:
-            if 'email' in selfcopy.collection[record].keys():
-                if str(selfcopy.collection[record]['email'] + '   ' + selfcopy.collection[record]['author']).encode('ascii', 'replace') in duplicates:
-                    pass
-                else:
-                    entry = str((selfcopy.collection[record]['email'] + '   ' + selfcopy.collection[record]['author']))
-                    entry = entry.encode('ascii', 'replace')
-                    duplicates.append(entry)
+        duplicates = set()
+        for record in self.collection.values():
+            if 'email' in record.keys():
+                entry = str(record['email'] + '   ' + record['author'])
+                duplicates.add(entry.encode('ascii', 'replace'))
         templist = []
         for item in duplicates:
             item = item.decode('ascii', 'strict')
@@ -293,17 +339,60 @@ class Log(object):
 
         return duplicate_dict
 
-    def df(self):
+    def df(self, categorical=[], explode=None):
         """
         Converts the `Log` to a Pandas dataframe. Recommended method for analyzing attribute data in Python.
 
+        **Parameters** :
+
+        > *categorical* : `list`
+
+        >> Tags whose columns are converted to `pandas.Categorical`, which uses far less memory for columns with
+        >> many repeated values, e.g. `["author", "email", "domain"]`.
+
+        > *explode* : `None` or `string`
+
+        >> If a tag is given, returns a table with one row for each item of the tag's values (e.g. one row per file
+        >> changed, for "files"), indexed by record, instead of one row per record. Join it with `df()` on the index
+        >> to get the attributes of each record.
+
         **Return** : `dataframe`
 
-        > Returns a `pandas dataframe` object. Rows are commits by short-hash. Columns are commit attributes.
+        > Returns a `pandas dataframe` object. Rows are commits by short-hash. Columns are commit attributes. Columns
+        > of integers, floats and booleans have numeric dtypes (numbers with missing values are floats, with NaN);
+        > other columns hold Python objects, with NaN for missing values.
         """
-        retval = pd.DataFrame.from_dict(self.collection, orient="index")[self.attributes()]
-        return retval
-
+        import pandas as pd
+        index = list(self.collection)
+        if explode is not None:
+            keys = []
+            items = []
+            for key, value in zip(index, self._column(explode)):
+                if type(value) is list:
+                    keys.extend([key] * len(value))
+                    items.extend(value)
+                elif value is not MISSING:
+                    keys.append(key)
+                    items.append(value)
+            column = column_array(items)
+            if explode in categorical:
+                column = pd.Categorical(column)
+            return pd.DataFrame({explode: column}, index=keys, columns=[explode])
+        # Build the frame a column at a time, instead of from a dictionary of record dictionaries.
+        tags = self.attributes()
+        columns = {}
+        for tag in tags:
+            column = None
+            if isinstance(self.collection, StoredCollection):
+                column = self.collection.array(tag)
+            if column is None:
+                column = column_array(self._column(tag))
+            if tag in categorical:
+                column = pd.Categorical(column)
+            columns[tag] = column
+        return pd.DataFrame(columns, index=index, columns=tags)
+
+    @instrumented("Log.filter", records=lambda result, args: len(result))
     def filter(self, tag, fun, match, negate=False, helper=None, summary=None):
         """
         A method which creates a new `Log`, containing only records which match certain criteria.
@@ -396,50 +485,126 @@ class Log(object):
         if tag == "date" and fun in ("<", "<=", ">", ">="):
             warnings.warn("Dates have been compared alphabetically with {}, "
                           "use Datetime comparisons to compare dates by time.".format(fun))
-        # Make a copy of self
-        new_log = copy.deepcopy(self)
+        # Make a copy of self, without its records.
+        new_log = copy.copy(self)
+        new_log.filters = list(self.filters)
         # Add filter summary to self.filters
         if summary is not None:
             filter_summary = summary
         else:
             filter_summary = "{} {} {} | Negate: {} | Helper: {}".format(tag, fun, match, negate, helper)
         new_log.filters.append(filter_summary)
+        # Stores which can evaluate a built-in predicate themselves return a filtered view, without reading records.
+        if isinstance(self.collection, StoredCollection) and not callable(helper):
+            view = self.collection.pushdown(tag, fun, match, negate)
+            if view is not None:
+                new_log.collection = view
+                return new_log
         # Get the predicate for filtering, from custom helper parameter or helper dictionary.
         if callable(helper):
             use_fun = helper
         else:
             use_fun = fun_reference[fun]
+
+        def matches(value):
+            if type(value) == list:
+                for item in value:
+                    if use_fun(item, match):
+                        return True
+            return use_fun(value, match)
+
         # Check every record for a match.
-        for record in self.collection:
-            keep = False
+        kept = []
+        if tag == "any":
             # Check all tags.
-            if tag == "any":
-                for rkey in self.collection[record]:
-                    if type(self.collection[record][rkey]) == list:
-                        for item in self.collection[record][rkey]:
-                            if use_fun(item, match):
-                                keep = True
-                                break
-                    if use_fun(self.collection[record][rkey], match):
+            for record, cur in self.collection.items():
+                keep = False
+                for rkey in cur:
+                    if matches(cur[rkey]):
                         keep = True
                         break
-            # Check a specific tag
-            elif tag in self.collection[record].keys():
-                if type(self.collection[record][tag]) == list:
-                    for item in self.collection[record][tag]:
-                        if use_fun(item, match):
-                            keep = True
-                            break
-                if use_fun(self.collection[record][tag], match):
-                    keep = True
-            # Negate the check if required.
-            if negate:
-                keep = not keep
-            # If the data point is not to be kept, remove the record from the copied collection.
-            if not keep:
-                del new_log.collection[record]
+                # Negate the check if required.
+                if keep != negate:
+                    kept.append(record)
+        else:
+            # Check a specific tag, reading only that tag's values.
+            for record, value in zip(self.collection, self._column(tag)):
+                keep = value is not MISSING and matches(value)
+                if keep != negate:
+                    kept.append(record)
+        # Copy the records that are kept. Stored collections are filtered as views, without copying.
+        if isinstance(self.collection, StoredCollection):
+            new_log.collection = self.collection.subset(kept)
+        else:
+            new_log.collection = {record: copy.deepcopy(self.collection[record]) for record in kept}
         return new_log
 
+    @classmethod
+    def from_mmap(cls, path):
+        """
+        Opens a `Log` saved with `to_mmap`. Records are read from the memory-mapped store as they are needed, so the
+        `Log` can be larger than memory, and several processes can open the same store at once.
+
+        **Parameters** :
+
+        > *path* : `string`
+
+        >> The directory containing the store.
+
+        **Return** : `Log`
+
+        > A `Log` (or subclass, when called on one, e.g. `CommitLog.from_mmap(path)`) whose collection is a read-only
+        > `MappedCollection`. Methods which modify records, such as `add_attribute` or `replace_val`, return
+        > ordinary in-memory copies; `filter` returns another memory-mapped view.
+
+        """
+        collection = MappedCollection(path)
+        meta = collection.meta
+        log = cls(dofd=collection, source=meta.get("source"), path=meta.get("path"), key_type=meta.get("key_type"),
+                  filters=meta.get("filters", []))
+        if "timestamp" in meta:
+            log.timestamp = meta["timestamp"]
+        return log
+
+    @classmethod
+    def from_sqlite(cls, path, where=None, params=()):
+        """
+        Opens a `Log` saved with `to_sqlite`. Records are read from the database as they are needed, and filters on
+        indexed tags are evaluated by SQLite (see `to_sqlite`).
+
+        **Parameters** :
+
+        > *path* : `string`
+
+        >> The database file.
+
+        > *where* : `None` or `string`
+
+        >> An SQL condition selecting the records to include. It may refer to the columns of the `commits` table
+        >> (key, hash, date, timestamp) and of the `authors` table (name, email), e.g.
+        >> `"authors.email LIKE '%@gmail.com' AND commits.timestamp >= 1451606400"`.
+
+        > *params* : `tuple`
+
+        >> Values for any `?` placeholders in `where`.
+
+        **Return** : `Log`
+
+        > A `Log` (or subclass, when called on one, e.g. `CommitLog.from_sqlite(path)`) whose collection is a read-only
+        > `SQLiteCollection`. Methods which modify records return ordinary in-memory copies.
+
+        """
+        collection = SQLiteCollection(path, where, params)
+        meta = collection.meta
+        filters = list(meta.get("filters", []))
+        if where is not None:
+            filters.append("SQL: {} | Params: {}".format(where, tuple(params)))
+        log = cls(dofd=collection, source=meta.get("source"), path=meta.get("path"), key_type=meta.get("key_type"),
+                  filters=filters)
+        if "timestamp" in meta:
+            log.timestamp = meta["timestamp"]
+        return log
+
     def get_tags(self):
         """
         For the base `Log` class, tags defaults to an empty list. `Log` subclasses have alternate `get_tags` methods, which
@@ -452,6 +617,45 @@ class Log(object):
         """
         return []
 
+    def merge_values(self, tag, mapping):
+        """
+        Replaces many values of a tag in a single pass. Chains of aliases are resolved, so that `{"a": "b", "b": "c"}`
+        replaces both "a" and "b" with "c". This is the `Log` equivalent of `MultiGraphPlus.merge_nodes`, and is
+        particularly useful for consolidating author names before generating a network.
+
+        **Parameters** :
+
+        > *tag* : `string`
+
+        >> The record tag string whose values will be checked (and replaced when appropriate). Values in list tags
+        >> (such as "files") are replaced item by item.
+
+        > *mapping* : `dictionary`
+
+        >> A dictionary whose keys are the values to replace, and whose values are their replacements.
+
+        **Return** : `Log`
+
+        > Returns a `Log` object with values that have been replaced according to the mapping.
+
+        """
+        canonical = resolve_aliases(mapping)
+        selfcopy = self._shallow_copy()
+        replaced_vals = 0
+        for record in selfcopy.collection.values():
+            if tag in record:
+                value = record[tag]
+                if type(value) is list:
+                    # Lists are shared with the original Log, so a replaced list is rebuilt rather than mutated.
+                    if any(item in canonical for item in value):
+                        record[tag] = [canonical.get(item, item) for item in value]
+                        replaced_vals += sum(1 for item in value if item in canonical)
+                elif value in canonical:
+                    record[tag] = canonical[value]
+                    replaced_vals += 1
+        logger.info("Success. You have replaced %d %s value(s).", replaced_vals, tag)
+        return selfcopy
+
     def replace_val(self, tag, cur_val, new_val):
         """
         Searches for user specified values in a specific tag in the `Log` and replaces them with a new value.
@@ -492,10 +696,74 @@ class Log(object):
         elif status == 1:
             warnings.warn("Failed. The value requested does not appear in any records in this collection.")
         elif status == 2:
-            print("Success. You have replaced the " + tag + " value: " + str(cur_val) + " " + str(replaced_vals) + " times.")
+            logger.info("Success. You have replaced the %s value: %s %d times.", tag, cur_val, replaced_vals)
         return selfcopy
 
-    def tsv(self, fname, ignore=[], empty_cols=False):
+    @instrumented("Log.to_mmap", records=lambda result, args: len(args[0]))
+    def to_mmap(self, path, chunk_size=50000):
+        """
+        Saves the `Log` as a memory-mapped store, which can be opened with `from_mmap`. Each tag is stored as a column
+        of typed arrays, with string pools and offset arrays for text and list values (such as "files" and "changes").
+
+        **Parameters** :
+
+        > *path* : `string`
+
+        >> The directory to write the store to.
+
+        > *chunk_size* : `int`
+
+        >> The number of records encoded at a time.
+
+        **Return** : `None`
+
+        """
+        meta = {"source": self.source,
+                "path": self.path,
+                "key_type": self.key_type,
+                "filters": self.filters,
+                "timestamp": self.timestamp}
+        n = write_store(path, self.collection.items(), meta, chunk_size=chunk_size)
+        logger.info("Wrote %d records to %s", n, path)
+
+    @instrumented("Log.to_sqlite", records=lambda result, args: len(args[0]))
+    def to_sqlite(self, path, chunk_size=10000):
+        """
+        Saves the `Log` as a SQLite database, which can be opened with `from_sqlite`. Each record is stored in full, and
+        authors, files, and the files changed by each commit (with lines inserted and deleted) are also stored in
+        indexed tables, which can be queried directly with SQL:
+
+        > `authors (id, name, email)`
+
+        > `files (id, path)`
+
+        > `commits (id, key, hash, author_id, date, timestamp, record)`
+
+        > `commit_files (commit_id, file_id, position, inserts, deletes)`
+
+        **Parameters** :
+
+        > *path* : `string`
+
+        >> The database file to write. An existing file is replaced.
+
+        > *chunk_size* : `int`
+
+        >> The number of records inserted per transaction.
+
+        **Return** : `None`
+
+        """
+        meta = {"source": self.source,
+                "path": self.path,
+                "key_type": self.key_type,
+                "filters": self.filters,
+                "timestamp": self.timestamp}
+        n = write_database(path, self.collection.items(), meta, chunk_size=chunk_size)
+        logger.info("Wrote %d records to %s", n, path)
+
+    @instrumented("Log.tsv", records=lambda result, args: len(args[0]))
+    def tsv(self, fname, ignore=[], empty_cols=False, chunksize=10000):
         """
         Converts the `Log` to a tab-delimited string (using a tab-delimted format is preferrable to CSV since this option
         does not change the content strings by removing commas).
@@ -506,15 +774,20 @@ class Log(object):
 
         >> Tags included in this list of strings will be ignored.
 
-        > *fname* : `string`
+        > *fname* : `string` or file object
 
-        >> An optional string (defaults to `None`) indicating the path or file name to write to. If `None`, no
-        file will be written.
+        >> The path or file name to write to, or a writable text file object (such as one opened with `gzip.open(...,
+        >> "wt")`), which is left open. File names ending in `.gz`, `.bz2` or `.xz` are compressed. If `None`, no file
+        >> will be written, and the data is returned instead.
 
         > *empty_cols* :
 
         >> If True, export will include all Log subclass tags, even if not collected, giving empty columns.
 
+        > *chunksize* : `int`
+
+        >> The number of rows joined together for each write.
+
         **Return** : `string`
 
         > A tab-delimited dataset in string form (or a summary statement if a file name was provided).
@@ -528,72 +801,54 @@ class Log(object):
         types = list(filter(lambda s: s not in ignore, types))
         # The number of items that were forced to strings. If > 1 at return, raise a warning.
         num_forced = 0
-        # The string to be output
-        out = ""
-        # If a filename is given, access the file.
-        if fname is not None:
-            f = open(fname, "w", encoding="utf-8")
-
-        # Add header line
-        header = ""
-        head_cur = 0
-        for tag in types:
-            head_cur += 1
-            header = header + tag
-            if head_cur != len(types):
-                header += "\t"
-            else:
-                header += "\n"
-        if fname is not None:
-            f.write(header)
+
+        def field(value):
+            nonlocal num_forced
+            # Strings are written as they are, and lists are joined by semicolons. Anything else is forced to a string.
+            if type(value) == str:
+                return value
+            elif type(value) == list:
+                items = []
+                for i in value:
+                    if type(i) == str:
+                        items.append(i)
+                    else:
+                        items.append(str(i))
+                        num_forced += 1
+                return ";".join(items)
+            num_forced += 1
+            return str(value)
+
+        if fname is None:
+            f = io.StringIO()
+        elif hasattr(fname, "write"):
+            f = fname
         else:
-            out = out + header
-        # Create each line of output.
-        for record in self.collection:
-            line = ""
-            tags_cur = 0
-            # Add the value for each tag.
-            for tag in types:
-                tags_cur += 1
-                if tag not in ignore:
-                    # If the key is valid, add the value.
-                    if tag in self.collection[record].keys():
-                        cur_item = self.collection[record][tag]
-                        # If the item is a simple string, add it.
-                        if type(cur_item) == str:
-                            line = line + cur_item
-                        # If the item is a list, add each string in the list.
-                        elif type(cur_item) == list:
-                            list_cur = 0
-                            for i in cur_item:
-                                list_cur += 1
-                                if type(i) == str:
-                                    line += i
-                                # Force a non-string to string.
-                                else:
-                                    line += str(i)
-                                    num_forced += 1
-                                if list_cur != len(cur_item):
-                                    line += ";"
-                        # If the item is neither a string nor a list, force it to a string.
-                        else:
-                            line += str(cur_item)
-                            num_forced += 1
-                    # Unless it is the last tag, add a separating tab.
-                    if tags_cur != len(types):
-                        line += "\t"
-            # Give the line to string or file.
-            line += "\n"
-            if fname is not None:
-                f.write(line)
-            else:
-                out += line
+            f = open_output(fname)
+        try:
+            f.write("\t".join(types) + "\n")
+            lines = []
+            for record in self.collection.values():
+                lines.append("\t".join([field(record[tag]) if tag in record else "" for tag in types]))
+                if len(lines) >= chunksize:
+                    lines.append("")
+                    f.write("\n".join(lines))
+                    lines = []
+            if len(lines) > 0:
+                lines.append("")
+                f.write("\n".join(lines))
+        finally:
+            if fname is not None and f is not fname:
+                f.close()
         if num_forced > 0:
             warnings.warn("Non-string input forced to string {} time(s).".format(num_forced))
-        if fname is not None:
-            f.close()
+        if fname is None:
+            return f.getvalue()
+        if f is fname:
+            out = "Data written to {}".format(getattr(fname, "name", fname))
+        else:
             out = "Data written to {} in {}".format(fname, os.getcwd())
-        print(out)
+        logger.info(out)
         return out
 
     def vector(self, tag):
@@ -611,16 +866,116 @@ class Log(object):
         > Returns a list of values (usually strings or numbers).
 
         """
-        v = []
-        for record in self.collection:
-            if tag in self.collection[record].keys():
-                value = self.collection[record][tag]
+        return list(self.iter_vector(tag))
+
+    def iter_vector(self, tag):
+        """
+        Yields the (keyless) values of a certain tag in the Log collection, in the same order as `vector`, without
+        building a list.
+
+        **Parameters** :
+
+        > *tag* : `string`
+
+        >> A collection tag. See subclass documentation for subclass-specific tags.
+
+        **Return** : `generator`
+
+        > A generator of values. The items of list values are yielded one by one.
+
+        """
+        for value in self._iter_column(tag):
+            if value is not MISSING:
                 if type(value) is list:
                     for i in value:
-                        v.append(i)
+                        yield i
                 else:
-                    v.append(value)
-        return v
+                    yield value
+
+    def top(self, tag, n=10, capacity=None):
+        """
+        Finds the most frequent values of a certain tag in the Log collection (e.g. the most active authors, or the
+        most often changed files). If the nth most frequent value is in a tie, all of the tied values are returned.
+
+        **Parameters** :
+
+        > *tag* : `string`
+
+        >> A collection tag. See subclass documentation for subclass-specific tags.
+
+        > *n* : `int`
+
+        >> The number of values to return. Defaults to 10.
+
+        > *capacity* : `int`
+
+        >> If given, the values are counted approximately with a `gitnet.summary.SpaceSaving` summary of this many
+        >> values, instead of keeping a count for every distinct value. Defaults to None, for exact counts.
+
+        **Return** : `list`
+
+        > A list of (count, value) tuples, from the most to the least frequent. The items of list values are counted
+        > individually.
+
+        """
+        if capacity is None:
+            return top_k(self.value_counts(tag), n)
+        summary = SpaceSaving(capacity)
+        summary.extend(self.iter_vector(tag))
+        return summary.top(n)
+
+    def unique(self, tag):
+        """
+        Finds the distinct values of a certain tag in the Log collection (e.g. the distinct authors or files).
+
+        **Parameters** :
+
+        > *tag* : `string`
+
+        >> A collection tag. See subclass documentation for subclass-specific tags.
+
+        **Return** : `set`
+
+        > A set of the values of the tag. The items of list values are counted individually.
+
+        """
+        return set(self.iter_vector(tag))
+
+    def value_counts(self, tag):
+        """
+        Counts the occurrences of each value of a certain tag in the Log collection (e.g. the number of commits by each
+        author, or the number of commits changing each file).
+
+        **Parameters** :
+
+        > *tag* : `string`
+
+        >> A collection tag. See subclass documentation for subclass-specific tags.
+
+        **Return** : `Counter`
+
+        > A `collections.Counter` mapping each value to its number of occurrences. The items of list values are counted
+        > individually. Use `most_common(n)` for the most frequent values.
+
+        """
+        return Counter(self.iter_vector(tag))
+
+    def _column(self, tag):
+        """
+        Returns the values of a tag for every record, in the order of the collection, with `gitnet.storage.MISSING`
+        for records without the tag. Memory-mapped collections read only the column for the tag.
+        """
+        if isinstance(self.collection, StoredCollection):
+            return self.collection.column(tag)
+        return [record.get(tag, MISSING) for record in self.collection.values()]
+
+    def _iter_column(self, tag):
+        """
+        Yields the values of a tag for every record, as `_column` does, without building a list.
+        """
+        if isinstance(self.collection, StoredCollection):
+            return self.collection.iter_column(tag)
+        return (record.get(tag, MISSING) for record in self.collection.values())
 
 # Network Generation and node and edge writing features, follow a second alpha-ordering.
 
@@ -661,8 +1016,14 @@ class Log(object):
         >> Computes edges between authors and files based on the number of lines changed in the corresponding changes (weight is 6 for `README.md | 6 +++---`).
 
         """
-        for record in self.collection:
-            cur = self.collection[record]
+        # Stores which can join the two modes themselves stream the edges directly.
+        if isinstance(self.collection, StoredCollection):
+            edges = self.collection.edges(mode1, mode2, helper, edge_attributes)
+            if edges is not None:
+                for edge in edges:
+                    yield edge
+                return
+        for cur in self.collection.values():
             if mode1 in cur.keys() and mode2 in cur.keys():
                 # Set up mode one data for this record
                 m1 = cur[mode1]
@@ -677,8 +1038,10 @@ class Log(object):
                     for item2 in m2:
                         yield helper(item1, item2, cur, edge_attributes)
 
+    @instrumented("Log.generate_network", records=lambda result, args: result.number_of_edges())
     def generate_network(self, mode1, mode2, colours=None, edge_helper=net_edges_simple, edge_attributes=[], mode1_atom_attrs=[],
-                         mode2_atom_attrs=[], mode1_vector_attrs=[], mode2_vector_attrs=[]):
+                         mode2_atom_attrs=[], mode1_vector_attrs=[], mode2_vector_attrs=[], integer_ids=False,
+                         progress=None):
         """
         An abstract network generator. For networks that contain authors, any authors that made
         pull requests will not be transferred from the log.
@@ -725,6 +1088,12 @@ class Log(object):
 
         >> The tag names of attributes to be saved repeatedly for each node of mode2.
 
+        > *integer_ids* : `bool`
+
+        >> If True, nodes are keyed by dense integers (0 to n-1) instead of their id strings, and the string values of
+        >> node and edge attributes are interned. The id of each node is kept in the graph's `labels` table (and in its "id"
+        >> attribute), and is restored when the network is written to file. Recommended for very large networks.
+
         **Return**
 
         > A `MultiGraphPlus` object, which inherits from the NetworkX MultiGraph class.
@@ -745,19 +1114,36 @@ class Log(object):
 
         >> corresponding changes string (for example, the weight is 6 for `README.md | 6 +++---`).
 
+        > *progress* : `None` or `function`
+
+        >> A function called as `progress("generate_network", count)` after every 10000 edges added, and with the
+        >> final count at the end. See `gitnet.instrument.tracked`.
+
         """
         graph = MultiGraphPlus()
         graph.mode1 = mode1
         graph.mode2 = mode2
         # Make the nodes and add them to the MultiGraphPlus
-        nodes = self.generate_nodes(mode1, mode2, keep_atom1=mode1_atom_attrs, keep_vector1=mode1_vector_attrs,
-                                    keep_atom2=mode2_atom_attrs, keep_vector2=mode2_vector_attrs)
-        for node in nodes:
-            graph.add_node(node[0], node[1])
+        nodes = self._node_dict(mode1, mode2, keep_atom1=mode1_atom_attrs, keep_vector1=mode1_vector_attrs,
+                                keep_atom2=mode2_atom_attrs, keep_vector2=mode2_vector_attrs)
+        if integer_ids:
+            # Nodes are numbered in insertion order, and their ids are recorded in the label table.
+            index = {}
+            graph.labels = []
+            for n in nodes:
+                index[n] = len(graph.labels)
+                graph.labels.append(sys.intern(n) if type(n) is str else n)
+                graph.add_node(index[n], intern_attrs(nodes[n]))
+        else:
+            for n in nodes:
+                graph.add_node(n, nodes[n])
         # Make the edges and add them to the MultiGraphPlus
         edges = self.generate_edges(mode1, mode2, helper=edge_helper, edge_attributes=edge_attributes)
-        for edge in edges:
-            graph.add_edges_from([(edge[0], edge[1], edge[2])])
+        edges = tracked(edges, progress, "generate_network", every=10000)
+        if integer_ids:
+            # Edge attribute values (authors, hashes, dates) repeat across many edges, so they are interned too.
+            edges = ((index[u], index[v], intern_attrs(data)) for u, v, data in edges)
+        graph.add_edges_from(edges)
         if colours != None:
             if colours == 'simple':
                 for n in graph.nodes():
@@ -781,7 +1167,8 @@ class Log(object):
                             graph.node[n]["colour"] = "plum"
                         else:
                             graph.node[n]['colour'] = 'lightgrey'
-        print('Created a MultiGraphPlus network object with {} nodes and {} edges.'.format(graph.number_of_nodes(), graph.number_of_edges()))
+        logger.info("Created a MultiGraphPlus network object with %d nodes and %d edges.", graph.number_of_nodes(),
+                    graph.number_of_edges())
         return graph
 
     def generate_nodes(self, mode1, mode2, keep_atom1=[], keep_vector1=[], keep_atom2=[], keep_vector2=[]):
@@ -828,10 +1215,25 @@ class Log(object):
         > `atom_tag_1: "atom_value_1", ..., atom_tag_n: "atom_value_n",`
         > `vector_tag_1: [value_1_1, ..., value_1_m], ..., vector_tag_n: [value_n_1, ..., value_n_m])`
 
+        """
+        nodes = self._node_dict(mode1, mode2, keep_atom1, keep_vector1, keep_atom2, keep_vector2)
+        node_tuple_list = []
+        for n in nodes:
+            node_tuple_list.append((n,nodes[n]))
+        return node_tuple_list
+
+    def _node_dict(self, mode1, mode2, keep_atom1=[], keep_vector1=[], keep_atom2=[], keep_vector2=[]):
+        """
+        Builds the node attribute dictionaries used by `generate_nodes` and `write_nodes`, keyed by node id. See
+        `generate_nodes` for parameter details.
+
+        **Return** : `dict`
+
+        > A dictionary of dictionaries, i.e. {"node_id": {attribute_dictionary}}.
+
         """
         nodes = {}
-        for record in self.collection:
-            cur = self.collection[record]
+        for record, cur in self.collection.items():
             if mode1 in cur.keys() and mode2 in cur.keys():
                 # Set up mode one data for this record
                 m1 = cur[mode1]
@@ -879,11 +1281,9 @@ class Log(object):
                                 nodes[item2][tag] = [cur[tag]]
         if len(nodes) is 0:
             warnings.warn("Dictionary of node attributes is empty. Check that mode1 and mode2 names are valid tags.")
-        node_tuple_list = []
-        for n in nodes:
-            node_tuple_list.append((n,nodes[n]))
-        return node_tuple_list
+        return nodes
 
+    @instrumented("Log.write_edges", records=lambda result, args: len(args[0]))
     def write_edges(self, fname, mode1, mode2, helper=net_edges_simple, edge_attribute=['weight', 'date']):
         """
         Writes an edge list with attributes.
@@ -892,7 +1292,8 @@ class Log(object):
 
         > *fname* : `string`
 
-        >> A string indicating the path or file name to write to.
+        >> A string indicating the path or file name to write to. File names which end in `.gz`, `.bz2` or `.xz` will be
+        >> compressed. Values containing commas, quotes or newlines are quoted following CSV conventions.
 
         > *mode1* : `string`
 
@@ -929,35 +1330,33 @@ class Log(object):
         >> corresponding changes string (for example, the weight is 6 for `README.md | 6 +++---`).
 
         """
-        f = open(fname, "w", encoding="utf-8")
-        # Define attributes
-        attrs = ["id1", "id2"] + edge_attribute # Writes header
-        # Write header
-        cur = len(attrs)
-        for colname in attrs:
-            f.write(colname)
-            if cur > 1:
-                f.write(",")
-                cur -= 1
-            else:
-                f.write("\n")
-        # Write IDHash1,IDHash2,weight,month-day-year
-        for edge in self.generate_edges(mode1, mode2, helper, edge_attribute):
-            f.write("{},{}".format(edge[0], edge[1])) # Writes edges
+        # Git date strings repeat for every edge in a commit, so each one is only parsed once.
+        date_cache = {}
+
+        def edge_row(edge):
+            row = [edge[0], edge[1]]
             for tag in edge_attribute:
                 if tag in edge[2].keys():
                     if tag == "date":
-                        date = datetime_git(edge[2]["date"]).date()
-                        f.write(",{}-{}-{}".format(date.month, date.day, date.year))
+                        git_date = edge[2]["date"]
+                        if git_date not in date_cache:
+                            date = datetime_git(git_date).date()
+                            date_cache[git_date] = "{}-{}-{}".format(date.month, date.day, date.year)
+                        row.append(date_cache[git_date])
                     else:
-                        f.write(",{}".format(edge[2][tag]))
+                        row.append(edge[2][tag])
                 else:
-                    f.write(",NA")
-            f.write("\n")
-        # Close file and print summary.
-        f.close()
-        print("Wrote edgelist with attributes to {} in {}.".format(fname, os.getcwd()))
+                    row.append("NA")
+            return row
+
+        with open_output(fname) as f:
+            writer = csv.writer(f, lineterminator="\n")
+            # Write header, then IDHash1,IDHash2,weight,month-day-year
+            writer.writerow(["id1", "id2"] + edge_attribute)
+            writer.writerows(map(edge_row, self.generate_edges(mode1, mode2, helper, edge_attribute)))
+        logger.info("Wrote edgelist with attributes to %s in %s.", fname, os.getcwd())
 
+    @instrumented("Log.write_nodes", records=lambda result, args: len(args[0]))
     def write_nodes(self, fname, mode1, mode2, keep_atom1=[], keep_vector1=[], keep_atom2=[], keep_vector2=[]):
         """
         Writes a list of nodes with attributes.
@@ -966,7 +1365,8 @@ class Log(object):
 
         > *fname* : `string`
 
-        >> A string indicating the path or file name to write to.
+        >> A string indicating the path or file name to write to. File names which end in `.gz`, `.bz2` or `.xz` will be
+        >> compressed. Values containing commas, quotes or newlines are quoted following CSV conventions.
 
         > *mode1* : `string`
 
@@ -995,42 +1395,28 @@ class Log(object):
         **Return** : `None`
 
         """
-        f = open(fname, "w", encoding="utf-8")
         # Define attributes
         attrs = ["hashid", "id", "type"] + keep_atom1 + keep_vector1 + keep_atom2 + keep_vector2
-        # Write header
-        cur = len(attrs)
-        for colname in attrs:
-            f.write(colname)
-            if cur > 1:
-                f.write(",")
-                cur -= 1
-            else:
-                f.write("\n")
-        # Write IDHash, Name, type, ... [data]
-        for node, values in self.generate_nodes(mode1, mode2, keep_atom1, keep_vector1, keep_atom2, keep_vector2):
+
+        def node_row(item):
+            node, values = item
             values["hashid"] = hash(node)
-            ncur = len(attrs)
+            row = []
             for tag in attrs:
                 if tag in values.keys():
                     val = values[tag]
-                    if type(val) is int or type(val) is str:
-                        f.write(str(val))
                     if type(val) is list:
-                        valstring = ""
-                        vcur = len(val)
-                        for i in val:
-                            valstring += str(i)
-                            if vcur > 1:
-                                valstring += ";"
-                            vcur -= 1
-                        f.write(valstring)
-                else:
-                    f.write("NA")
-                if ncur > 1:
-                    f.write(",")
-                    ncur -= 1
+                        row.append(list_to_scd(val))
+                    else:
+                        row.append(val)
                 else:
-                    f.write("\n")
-        f.close()
-        print("Wrote node attributes to {} in {}.".format(fname, os.getcwd()))
+                    row.append("NA")
+            return row
+
+        nodes = self._node_dict(mode1, mode2, keep_atom1, keep_vector1, keep_atom2, keep_vector2)
+        with open_output(fname) as f:
+            writer = csv.writer(f, lineterminator="\n")
+            # Write header, then IDHash, Name, type, ... [data]
+            writer.writerow(attrs)
+            writer.writerows(map(node_row, nodes.items()))
+        logger.info("Wrote node attributes to %s in %s.", fname, os.getcwd())
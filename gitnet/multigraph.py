@@ -15,17 +15,23 @@
 # *********************************************************************************************
 
 import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 import os
+import random
+import logging
 import warnings
 import copy
-from gitnet.exceptions import MergeError
-from gitnet.helpers import list_to_scd
-from gitnet.helpers import datetime_git
-from networkx.drawing.nx_agraph import graphviz_layout
+from xml.sax.saxutils import escape, quoteattr
+from gitnet.exceptions import MergeError, InputError
+from gitnet.helpers import list_to_scd, resolve_aliases, sample_betweenness, sample_transitivity
+from gitnet.helpers import datetime_git, open_output
+from gitnet.layout import force_layout, edge_density
+from gitnet import storage
+from gitnet.instrument import instrumented
 from networkx.algorithms import bipartite
 
+logger = logging.getLogger(__name__)
+
 
 class MultiGraphPlus(nx.MultiGraph):
 
@@ -33,7 +39,11 @@ class MultiGraphPlus(nx.MultiGraph):
 
     mode2 = ""
 
-    def collapse_edges(self, sum_weights=False):
+    labels = None
+
+    _stats = None
+
+    def collapse_edges(self, sum_weights=False, reducers={}):
         """
         Collapses all edges which share nodes into one edge, with a new weight assigned to it. How this weight is
         assigned depends on the `sum_weights` parameter.
@@ -46,10 +56,18 @@ class MultiGraphPlus(nx.MultiGraph):
         >> If False, the weight will be the number of edges which were collapsed. If True, the weight will be the sum of
         >> the weights of collapsed edges.
 
+        > *reducers* : `dict`
+
+        >> An optional dictionary mapping edge attribute names to reducers, which combine the values of that attribute
+        >> across collapsed edges (list attributes contribute each of their items). A reducer is either a function
+        >> which takes a list of values, or one of the built-in strings: "sum", "count", "min", "max", "first",
+        >> "last", "min_date" and "max_date" (which compare git date strings by time). Attributes without a reducer
+        >> keep all of their values in a list. The weight attribute is always computed as described above.
+
         **Return** :
 
         > A new MultiGraphPlus object, which has collapsed all duplicate edges, assigned a new weight, and
-        > stores other edge data in lists.
+        > stores other edge data in lists (or reduced values).
 
         **Note** :
 
@@ -57,53 +75,106 @@ class MultiGraphPlus(nx.MultiGraph):
         > weight attribute, this method assumes the weight of the edge is 1.
 
         """
-        gnew = MultiGraphPlus()
-        for n1, n2, data in self.edges(data=True):
-            if gnew.has_edge(n1, n2):
-                gnew_data = gnew.edge[n1][n2][0]
-                if 'weight' not in data:
-                    gnew_data['weight'] += 1
-                for k in data:
-                    if k in gnew_data:
-                        if k == 'weight':
-                            if sum_weights:
-                                gnew_data[k] += data[k]
-                            else:
-                                gnew_data[k] += 1
-                        elif isinstance(data[k], list):
-                            gnew_data[k] += data[k]
-                        else:
-                            if isinstance(gnew_data[k], list):
-                                gnew_data[k] += [data[k]]
-                            else:
-                                gnew_data[k] = [gnew_data[k], data[k]]
-                    else:
-                        gnew_data[k] = data[k]
+        reducer_reference = {"sum": sum,
+                             "count": len,
+                             "min": min,
+                             "max": max,
+                             "first": lambda vals: vals[0],
+                             "last": lambda vals: vals[-1],
+                             "min_date": lambda vals: min(vals, key=date_key),
+                             "max_date": lambda vals: max(vals, key=date_key)}
+        date_cache = {}
+
+        def date_key(v):
+            if type(v) is not str:
+                return v
+            if v not in date_cache:
+                date_cache[v] = datetime_git(v)
+            return date_cache[v]
+
+        use_reducers = {}
+        for k in reducers:
+            if callable(reducers[k]):
+                use_reducers[k] = reducers[k]
+            elif reducers[k] in reducer_reference:
+                use_reducers[k] = reducer_reference[reducers[k]]
+            else:
+                raise InputError("{} is not a valid reducer for the attribute {}.".format(reducers[k], k))
+        # Group edges by node pair in one pass. Each group holds a weight and the values seen for each attribute.
+        groups = {}
+        for n1, n2, data in self.edges_iter(data=True):
+            if (n1, n2) in groups:
+                group = groups[(n1, n2)]
+            elif (n2, n1) in groups:
+                group = groups[(n2, n1)]
             else:
-                edge_attr = {'weight': 1}
-                for k in data:
-                    if k == 'weight':
-                        if sum_weights:
-                            edge_attr[k] = data[k]
-                    elif isinstance(data[k], list):
-                        edge_attr[k] = data[k]
+                group = groups[(n1, n2)] = [0, {}]
+            if sum_weights:
+                group[0] += data.get('weight', 1)
+            else:
+                group[0] += 1
+            values = group[1]
+            for k in data:
+                if k != 'weight':
+                    if k in values:
+                        values[k].append(data[k])
                     else:
-                        edge_attr[k] = data[k]
-                gnew.add_edge(n1, n2, attr_dict=edge_attr)
+                        values[k] = [data[k]]
+
+        def collapsed(group):
+            edge_attr = {'weight': group[0]}
+            for k, vals in group[1].items():
+                if len(vals) == 1 and k not in use_reducers:
+                    # Attributes seen once keep their original form.
+                    v = vals[0]
+                    edge_attr[k] = list(v) if isinstance(v, list) else v
+                    continue
+                flat = []
+                for v in vals:
+                    if isinstance(v, list):
+                        flat.extend(v)
+                    else:
+                        flat.append(v)
+                if k in use_reducers:
+                    edge_attr[k] = use_reducers[k](flat)
+                else:
+                    edge_attr[k] = flat
+            return edge_attr
+
+        gnew = MultiGraphPlus()
+        gnew.mode1 = self.mode1
+        gnew.mode2 = self.mode2
+        gnew.labels = self.labels
+        gnew.add_nodes_from(self.nodes_iter(data=True))
+        gnew.add_edges_from((n1, n2, collapsed(group)) for (n1, n2), group in groups.items())
         return gnew
 
-    def describe(self, extra=False):
+    def describe(self, extra=False, samples=100, seed=None):
         """
         Provides a summary of graph statistics. Includes basic statistics like the number of nodes, edges,
         denstiy, and the average degree for one mode. Prints a string that contains each of the items that make up the summary.
-        Density is calculated using one of the modes of the original bipartite network graph.
+        Density is calculated using one of the modes of the original bipartite network graph. Node modes and degrees
+        are cached on the graph, so repeated calls only recompute them after the graph has been modified.
+        Mean degree and betweenness centrality are averaged over the nodes of each mode separately. Earlier versions
+        reported the mean over every node for both modes, so the betweenness figures differ from theirs (mean degree
+        centrality is the same either way, as it equals the density).
 
         **Parameters** :
 
-        > *extra* : `bool`
+        > *extra* : `bool` or `str`
 
         >> Runs the low efficiency algorithms, which can be resource-intensive on large networks.
         >> Recommended maximum network size for the low efficiency algorithms is around 100 nodes.
+        >> If "approx", betweenness centrality and transitivity are instead estimated by sampling, and reported with
+        >> 95% confidence intervals. The cost of the estimates is governed by `samples`, not by the size of the graph.
+
+        > *samples* : `int`
+
+        >> The number of source nodes (for betweenness) and wedges (for transitivity) sampled when `extra` is "approx".
+
+        > *seed* : `int`
+
+        >> An optional seed for the random sampling used when `extra` is "approx".
 
         **Returns** : `string`
 
@@ -112,15 +183,16 @@ class MultiGraphPlus(nx.MultiGraph):
         """
         mode1 = self.mode1
         mode2 = self.mode2
-        density = bipartite.density(self, bipartite.sets(self)[0])
+        stats = self._mode_stats()
+        in_mode1 = stats["mode"] == 1
+        in_mode2 = stats["mode"] == 2
+        nodes_mode1 = int(np.count_nonzero(in_mode1))
+        nodes_mode2 = int(np.count_nonzero(in_mode2))
         edges = self.number_of_edges()
-        nodes_mode1 = 0
-        nodes_mode2 = 0
-        for n in self.nodes():
-            if self.node[n]['type'] == mode1:
-                nodes_mode1 += 1
-            elif self.node[n]['type'] == mode2:
-                nodes_mode2 += 1
+        if nodes_mode1 * nodes_mode2 == 0:
+            density = 0.0
+        else:
+            density = edges / (nodes_mode1 * nodes_mode2)
 
         descriptives_nodes = "This is a bipartite network of types '{}' and '{}'.\n " \
                              "{} nodes are of the type '{}'.\n " \
@@ -131,23 +203,26 @@ class MultiGraphPlus(nx.MultiGraph):
         descriptives = descriptives_nodes + descriptives_edges + descriptives_density
 
         if extra:
-            # Note: for each mode of the bipartite graph, degree and betweenness centrality are the same.
-            # Keeping them both makes it easy to compare them and make sure they are the same.
-            degree_mode1 = bipartite.degree_centrality(self, bipartite.sets(self)[0])
-            degree_mode2 = bipartite.degree_centrality(self, bipartite.sets(self)[1])
-            degree_mode1 = list(degree_mode1.values())
-            degree_mode2 = list(degree_mode2.values())
-            degree_mode1 = np.mean(degree_mode1)
-            degree_mode2 = np.mean(degree_mode2)
-            betweenness_mode1 = bipartite.betweenness_centrality(self, bipartite.sets(self)[0])
-            betweenness_mode1 = list(betweenness_mode1.values())
-            betweenness_mode1 = np.mean(betweenness_mode1)
-            betweenness_mode2 = bipartite.betweenness_centrality(self, bipartite.sets(self)[1])
-            betweenness_mode2 = list(betweenness_mode2.values())
-            betweenness_mode2 = np.mean(betweenness_mode2)
-            g = nx.Graph(self)
-            projection = bipartite.projected_graph(g, bipartite.sets(g)[0])
-            transitivity = nx.transitivity(projection)
+            # A node's bipartite degree centrality is its degree divided by the size of the opposite mode.
+            degrees = stats["degree"]
+            degree_mode1 = np.mean(degrees[in_mode1]) / nodes_mode2 if nodes_mode1 and nodes_mode2 else 0.0
+            degree_mode2 = np.mean(degrees[in_mode2]) / nodes_mode1 if nodes_mode1 and nodes_mode2 else 0.0
+            nodes = stats["nodes"]
+            top = [nodes[i] for i in np.flatnonzero(in_mode1)]
+            bottom = [nodes[i] for i in np.flatnonzero(in_mode2)]
+            if extra == "approx":
+                rng = random.Random(seed)
+                btwn1, btwn2 = sample_betweenness(self, top, samples, rng)
+                trans = sample_transitivity(self, top, samples, rng)
+                betweenness_mode1, betweenness_mode2, transitivity = [
+                    "{} (95% CI: {} to {})".format(str(est), str(max(est - half, 0.0)), str(min(est + half, 1.0)))
+                    for est, half in (btwn1, btwn2, trans)]
+            else:
+                betweenness = bipartite.betweenness_centrality(self, top)
+                betweenness_mode1 = np.mean([betweenness[n] for n in top]) if top else 0.0
+                betweenness_mode2 = np.mean([betweenness[n] for n in bottom]) if bottom else 0.0
+                projection = bipartite.projected_graph(nx.Graph(self), top)
+                transitivity = nx.transitivity(projection)
             descriptives_transitivity = "Transitivity: {}.\n".format(str(transitivity))
             descriptives_degree_centrality = "Mean Degree Centrality for '{}': {}.\n" \
                                              "Mean Degree Centrality for '{}': {}.\n".format(str(mode1),
@@ -164,6 +239,134 @@ class MultiGraphPlus(nx.MultiGraph):
         print(descriptives)
         return descriptives
 
+    def _mode_stats(self):
+        """
+        Returns the cached node list, mode array (1 for `mode1`, 2 for `mode2`) and degree array of the graph,
+        building them in one pass over the nodes if the graph has changed since they were last computed.
+        Nodes are assigned to modes by their 'type' attribute; if the graph has no recognisable modes, the two
+        sides of a bipartite colouring are used instead.
+        """
+        if self._stats is None:
+            nodes = []
+            degrees = []
+            for n, d in self.degree_iter():
+                nodes.append(n)
+                degrees.append(d)
+            modes = {self.mode1: 1, self.mode2: 2} if self.mode1 != self.mode2 else {}
+            mode = np.fromiter((modes.get(self.node[n].get('type'), 0) for n in nodes), dtype=np.int8,
+                               count=len(nodes))
+            if len(nodes) > 0 and not (np.any(mode == 1) and np.any(mode == 2)):
+                top = bipartite.sets(self)[0]
+                mode = np.fromiter((1 if n in top else 2 for n in nodes), dtype=np.int8, count=len(nodes))
+            self._stats = {"nodes": nodes,
+                           "mode": mode,
+                           "degree": np.array(degrees, dtype=np.int64)}
+        return self._stats
+
+    def clear_cache(self):
+        """
+        Discards the cached mode partition and degree arrays used by `describe`. Adding or removing nodes and edges
+        does this automatically; call it after changing node 'type' attributes, or `mode1` and `mode2`, by hand.
+        """
+        self._stats = None
+
+    def add_node(self, n, attr_dict=None, **attr):
+        self._stats = None
+        super().add_node(n, attr_dict=attr_dict, **attr)
+
+    def add_nodes_from(self, nodes, **attr):
+        self._stats = None
+        super().add_nodes_from(nodes, **attr)
+
+    def remove_node(self, n):
+        self._stats = None
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes):
+        self._stats = None
+        super().remove_nodes_from(nodes)
+
+    def add_edge(self, u, v, key=None, attr_dict=None, **attr):
+        self._stats = None
+        return super().add_edge(u, v, key=key, attr_dict=attr_dict, **attr)
+
+    def remove_edge(self, u, v, key=None):
+        self._stats = None
+        super().remove_edge(u, v, key=key)
+
+    def clear(self):
+        self._stats = None
+        super().clear()
+
+    def merge_nodes(self, mapping, show_warning=True):
+        """
+        Combines many pairs of nodes in a single pass. Each key of `mapping` is merged into its value, following the
+        same rules as `node_merge`: edges are moved to the remaining node, vector attributes are combined, and
+        conflicting atomic attributes keep the remaining node's value. Chains of aliases are resolved, so that
+        `{"a": "b", "b": "c"}` merges both "a" and "b" into "c".
+
+        **Parameters** :
+
+        > *mapping* : `dict`
+
+        >> A dictionary whose keys are the identifiers of nodes to be removed, and whose values are the identifiers
+        >> of the nodes they are merged into.
+
+        > *show_warning* : `bool`
+
+        >> A boolean parameter indicating whether overwrite warnings should be displayed.
+
+        **Return** : `MultiGraphPlus`
+
+        > A new MultiGraphPlus object, in which every alias node has been merged into its canonical node.
+
+        """
+        canonical = resolve_aliases(mapping)
+
+        # Check: every node exists, and merged nodes share a type.
+        for n in set(canonical) | set(canonical.values()):
+            if n not in self.node:
+                raise MergeError("{} is not a valid node".format(n))
+        for alias, root in canonical.items():
+            if 'type' in self.node[root] and 'type' in self.node[alias]:
+                if self.node[root]['type'] != self.node[alias]['type']:
+                    raise MergeError("{} and {}'s types do not match".format(root, alias))
+
+        def copy_attrs(d):
+            return {k: list(v) if isinstance(v, list) else v for k, v in d.items()}
+
+        merged_graph = MultiGraphPlus()
+        merged_graph.mode1 = self.mode1
+        merged_graph.mode2 = self.mode2
+        merged_graph.labels = self.labels
+        merged_graph.graph = copy_attrs(self.graph)
+        merged_graph.add_nodes_from((n, copy_attrs(d)) for n, d in self.nodes_iter(data=True) if n not in canonical)
+
+        # Adds each alias's attributes to its canonical node. There are three cases for this:
+            # 1. Vector attributes are joined to create one larger vector
+            # 2. Non-conflicting Atomic attributes are kept and preserved in the final node
+            # 3. Conflicting Atomic attributes are not added from the alias (canonical values persist)
+        for alias, root in canonical.items():
+            root_attrs = merged_graph.node[root]
+            node_merge_warn_list = []
+            for na, value in self.node[alias].items():
+                if na not in root_attrs:  # Deals with case 2
+                    root_attrs[na] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):  # Deals with case 1
+                    root_attrs[na] = root_attrs[na] + value
+                elif root_attrs[na] != value:
+                    node_merge_warn_list.append(na)
+            if len(node_merge_warn_list) > 0 and show_warning:
+                print("Note: nodes '{}' and '{}' have the following conflicting atomic attributes: {}. In these cases, "
+                      "'{}' attribute values have been retained, while '{}' values have been ignored. If you would "
+                      "rather retain '{}' attributes, set '{}' to node1 and '{}' to node2."
+                      .format(root, alias, node_merge_warn_list, root, alias, alias, alias, root))
+
+        # Moves every edge onto the canonical nodes, retaining all edge attributes.
+        merged_graph.add_edges_from((canonical.get(n1, n1), canonical.get(n2, n2), copy_attrs(data))
+                                    for n1, n2, data in self.edges_iter(data=True))
+        return merged_graph
+
     def node_merge(self, node1, node2, show_warning=True):
         """
         Combines node1 and node2. After merge, node1 will remain, while node2 will be removed. node2's edges will become
@@ -191,49 +394,38 @@ class MultiGraphPlus(nx.MultiGraph):
         > a new multigraphplus object which has merged nodes 1 and 2 together into node1, which will also have gained node2's edges.
 
         """
-        merged_graph = copy.deepcopy(self)
-
-        # Check: Both node1 and node2 exist in merged_graph
-        if node1 not in merged_graph.nodes():
+        # Check: Both node1 and node2 exist in the graph
+        if node1 not in self.nodes():
             raise MergeError(node1 + " is not a valid node")
-        if node2 not in merged_graph.nodes():
+        if node2 not in self.nodes():
             raise MergeError(node2 + " is not a valid node")
 
         # Check: node1 and node2's types are the same
-        if 'type' in merged_graph.node[node1] and 'type' in merged_graph.node[node2]:
-            if merged_graph.node[node1]['type'] != merged_graph.node[node2]['type']:
+        if 'type' in self.node[node1] and 'type' in self.node[node2]:
+            if self.node[node1]['type'] != self.node[node2]['type']:
                 raise MergeError("node1 and node2's types do not match")
 
-        # Moves all edges from node2 to node1
-        for e in merged_graph.edges(node2, data=True):
-            merged_graph.add_edge(node1, e[1], attr_dict=e[2])
-            merged_graph.remove_edge(e[0], e[1])
+        return self.merge_nodes({node2: node1}, show_warning=show_warning)
 
-        # Adds node2's attributes to node1. There are three cases for this:
-            # 1. Vector attributes are joined to create one larger vector
-            # 2. Non-conflicting Atomic attributes are kept and preserved in the final node
-            # 3. Conflicting Atomic attributes are not added from node2 (node1 values persist)
-        node_merge_warn = False
-        node_merge_warn_list = []
-
-        for na in merged_graph.node[node2]:
-            if na not in merged_graph.node[node1]:  # Deals with case 2
-                merged_graph.node[node1][na] = merged_graph.node[node2][na]
-            elif isinstance(merged_graph.node[node2][na], list):  # Deals with case 1
-                merged_graph.node[node1][na] = merged_graph.node[node1][na] + merged_graph.node[node2][na]
-            elif merged_graph.node[node1][na] != merged_graph.node[node2][na]:
-                node_merge_warn = True
-                node_merge_warn_list.append(na)
-
-        merged_graph.remove_node(node2)  # Removes node2
-
-        if node_merge_warn and show_warning:
-            print("Note: nodes '{}' and '{}' have the following conflicting atomic attributes: {}. In these cases, "
-                  "'{}' attribute values have been retained, while '{}' values have been ignored. If you would rather "
-                  "retain '{}' attributes, set '{}' to node1 and '{}' to node2."
-                  .format(node1, node2, node_merge_warn_list, node1, node2, node2, node2, node1))
+    def label(self, n):
+        """
+        Produces the original id of a node. For networks generated with `integer_ids=True`, nodes are keyed by
+        integers, whose ids are stored in the `labels` table. Otherwise, nodes are already keyed by their ids.
 
-        return merged_graph
+        **Parameters** :
+
+        > *n* : `any`
+
+        >> A node in the network.
+
+        **Return** : `any`
+
+        > The id of node `n`.
+
+        """
+        if self.labels is None:
+            return n
+        return self.labels[n]
 
     def node_attributes(self, name, helper):
         """
@@ -259,7 +451,52 @@ class MultiGraphPlus(nx.MultiGraph):
             self_copy.node[n][name] = helper(self_copy.node[n])
         return self_copy
 
-    def quickplot(self, fname, k="4/sqrt(n)", iterations=50, layout="neato", size=20, default_colour="lightgrey"):
+    def layout(self, iterations=50, coarsen=False, pos=None, seed=None):
+        """
+        Computes a force directed layout of the network using gitnet's built in Barnes-Hut layout engine, and stores
+        each node's position in its 'x' and 'y' attributes.
+
+        **Parameters** :
+
+        > *iterations* : `int`
+
+        >> The number of layout iterations to run (at each level of coarsening, if `coarsen` is True).
+
+        > *coarsen* : `bool`
+
+        >> If True, a multilevel layout is computed by repeatedly merging neighbouring nodes. Recommended for networks
+        >> with more than a few thousand nodes.
+
+        > *pos* : `dict`
+
+        >> An optional dictionary of starting positions, keyed by node. Defaults to the positions stored in the nodes'
+        >> 'x' and 'y' attributes. Pass an empty dictionary to compute a new layout from scratch.
+
+        > *seed* : `int`
+
+        >> An optional seed for the random initial positions.
+
+        **Return** : `dict`
+
+        > A dictionary mapping each node to an (x, y) tuple.
+
+        **Note** :
+
+        > Because positions are stored as node attributes, they are kept by copies and subgraphs of the network, and
+        > written by `write_graphml`. When every node already has a position, the stored layout is reused as is; when
+        > only some do (for instance, after new nodes have been added), the layout is refined from the stored positions.
+
+        """
+        if pos is None:
+            pos = {n: (d['x'], d['y']) for n, d in self.nodes_iter(data=True) if 'x' in d and 'y' in d}
+        positions = force_layout(self, iterations=iterations, pos=pos, coarsen=coarsen, seed=seed)
+        for n, (x, y) in positions.items():
+            self.node[n]['x'] = float(x)
+            self.node[n]['y'] = float(y)
+        return positions
+
+    def quickplot(self, fname, k="4/sqrt(n)", iterations=50, layout="neato", size=20, default_colour="lightgrey",
+                  coarsen=False, renderer="networkx", resolution=1000):
         """
         Makes a quick visualization of the network.
 
@@ -279,7 +516,10 @@ class MultiGraphPlus(nx.MultiGraph):
 
         > *layout* : `string`
 
-        >> The type of layout to draw, the available layouts are: ("spring", "circular", "shell", "spectral", or "random").
+        >> The type of layout to draw, the available layouts are: ("spring", "circular", "shell", "spectral", "random",
+        >> "force", or the Graphviz layouts "dot", "neato", "fdp" and "circo"). The "force" layout uses the built in
+        >> layout engine (see `MultiGraphPlus.layout`), which scales to large networks and reuses stored node positions.
+        >> It does not store the positions it computes; call `layout` first to keep a layout for later plots.
 
         > *size* : `int`
 
@@ -289,16 +529,33 @@ class MultiGraphPlus(nx.MultiGraph):
 
         >> Only default nodes will be coloured with this colour.
 
+        > *coarsen* : `bool`
+
+        >> Whether the "force" layout should use multilevel coarsening.
+
+        > *renderer* : `string`
+
+        >> How the network is drawn. "networkx" (the default) uses `networkx.draw`. "fast" draws all edges as a single
+        >> line collection and all nodes as a single scatter plot, which is much faster for large networks. "density"
+        >> draws edges as a raster image of how many edges cross each pixel, which keeps very dense networks readable.
+
+        > *resolution* : `int`
+
+        >> The width, in pixels, of the edge raster drawn by the "density" renderer.
+
         **Return** : `None`
 
         """
 
+        if renderer not in ["networkx", "fast", "density"]:
+            raise InputError("{} is not a valid renderer.".format(renderer))
+        # Plotting libraries are imported on first use, so that importing gitnet does not load them.
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
         if type(k) is str:
             k = 4/np.sqrt(self.number_of_nodes())
-        # Make a copy
-        copy_net = copy.deepcopy(self)
-        # Remove isolates
-        copy_net.remove_nodes_from(nx.isolates(copy_net))
+        # Make a view without isolates. Node attribute dictionaries are shared with the original network.
+        copy_net = self.subgraph([n for n, d in self.degree_iter() if d > 0])
         # Add detect colour attribute
         colour_data = {}
         for n in copy_net.nodes():
@@ -309,63 +566,64 @@ class MultiGraphPlus(nx.MultiGraph):
             else:
                 colour_data[n] = default_colour
         colour_list = [colour_data[node] for node in copy_net.nodes()]
-        # Plot the network
-        print("Plotting...")
+        # Compute the layout
+        logger.info("Plotting...")
         if layout in ["dot", "neato", "fdp", "circo"]:
-            nx.draw(copy_net,
-                pos=graphviz_layout(copy_net, prog=layout),
-                node_size=size,
-                font_size=5,
-                node_color=colour_list,
-                linewidths=.5,
-                edge_color="DarkGray",
-                width=.1)
-        if layout == "spring":
-            nx.draw(copy_net,
-                pos=nx.spring_layout(copy_net, k=k, iterations=iterations),
-                node_size=size,
-                font_size=5,
-                node_color=colour_list,
-                linewidths=.5,
-                edge_color="DarkGray",
-                width=.1)
+            from networkx.drawing.nx_agraph import graphviz_layout
+            pos = graphviz_layout(copy_net, prog=layout)
+        elif layout == "force":
+            # Stored positions are read, but the plot's layout is not written back into the network's nodes.
+            stored = {n: (d['x'], d['y']) for n, d in copy_net.nodes_iter(data=True) if 'x' in d and 'y' in d}
+            pos = force_layout(copy_net, iterations=iterations, pos=stored, coarsen=coarsen)
+        elif layout == "spring":
+            pos = nx.spring_layout(copy_net, k=k, iterations=iterations)
         elif layout == "circular":
-            nx.draw_circular(copy_net,
-                node_size=size,
-                font_size=5,
-                node_color=colour_list,
-                linewidths=.5,
-                edge_color="DarkGray",
-                width=.1)
+            pos = nx.circular_layout(copy_net)
         elif layout == "shell":
-            nx.draw_shell(copy_net,
-                node_size=size,
-                font_size=5,
-                node_color=colour_list,
-                linewidths=.5,
-                edge_color="DarkGray",
-                width=.1)
+            pos = nx.shell_layout(copy_net)
         elif layout == "spectral":
-            nx.draw_spectral(copy_net,
-                node_size=size,
-                font_size=5,
-                node_color=colour_list,
-                linewidths=.5,
-                edge_color="DarkGray",
-                width=.1)
+            pos = nx.spectral_layout(copy_net)
         elif layout == "random":
-            nx.draw_random(copy_net,
-                node_size=size,
-                font_size=5,
-                node_color=colour_list,
-                linewidths=.5,
-                edge_color="DarkGray",
-                width=.1)
+            pos = nx.random_layout(copy_net)
+        else:
+            pos = None
+        # Plot the network
+        if pos is not None:
+            if renderer == "networkx":
+                nx.draw(copy_net,
+                    pos=pos,
+                    node_size=size,
+                    font_size=5,
+                    node_color=colour_list,
+                    linewidths=.5,
+                    edge_color="DarkGray",
+                    width=.1)
+            else:
+                nodes = copy_net.nodes()
+                index = {n: i for i, n in enumerate(nodes)}
+                xy = np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+                ends = np.fromiter((index[n] for e in copy_net.edges_iter() for n in e), dtype=np.int64)
+                src = ends[0::2]
+                dst = ends[1::2]
+                ax = plt.gca()
+                if renderer == "fast":
+                    ax.add_collection(LineCollection(np.stack([xy[src], xy[dst]], axis=1),
+                                                     colors="DarkGray",
+                                                     linewidths=.1))
+                else:
+                    image, extent = edge_density(xy[src], xy[dst], resolution)
+                    ax.imshow(np.log1p(image), origin="lower", extent=extent, cmap="Greys",
+                              interpolation="nearest", aspect="auto")
+                ax.scatter(xy[:, 0], xy[:, 1], s=size, c=colour_list, linewidths=.5, zorder=2)
+                ax.autoscale_view()
+                ax.set_axis_off()
         # Save figure if applicable
         if fname is not None:
-            plt.savefig(fname, bbox_inches="tight")
-            print("Wrote file: {} to {}".format(fname, os.getcwd()))
+            # Saving through the figure avoids the extra redraw which pyplot.savefig triggers afterwards.
+            plt.gcf().savefig(fname, bbox_inches="tight")
+            logger.info("Wrote file: %s to %s", fname, os.getcwd())
 
+    @instrumented("MultiGraphPlus.write_graphml", records=lambda result, args: args[0].number_of_edges())
     def write_graphml(self, fname):
         """
         Converts a `MultiGraphPlus` object to a graphml file.
@@ -374,43 +632,109 @@ class MultiGraphPlus(nx.MultiGraph):
 
         > *fname* :
 
-        >> A string indicating the path or file name to write to. File names which end in `.gz` or `.bz2` will be compressed.
+        >> A string indicating the path or file name to write to. File names which end in `.gz`, `.bz2` or `.xz` will be compressed.
 
         **Return** : `None`
 
         > This method will have the side effect of creating a file, specified by fpath.
+        > Networks keyed by integer ids are written using the original node ids from `self.labels`.
         > This method cannot use vector attributes within the graphml file. Instead, vector attributes are converted into
         > a semicolon-delimited string. When this occurs, a warning is raised indicating the vector attributes (node
         > attributes are preceded by 'n:' while edge attributes are preceded by 'e:').
+        > The file is written as a stream, one node or edge at a time, so memory use does not grow with the size of the
+        > network. Attributes whose value is None are omitted.
 
         """
 
-        graph = copy.deepcopy(self)
+        labels = self.labels
+        node_defaults = self.graph.get('node_default', {})
+        edge_defaults = self.graph.get('edge_default', {})
+        graph_data = {k: v for k, v in self.graph.items() if k not in ['node_default', 'edge_default', 'id']}
+
+        def xml_value(v):
+            # Returns the GraphML type and text of an attribute value, converting vector attributes on the fly.
+            if isinstance(v, list):
+                return "string", list_to_scd(v)
+            elif isinstance(v, (bool, np.bool_)):
+                return "boolean", str(bool(v))
+            elif isinstance(v, (int, np.integer)):
+                return "long", str(int(v))
+            elif isinstance(v, (float, np.floating)):
+                return "double", repr(float(v))
+            else:
+                return "string", str(v)
 
-        warning = False
+        # First pass: declare a key for each attribute name, type and scope. GraphML requires all keys to be declared
+        # before the graph, so the attributes are scanned once without holding anything but the keys in memory.
+        keys = {}
         warning_set = set([])
-        for n in graph.nodes():
-            for attr in graph.node[n].keys():
-                if isinstance(graph.node[n][attr], list):
-                    warning = True
-                    warning_set = {'n:' + attr} | warning_set
-                    graph.node[n][attr] = list_to_scd(graph.node[n][attr])
-
-        for n1, n2, data in graph.edges(data=True):
-            for k in data:
-                if isinstance(data[k], list):
-                    warning = True
-                    warning_set = {'e:'+k} | warning_set
-                    data[k] = list_to_scd(data[k])
 
-        if warning:
+        def declare(scope, data):
+            for k, v in data.items():
+                if v is None:
+                    continue
+                if isinstance(v, list):
+                    warning_set.add(scope[0] + ':' + k)
+                key = (k, xml_value(v)[0], scope)
+                if key not in keys:
+                    keys[key] = "d{}".format(len(keys))
+
+        declare("graph", graph_data)
+        for n, data in self.nodes_iter(data=True):
+            declare("node", data)
+        for n1, n2, edge_key, data in self.edges_iter(data=True, keys=True):
+            declare("edge", data)
+            declare("edge", {'key': edge_key})
+
+        if len(warning_set) > 0:
             warnings.warn("The provided graph contained the vector attributes: {}. All values of vector attributes have"
                           " been converted to semicolon-delimited strings. To prevent this, remove vector attributes or"
                           " convert them to atomic attributes prior to calling .write_graphml"
                           .format(warning_set))
-        nx.write_graphml(graph, fname)
-        print("Success. Wrote GraphML file {} to {}".format(fname, os.getcwd()))
 
+        def data_lines(scope, data, indent):
+            for k, v in data.items():
+                if v is None:
+                    continue
+                attr_type, text = xml_value(v)
+                yield '{}<data key="{}">{}</data>\n'.format(indent, keys[(k, attr_type, scope)], escape(text))
+
+        def node_id(n):
+            return quoteattr(str(labels[n] if labels is not None else n))
+
+        # Second pass: stream the document, one element at a time.
+        with open_output(fname) as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+                    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                    'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+                    'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+            for (k, attr_type, scope), key_id in keys.items():
+                default = {"node": node_defaults, "edge": edge_defaults}.get(scope, {}).get(k)
+                f.write('  <key attr.name={} attr.type="{}" for="{}" id="{}"'.format(quoteattr(str(k)), attr_type,
+                                                                                     scope, key_id))
+                if default is None:
+                    f.write(' />\n')
+                else:
+                    f.write('>\n    <default>{}</default>\n  </key>\n'.format(escape(xml_value(default)[1])))
+            if 'id' in self.graph:
+                f.write('  <graph edgedefault="undirected" id={}>\n'.format(quoteattr(str(self.graph['id']))))
+            else:
+                f.write('  <graph edgedefault="undirected">\n')
+            f.writelines(data_lines("graph", graph_data, "    "))
+            for n, data in self.nodes_iter(data=True):
+                f.write('    <node id={}>\n'.format(node_id(n)))
+                f.writelines(data_lines("node", data, "      "))
+                f.write('    </node>\n')
+            for n1, n2, edge_key, data in self.edges_iter(data=True, keys=True):
+                f.write('    <edge source={} target={}>\n'.format(node_id(n1), node_id(n2)))
+                f.writelines(data_lines("edge", data, "      "))
+                f.writelines(data_lines("edge", {'key': edge_key}, "      "))
+                f.write('    </edge>\n')
+            f.write('  </graph>\n</graphml>\n')
+        logger.info("Success. Wrote GraphML file %s to %s", fname, os.getcwd())
+
+    @instrumented("MultiGraphPlus.write_tnet", records=lambda result, args: args[0].number_of_edges())
     def write_tnet(self, fname, mode_string="type", weighted=False, time_string="date", node_index_string="tnet_id",
                    weight_string='weight'):
         """
@@ -477,13 +801,13 @@ class MultiGraphPlus(nx.MultiGraph):
                     if n2 in mode1set:
                         raise ValueError(
                             "The nodes '{}' and '{}' have an edge and the same type. "
-                            "The network must be purely 2-mode.".format(n1, n2))
+                            "The network must be purely 2-mode.".format(self.label(n1), self.label(n2)))
                 elif n2 in mode1set:
                     n1, n2 = n2, n1
                 else:
                     raise ValueError(
                         "The nodes '{}' and '{}' have an edge and the same type. "
-                        "The network must be purely 2-mode.".format(n1, n2))
+                        "The network must be purely 2-mode.".format(self.label(n1), self.label(n2)))
 
                 if time_string is not None and time_string in eDict:
                     edt = eDict[time_string]
@@ -506,4 +830,120 @@ class MultiGraphPlus(nx.MultiGraph):
                     f.write(" {}\n".format(weight))
                 else:
                     f.write("\n")
-        print("Success. Wrote Tnet file {} to {}".format(fname, os.getcwd()))
+        logger.info("Success. Wrote Tnet file %s to %s", fname, os.getcwd())
+
+    def save(self, path, compressed=False):
+        """
+        Saves the network in gitnet's binary format, which stores edges as integer arrays and attributes as typed
+        columns, and preserves list (vector) attributes exactly. Networks can be read back with `MultiGraphPlus.load`.
+
+        **Parameters** :
+
+        > *path* : `string`
+
+        >> The path to write to. Paths ending in `.npz` are written as a single NumPy archive. Any other path is
+        >> written as a directory of `.npy` files, which can be memory-mapped when loaded.
+
+        > *compressed* : `bool`
+
+        >> Whether a `.npz` archive should be compressed. Compressed archives are smaller, but slower to write and read.
+
+        **Return** : `None`
+
+        **Note** :
+
+        > Attribute values must be strings, numbers, booleans, None, or lists of these.
+
+        """
+        nodes = self.nodes()
+        index = {n: i for i, n in enumerate(nodes)}
+        node_data = [self.node[n] for n in nodes]
+        node_attrs = list(dict.fromkeys(k for data in node_data for k in data))
+        arrays = {}
+        storage.add_column(arrays, "nodes", nodes, "node ids")
+        for i, k in enumerate(node_attrs):
+            storage.add_column(arrays, "node_attr{}".format(i), [data.get(k, storage.MISSING) for data in node_data], k)
+        src = []
+        dst = []
+        keys = []
+        edge_data = []
+        for n1, n2, key, data in self.edges_iter(keys=True, data=True):
+            src.append(index[n1])
+            dst.append(index[n2])
+            keys.append(key)
+            edge_data.append(data)
+        arrays["edges_src"] = np.array(src, dtype=np.int64)
+        arrays["edges_dst"] = np.array(dst, dtype=np.int64)
+        storage.add_column(arrays, "edges_key", keys, "edge keys")
+        edge_attrs = list(dict.fromkeys(k for data in edge_data for k in data))
+        for i, k in enumerate(edge_attrs):
+            storage.add_column(arrays, "edge_attr{}".format(i), [data.get(k, storage.MISSING) for data in edge_data], k)
+        if self.labels is not None:
+            storage.add_column(arrays, "labels", list(self.labels), "labels")
+        meta = {"mode1": self.mode1,
+                "mode2": self.mode2,
+                "labels": self.labels is not None,
+                "node_attrs": node_attrs,
+                "edge_attrs": edge_attrs,
+                "graph": self.graph}
+        storage.write_arrays(path, arrays, meta, compressed=compressed)
+        logger.info("Success. Wrote network file %s to %s", path, os.getcwd())
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """
+        Loads a network saved by `MultiGraphPlus.save`.
+
+        **Parameters** :
+
+        > *path* : `string`
+
+        >> The `.npz` file or directory to read.
+
+        > *mmap* : `bool`
+
+        >> If True, the arrays of a directory are memory-mapped rather than read into memory before the network is
+        >> built, which reduces peak memory use for very large networks.
+
+        **Return** : `MultiGraphPlus`
+
+        > The saved network, including its node and edge attributes, edge keys, modes and labels.
+
+        """
+        arrays, meta = storage.read_arrays(path, mmap=mmap)
+        graph = cls()
+        graph.mode1 = meta["mode1"]
+        graph.mode2 = meta["mode2"]
+        graph.graph.update(meta["graph"])
+        if meta["labels"]:
+            graph.labels = storage.get_column(arrays, "labels")
+        nodes = storage.get_column(arrays, "nodes")
+        node_data = [{} for n in nodes]
+        for i, k in enumerate(meta["node_attrs"]):
+            for data, v in zip(node_data, storage.get_column(arrays, "node_attr{}".format(i))):
+                if v is not storage.MISSING:
+                    data[k] = v
+        keys = storage.get_column(arrays, "edges_key")
+        edge_data = [{} for key in keys]
+        for i, k in enumerate(meta["edge_attrs"]):
+            for data, v in zip(edge_data, storage.get_column(arrays, "edge_attr{}".format(i))):
+                if v is not storage.MISSING:
+                    data[k] = v
+        # The adjacency structure is filled in directly, as networkx's own subgraph and copy methods do, since
+        # add_edge would repeat checks which the saved network has already passed.
+        adj = graph.adj
+        for n, data in zip(nodes, node_data):
+            graph.node[n] = data
+            adj[n] = {}
+        for u, v, key, data in zip(arrays["edges_src"].tolist(), arrays["edges_dst"].tolist(), keys, edge_data):
+            n1 = nodes[u]
+            n2 = nodes[v]
+            neighbours = adj[n1]
+            if n2 in neighbours:
+                neighbours[n2][key] = data
+            else:
+                keydict = {key: data}
+                neighbours[n2] = keydict
+                adj[n2][n1] = keydict
+        logger.info("Success. Read network file %s", path)
+        return graph
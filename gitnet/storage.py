@@ -0,0 +1,742 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import os
+import json
+import shutil
+import numpy as np
+from collections.abc import Mapping, ItemsView, ValuesView
+from gitnet.exceptions import InputError
+
+# Columns of attribute values are stored as plain NumPy arrays, so that they can be written to .npz archives or
+# memory-mapped .npy files without pickling. Each row of a column is missing, None, an atomic value or a list of
+# atomic values. The atomic values ("items") of all rows are kept in order, in one typed pool per item type.
+
+MISSING = object()
+
+FORMAT_VERSION = 1
+
+# Row kinds.
+_ABSENT, _NONE, _SCALAR, _LIST = 0, 1, 2, 3
+
+# Item type codes.
+_ITEM_NONE, _ITEM_BOOL, _ITEM_INT, _ITEM_FLOAT, _ITEM_STR = 0, 1, 2, 3, 4
+
+_item_codes = {type(None): _ITEM_NONE, bool: _ITEM_BOOL, int: _ITEM_INT, float: _ITEM_FLOAT, str: _ITEM_STR}
+
+
+def encode_strings(strings):
+    """
+    Encodes a list of strings as a single UTF-8 byte array and an array of offsets, where the i-th string is
+    `data[offsets[i]:offsets[i + 1]]`.
+
+    **Parameters** :
+
+    > *strings* : `list`
+
+    >> A list of strings.
+
+    **Return** : `tuple`
+
+    > A tuple of the byte array (`numpy.uint8`) and the offset array (`numpy.int64`, one longer than `strings`).
+    """
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(data, offsets):
+    """
+    Decodes the strings encoded by `encode_strings`.
+
+    **Parameters** :
+
+    > *data* : `numpy.ndarray`
+
+    >> The byte array.
+
+    > *offsets* : `numpy.ndarray`
+
+    >> The offset array.
+
+    **Return** : `list`
+
+    > A list of strings.
+    """
+    buf = np.asarray(data).tobytes()
+    bounds = np.asarray(offsets).tolist()
+    return [buf[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def _item_code(v):
+    code = _item_codes.get(type(v))
+    if code is not None:
+        return code
+    elif isinstance(v, np.bool_):
+        return _ITEM_BOOL
+    elif isinstance(v, np.integer):
+        return _ITEM_INT
+    elif isinstance(v, np.floating):
+        return _ITEM_FLOAT
+    elif isinstance(v, str):
+        return _ITEM_STR
+    raise TypeError(type(v).__name__)
+
+
+def encode_column(values, name="column"):
+    """
+    Encodes a column of attribute values as a dictionary of NumPy arrays.
+
+    **Parameters** :
+
+    > *values* : `list`
+
+    >> The values of the column. Use `storage.MISSING` for rows which do not have the attribute.
+
+    > *name* : `str`
+
+    >> The name of the column, used in error messages.
+
+    **Return** : `dict`
+
+    > A dictionary mapping array names ("kind", "counts", "codes", "bool", "int", "float", "str_data" and
+    > "str_offsets") to arrays.
+
+    """
+    kinds = np.empty(len(values), dtype=np.uint8)
+    counts = []
+    items = []
+    for i, v in enumerate(values):
+        if v is MISSING:
+            kinds[i] = _ABSENT
+        elif v is None:
+            kinds[i] = _NONE
+        elif isinstance(v, list):
+            kinds[i] = _LIST
+            counts.append(len(v))
+            items.extend(v)
+        else:
+            kinds[i] = _SCALAR
+            items.append(v)
+    get_code = _item_codes.get
+    try:
+        codes = [get_code(type(v)) for v in items]
+        if None in codes:
+            codes = [_item_code(v) for v in items]
+    except TypeError as e:
+        raise InputError("The attribute {} has values of type {}, which cannot be saved. Supported values are str, "
+                         "int, float, bool, None and lists of these.".format(name, e))
+    codes = np.array(codes, dtype=np.uint8)
+    pool = np.empty(len(items), dtype=object)
+    pool[:] = items
+    str_data, str_offsets = encode_strings(pool[codes == _ITEM_STR].tolist())
+    return {"kind": kinds,
+            "counts": np.array(counts, dtype=np.int64),
+            "codes": codes,
+            "bool": np.array(pool[codes == _ITEM_BOOL].tolist(), dtype=bool),
+            "int": np.array(pool[codes == _ITEM_INT].tolist(), dtype=np.int64),
+            "float": np.array(pool[codes == _ITEM_FLOAT].tolist(), dtype=np.float64),
+            "str_data": str_data,
+            "str_offsets": str_offsets}
+
+
+def decode_column(arrays):
+    """
+    Decodes a column encoded by `encode_column`.
+
+    **Parameters** :
+
+    > *arrays* : `dict`
+
+    >> The dictionary of arrays returned by `encode_column`.
+
+    **Return** : `list`
+
+    > The values of the column, with `storage.MISSING` for rows which did not have the attribute.
+
+    """
+    kinds = np.asarray(arrays["kind"])
+    codes = np.asarray(arrays["codes"])
+    items = np.empty(len(codes), dtype=object)
+    items[codes == _ITEM_BOOL] = np.asarray(arrays["bool"]).tolist()
+    items[codes == _ITEM_INT] = np.asarray(arrays["int"]).tolist()
+    items[codes == _ITEM_FLOAT] = np.asarray(arrays["float"]).tolist()
+    items[codes == _ITEM_STR] = decode_strings(arrays["str_data"], arrays["str_offsets"])
+    items = items.tolist()
+    if np.all(kinds == _SCALAR):
+        return items
+    sizes = np.zeros(len(kinds), dtype=np.int64)
+    sizes[kinds == _SCALAR] = 1
+    sizes[kinds == _LIST] = arrays["counts"]
+    ends = np.cumsum(sizes).tolist()
+    values = []
+    for kind, end, size in zip(kinds.tolist(), ends, sizes.tolist()):
+        if kind == _SCALAR:
+            values.append(items[end - 1])
+        elif kind == _LIST:
+            values.append(items[end - size:end])
+        elif kind == _NONE:
+            values.append(None)
+        else:
+            values.append(MISSING)
+    return values
+
+
+def column_array(values):
+    """
+    Converts a column of attribute values to the NumPy array used for it in a dataframe. Columns of integers, floats or
+    booleans get the matching dtype; numbers with missing values become floats, with NaN for missing values. Other
+    columns are object arrays, with NaN for missing values, as in `pandas.DataFrame.from_dict`.
+
+    **Parameters** :
+
+    > *values* : `list`
+
+    >> The values of the column. Use `storage.MISSING` for rows which do not have the attribute.
+
+    **Return** : `numpy.ndarray`
+
+    """
+    types = set(map(type, values))
+    if types and types <= {int, float, bool, type(MISSING)}:
+        if types == {bool}:
+            return np.array(values, dtype=bool)
+        if bool not in types:
+            try:
+                if types == {int}:
+                    return np.array(values, dtype=np.int64)
+                return np.array([np.nan if v is MISSING else v for v in values], dtype=np.float64)
+            except OverflowError:
+                pass
+    column = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        column[i] = np.nan if v is MISSING else v
+    return column
+
+
+def write_arrays(path, arrays, meta, compressed=False):
+    """
+    Writes a dictionary of arrays, along with a JSON-serializable metadata dictionary. Paths ending in `.npz` are
+    written as a single (optionally compressed) NumPy archive. Any other path is treated as a directory, in which each
+    array is written as a `.npy` file that can be memory-mapped when read.
+
+    **Parameters** :
+
+    > *path* : `str`
+
+    >> The file or directory to write.
+
+    > *arrays* : `dict`
+
+    >> A dictionary mapping names to arrays. Names must be valid file names.
+
+    > *meta* : `dict`
+
+    >> A dictionary of metadata, which must be serializable as JSON.
+
+    > *compressed* : `bool`
+
+    >> Whether a `.npz` archive should be compressed.
+
+    **Return** : `None`
+    """
+    try:
+        meta_json = json.dumps(dict(meta, format=FORMAT_VERSION))
+    except TypeError as e:
+        raise InputError("The metadata could not be saved: {}".format(e))
+    arrays = dict(arrays, meta=np.frombuffer(meta_json.encode("utf-8"), dtype=np.uint8))
+    if path.endswith(".npz"):
+        if compressed:
+            np.savez_compressed(path, **arrays)
+        else:
+            np.savez(path, **arrays)
+    else:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for k, a in arrays.items():
+            np.save(os.path.join(path, k + ".npy"), a)
+
+
+def read_arrays(path, mmap=False):
+    """
+    Reads the arrays and metadata written by `write_arrays`.
+
+    **Parameters** :
+
+    > *path* : `str`
+
+    >> The `.npz` file or directory to read.
+
+    > *mmap* : `bool`
+
+    >> If True, arrays in a directory are memory-mapped instead of read into memory.
+
+    **Return** : `tuple`
+
+    > A tuple of the dictionary of arrays and the metadata dictionary.
+    """
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as archive:
+            arrays = {k: archive[k] for k in archive.files}
+    elif os.path.isdir(path):
+        arrays = {}
+        for fname in os.listdir(path):
+            if fname.endswith(".npy"):
+                arrays[fname[:-4]] = np.load(os.path.join(path, fname), mmap_mode="r" if mmap else None,
+                                             allow_pickle=False)
+    else:
+        raise InputError("{} is not a .npz file or a directory of .npy files.".format(path))
+    if "meta" not in arrays:
+        raise InputError("{} does not contain gitnet metadata.".format(path))
+    meta = json.loads(np.asarray(arrays.pop("meta")).tobytes().decode("utf-8"))
+    if meta.get("format", 0) > FORMAT_VERSION:
+        raise InputError("{} was written by a newer version of gitnet (format {}).".format(path, meta["format"]))
+    return arrays, meta
+
+
+def add_column(arrays, prefix, values, name="column"):
+    """Encodes a column with `encode_column`, adding its arrays to `arrays` under names beginning with `prefix`."""
+    for k, a in encode_column(values, name).items():
+        arrays["{}_{}".format(prefix, k)] = a
+
+
+def get_column(arrays, prefix):
+    """Decodes the column added to `arrays` by `add_column` under `prefix`."""
+    return decode_column({k: arrays["{}_{}".format(prefix, k)] for k in ["kind", "counts", "codes", "bool", "int",
+                                                                           "float", "str_data", "str_offsets"]})
+
+
+# Memory-mapped record stores. A store is a directory holding one column per tag (plus a column of record keys), in
+# which each column also records where each row's items start ("starts") and where each item sits in its type's
+# pool ("pool_pos"), so that single rows and runs of rows can be decoded without reading the rest of the column.
+
+_pool_names = {_ITEM_BOOL: "bool", _ITEM_INT: "int", _ITEM_FLOAT: "float"}
+
+
+class _ColumnWriter(object):
+    """Appends encoded chunks of one column to raw files, tracking the running offsets needed to index it."""
+
+    dtypes = {"kind": np.uint8, "starts": np.int64, "codes": np.uint8, "pool_pos": np.int64, "bool": bool,
+              "int": np.int64, "float": np.float64, "str_data": np.uint8, "str_offsets": np.int64}
+
+    def __init__(self, path, prefix, rows):
+        self.path = path
+        self.prefix = prefix
+        self.files = {k: open(self._raw(k), "wb") for k in self.dtypes}
+        self.lengths = dict.fromkeys(self.dtypes, 0)
+        self.items = 0
+        self.pools = dict.fromkeys(range(5), 0)
+        self.str_bytes = 0
+        # Rows written before the column first appeared have no value.
+        self._write("kind", np.zeros(rows, dtype=np.uint8))
+        self._write("starts", np.zeros(rows + 1, dtype=np.int64))
+        self._write("str_offsets", np.zeros(1, dtype=np.int64))
+
+    def _raw(self, k):
+        return os.path.join(self.path, "{}_{}.raw".format(self.prefix, k))
+
+    def _write(self, k, a):
+        a = np.ascontiguousarray(a, dtype=self.dtypes[k])
+        self.files[k].write(a.tobytes())
+        self.lengths[k] += len(a)
+
+    def append(self, values, name):
+        enc = encode_column(values, name)
+        kinds = enc["kind"]
+        sizes = np.zeros(len(kinds), dtype=np.int64)
+        sizes[kinds == _SCALAR] = 1
+        sizes[kinds == _LIST] = enc["counts"]
+        codes = enc["codes"]
+        pool_pos = np.zeros(len(codes), dtype=np.int64)
+        for code in range(1, 5):
+            mask = codes == code
+            n = int(mask.sum())
+            pool_pos[mask] = np.arange(n) + self.pools[code]
+            self.pools[code] += n
+        self._write("kind", kinds)
+        self._write("starts", np.cumsum(sizes) + self.items)
+        self._write("codes", codes)
+        self._write("pool_pos", pool_pos)
+        for k in ["bool", "int", "float", "str_data"]:
+            self._write(k, enc[k])
+        self._write("str_offsets", enc["str_offsets"][1:] + self.str_bytes)
+        self.items += len(codes)
+        self.str_bytes += len(enc["str_data"])
+
+    def close(self):
+        # Turn each raw file into a .npy file by writing a header and copying the data after it.
+        for k, f in self.files.items():
+            f.close()
+            with open(os.path.join(self.path, "{}_{}.npy".format(self.prefix, k)), "wb") as out:
+                header = {"descr": np.lib.format.dtype_to_descr(np.dtype(self.dtypes[k])),
+                          "fortran_order": False,
+                          "shape": (self.lengths[k],)}
+                np.lib.format.write_array_header_1_0(out, header)
+                with open(self._raw(k), "rb") as raw:
+                    shutil.copyfileobj(raw, out, 16777216)
+            os.remove(self._raw(k))
+
+
+def write_store(path, records, meta, chunk_size=50000):
+    """
+    Writes records to a memory-mappable store, which can be opened with `MappedCollection`. Records are consumed in
+    chunks, so memory use depends on `chunk_size` rather than on the number of records.
+
+    **Parameters** :
+
+    > *path* : `str`
+
+    >> The directory to write to. It is created if it does not exist.
+
+    > *records* : `iterable`
+
+    >> An iterable of (key, record dictionary) pairs. Keys and values must be strings, numbers, booleans, None, or
+    >> (for values) lists of these.
+
+    > *meta* : `dict`
+
+    >> A dictionary of metadata, which must be serializable as JSON. It is returned by `MappedCollection.meta`.
+
+    > *chunk_size* : `int`
+
+    >> The number of records encoded at a time.
+
+    **Return** : `int`
+
+    > The number of records written.
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    if os.path.exists(os.path.join(path, "meta.npy")):
+        os.remove(os.path.join(path, "meta.npy"))
+    tags = []
+    writers = {"key": _ColumnWriter(path, "key", 0)}
+    rows = 0
+    records = iter(records)
+    while True:
+        chunk = [r for i, r in zip(range(chunk_size), records)]
+        if len(chunk) == 0:
+            break
+        for key, record in chunk:
+            for tag in record:
+                if tag not in writers:
+                    writers[tag] = _ColumnWriter(path, "tag{}".format(len(tags)), rows)
+                    tags.append(tag)
+        writers["key"].append([key for key, record in chunk], "key")
+        for tag in tags:
+            writers[tag].append([record.get(tag, MISSING) for key, record in chunk], tag)
+        rows += len(chunk)
+    for w in writers.values():
+        w.close()
+    # The metadata is written last, so that an interrupted write cannot be mistaken for a complete store.
+    write_arrays(path, {}, dict(meta, tags=tags, rows=rows))
+    return rows
+
+
+class StoredCollection(Mapping):
+    """
+    Base class for read-only, dictionary-like collections of records which are kept on disk rather than in memory.
+    `Log` methods use its extra methods to read single tags, to filter into new views of the same store, and to
+    generate edges without decoding whole records. Subclasses must provide `__getitem__`, `__iter__` and `__len__`,
+    and may override the other methods with faster versions.
+
+    `copy.deepcopy` of a stored collection (and so of a `Log` holding one) is an ordinary dictionary of its records,
+    held in memory, so that the copy can be modified. Use `subset` for another read-only view of the store.
+    """
+
+    def __deepcopy__(self, memo):
+        return {key: record for key, record in self.items()}
+
+    def attributes(self):
+        """Returns the set of tags which have a value in at least one record."""
+        attr = set()
+        for record in self.values():
+            attr.update(record.keys())
+        return attr
+
+    def column(self, tag):
+        """
+        Returns the values of a tag for every record, in order, with `storage.MISSING` for records without the tag.
+        """
+        return [record.get(tag, MISSING) for record in self.values()]
+
+    def array(self, tag):
+        """
+        Returns a numeric column as a NumPy array read directly from the store, or None if the store does not keep
+        the column in that form.
+        """
+        return None
+
+    def iter_column(self, tag):
+        """Yields the values of a tag for every record, in order, as `column` does, without building a list."""
+        for record in self.values():
+            yield record.get(tag, MISSING)
+
+    def subset(self, keys):
+        """Returns a view of the same store containing only the given keys, in the store's order."""
+        return SubsetView(self, keys)
+
+    def pushdown(self, tag, fun, match, negate=False):
+        """
+        Returns a view containing only the records which match a `Log.filter` predicate, evaluated by the store, or
+        None if the store cannot evaluate the predicate itself.
+        """
+        return None
+
+    def edges(self, mode1, mode2, helper, edge_attributes):
+        """
+        Returns an iterable of the edges `Log.generate_edges` would produce, read directly from the store, or None if
+        the store cannot produce them itself.
+        """
+        return None
+
+
+class SubsetView(StoredCollection):
+    """
+    A read-only view of some of the records of another `StoredCollection`, in its order. Records are looked up in
+    the underlying collection when they are accessed. The default result of `StoredCollection.subset`.
+    """
+
+    def __init__(self, base, keys):
+        wanted = set(keys)
+        self.base = base
+        self.meta = getattr(base, "meta", {})
+        self._keys = [key for key in base if key in wanted]
+        self._key_set = set(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    def __getitem__(self, key):
+        if key not in self._key_set:
+            raise KeyError(key)
+        return self.base[key]
+
+
+class MappedCollection(StoredCollection):
+    """
+    A read-only, dictionary-like view of the records in a store written by `write_store`. Column files are
+    memory-mapped, so records are read from disk (through the operating system's page cache) only when they are
+    accessed, and several processes can share one store. Only the record keys are held in memory.
+
+    Iterating over `items()` or `values()` decodes records a chunk at a time, which is much faster than looking up
+    records one by one. `column(tag)` decodes a single tag without touching the other columns.
+    """
+
+    chunk_size = 10000
+
+    def __init__(self, path):
+        arrays, meta = read_arrays(path, mmap=True)
+        self.path = path
+        self.meta = meta
+        self.tags = meta["tags"]
+        self._arrays = arrays
+        self._keys = self._decode("key", np.arange(meta["rows"]))
+        self._index = {}
+        for i, key in enumerate(self._keys):
+            self._index[key] = i
+        if len(self._index) == len(self._keys):
+            self._rows = np.arange(len(self._keys))
+        else:
+            # As with a dictionary, a repeated key refers to its last record.
+            self._rows = np.array(sorted(self._index.values()), dtype=np.int64)
+
+    def subset(self, keys):
+        """Returns a view of the same store containing only the given keys, in the store's order."""
+        view = object.__new__(MappedCollection)
+        view.__dict__.update(self.__dict__)
+        rows = np.array([self._index[k] for k in keys], dtype=np.int64)
+        view._rows = np.intersect1d(rows, self._rows)
+        return view
+
+    def __reduce__(self):
+        return _open_view, (self.path, self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        keys = self._keys
+        for r in self._rows.tolist():
+            yield keys[r]
+
+    def __contains__(self, key):
+        r = self._index.get(key)
+        if r is None:
+            return False
+        i = np.searchsorted(self._rows, r)
+        return i < len(self._rows) and self._rows[i] == r
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return self._records(np.array([self._index[key]], dtype=np.int64))[0]
+
+    def items(self):
+        return _MappedItems(self)
+
+    def values(self):
+        return _MappedValues(self)
+
+    def column(self, tag, rows=None):
+        """
+        Returns the values of a tag for every record, in order, with `storage.MISSING` for records without the tag.
+        """
+        if rows is None:
+            rows = self._rows
+        if tag not in self.tags:
+            return [MISSING] * len(rows)
+        prefix = "tag{}".format(self.tags.index(tag))
+        values = []
+        for start in range(0, len(rows), self.chunk_size * 10):
+            values.extend(self._decode(prefix, rows[start:start + self.chunk_size * 10]))
+        return values
+
+    def attributes(self):
+        return set(tag for tag in self.tags if self.present(tag))
+
+    def iter_column(self, tag):
+        if tag not in self.tags:
+            for r in self._rows:
+                yield MISSING
+            return
+        prefix = "tag{}".format(self.tags.index(tag))
+        for start in range(0, len(self._rows), self.chunk_size):
+            for value in self._decode(prefix, self._rows[start:start + self.chunk_size]):
+                yield value
+
+    def array(self, tag):
+        # Columns whose rows are all scalars of one numeric type are slices of that type's pool. When the view covers
+        #   the whole store, the pool is the column, and is returned as a memory-mapped array without copying.
+        if tag not in self.tags or len(self._rows) == 0:
+            return None
+        a = self._arrays
+        prefix = "tag{}".format(self.tags.index(tag))
+        if not np.all(np.asarray(a[prefix + "_kind"][self._rows]) == _SCALAR):
+            return None
+        first = np.asarray(a[prefix + "_starts"][self._rows])
+        codes = np.asarray(a[prefix + "_codes"][first])
+        for code, name in _pool_names.items():
+            if np.all(codes == code):
+                pool = a[prefix + "_" + name]
+                pos = np.asarray(a[prefix + "_pool_pos"][first])
+                if len(pos) == len(pool) and np.array_equal(pos, np.arange(len(pos))):
+                    return pool
+                return np.asarray(pool[pos])
+        return None
+
+    def present(self, tag):
+        """Returns True if any record has a value for the tag."""
+        if tag not in self.tags:
+            return False
+        kinds = self._arrays["tag{}_kind".format(self.tags.index(tag))]
+        return bool(np.any(kinds[self._rows] != _ABSENT))
+
+    def _chunks(self):
+        for start in range(0, len(self._rows), self.chunk_size):
+            rows = self._rows[start:start + self.chunk_size]
+            yield rows, self._records(rows)
+
+    def _records(self, rows):
+        records = [{} for r in rows]
+        for i, tag in enumerate(self.tags):
+            for record, v in zip(records, self._decode("tag{}".format(i), rows)):
+                if v is not MISSING:
+                    record[tag] = v
+        return records
+
+    def _decode(self, prefix, rows):
+        # Decodes the values of one column for the given rows.
+        a = self._arrays
+        kinds = np.asarray(a[prefix + "_kind"][rows])
+        if len(rows) == 0 or not np.any(kinds):
+            return [MISSING] * len(rows)
+        starts = a[prefix + "_starts"]
+        first = np.asarray(starts[rows])
+        sizes = np.asarray(starts[rows + 1]) - first
+        item_rows = np.repeat(np.arange(len(rows)), sizes)
+        item_idx = np.repeat(first, sizes) + (np.arange(len(item_rows)) - np.repeat(np.cumsum(sizes) - sizes, sizes))
+        codes = np.asarray(a[prefix + "_codes"][item_idx])
+        pos = np.asarray(a[prefix + "_pool_pos"][item_idx])
+        items = np.empty(len(item_idx), dtype=object)
+        for code, name in _pool_names.items():
+            mask = codes == code
+            if mask.any():
+                items[mask] = np.asarray(a[prefix + "_" + name][pos[mask]]).tolist()
+        mask = codes == _ITEM_STR
+        if mask.any():
+            offsets = a[prefix + "_str_offsets"]
+            p = pos[mask]
+            lo = np.asarray(offsets[p])
+            hi = np.asarray(offsets[p + 1])
+            begin = int(lo.min())
+            end = int(hi.max())
+            if end - begin <= 4 * int((hi - lo).sum()) + 65536:
+                buf = np.asarray(a[prefix + "_str_data"][begin:end]).tobytes()
+                text = buf.decode("utf-8")
+                if len(text) == len(buf):
+                    # ASCII text has one character per byte, so strings can be sliced from one decoded buffer.
+                    items[mask] = [text[x:y] for x, y in zip((lo - begin).tolist(), (hi - begin).tolist())]
+                else:
+                    items[mask] = [buf[x - begin:y - begin].decode("utf-8") for x, y in zip(lo.tolist(), hi.tolist())]
+            else:
+                data = a[prefix + "_str_data"]
+                items[mask] = [data[x:y].tobytes().decode("utf-8") for x, y in zip(lo.tolist(), hi.tolist())]
+        items = items.tolist()
+        if np.all(kinds == _SCALAR):
+            return items
+        values = []
+        ends = np.cumsum(sizes).tolist()
+        for kind, end, size in zip(kinds.tolist(), ends, sizes.tolist()):
+            if kind == _SCALAR:
+                values.append(items[end - 1])
+            elif kind == _LIST:
+                values.append(items[end - size:end])
+            elif kind == _NONE:
+                values.append(None)
+            else:
+                values.append(MISSING)
+        return values
+
+
+def _open_view(path, rows):
+    view = MappedCollection(path)
+    view._rows = rows
+    return view
+
+
+class _MappedItems(ItemsView):
+
+    def __iter__(self):
+        keys = self._mapping._keys
+        for rows, records in self._mapping._chunks():
+            for r, record in zip(rows.tolist(), records):
+                yield keys[r], record
+
+
+class _MappedValues(ValuesView):
+
+    def __iter__(self):
+        for rows, records in self._mapping._chunks():
+            for record in records:
+                yield record
@@ -0,0 +1,336 @@
+# *********************************************************************************************
+# Copyright (C) 2016 Jillian Anderson, Joel Becker, Steve McColl and Dr. John McLevey
+#
+# This file is part of the gitnet package developed for Dr John McLevey's Networks Lab
+# at the University of Waterloo. For more information, see http://networkslab.org/gitnet/.
+#
+# gitnet is free software: you can redistribute it and/or modify it under the terms of a
+# GNU General Public License as published by the Free Software Foundation. gitnet is
+# distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+# the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with gitnet.
+# If not, see <http://www.gnu.org/licenses/>.
+# *********************************************************************************************
+
+import heapq
+import zlib
+import numpy as np
+from collections import Counter
+from itertools import islice
+from gitnet.exceptions import InputError
+
+# Summaries of the most frequent values of a stream, such as the authors, files or email domains of a log. top_k is
+# exact, and needs a count for every distinct value. SpaceSaving and CountMinSketch use a fixed amount of memory, and
+# give approximate counts, so that very large logs (or the logs of many repositories) can be summarized as a stream.
+
+
+def top_k(counts, n=1, minimum=1):
+    """
+    Finds the n most frequent values from a mapping of counts. If the nth most frequent value is in a tie, all of the
+    tied values are returned as well.
+
+    **Parameters**
+
+    >*counts* : `dict`
+    >> A mapping of values to their counts, such as a `collections.Counter`.
+
+    >*n* : `int`
+    >> A positive integer, defaulting to 1, indicating how many entries to return.
+
+    >*minimum* : `int`
+    >> The smallest count to return. Defaults to 1.
+
+    **Return** `list`
+    > A list of (count, value) tuples, from the most to the least frequent.
+    """
+    if n < 1:
+        return []
+    largest = heapq.nlargest(n, counts.values())
+    if len(largest) == 0:
+        return []
+    threshold = max(largest[-1], minimum)
+    items = [(count, value) for value, count in counts.items() if count >= threshold]
+    try:
+        return sorted(items, reverse=True)
+    except TypeError:
+        # Values of different types cannot be ordered, so ties keep the order of the mapping.
+        return sorted(items, key=lambda item: item[0], reverse=True)
+
+
+def count_top_k(values, n=1, minimum=1):
+    """
+    Counts the values of an iterable exactly and finds the n most frequent, as `top_k` does.
+
+    **Parameters**
+
+    >*values* : `iterable`
+    >> The values to count.
+
+    >*n* : `int`
+    >> A positive integer, defaulting to 1, indicating how many entries to return.
+
+    >*minimum* : `int`
+    >> The smallest count to return. Defaults to 1.
+
+    **Return** `list`
+    > A list of (count, value) tuples, from the most to the least frequent.
+    """
+    return top_k(Counter(values), n, minimum)
+
+
+class SpaceSaving(object):
+    """
+    A Space-Saving summary of a stream, keeping counts for at most `capacity` values. When a new value arrives and the
+    summary is full, the value with the smallest count is replaced, and the new value inherits that count as its error.
+    Every value occurring more than (total / capacity) times is kept, and no count is low by more than its error.
+    """
+
+    def __init__(self, capacity=1000):
+        """
+        Creates an empty summary.
+
+        **Parameters** :
+
+        > *capacity* : `int`
+
+        >> The largest number of values to keep counts for. Defaults to 1000.
+
+        """
+        if capacity < 1:
+            raise InputError("The capacity of a SpaceSaving summary must be a positive integer.")
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        # A heap with one (count, order, value) entry per monitored value. Counts in the heap are only refreshed when
+        # the smallest entry is needed, so they may be lower than the current counts, but never higher.
+        self._heap = []
+        self._order = 0
+
+    def __contains__(self, value):
+        return value in self._counts
+
+    def __getitem__(self, value):
+        """
+        Returns the estimated count of a value, which is at least its true count if the value is monitored, and 0
+        otherwise.
+        """
+        return self._counts.get(value, 0)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __str__(self):
+        return "<SpaceSaving summary of {} values, monitoring {} of capacity {}>".format(self.total, len(self),
+                                                                                     self.capacity)
+
+    def error(self, value):
+        """
+        Returns the largest amount by which the count of a monitored value can exceed its true count.
+        """
+        return self._errors.get(value, 0)
+
+    def extend(self, values):
+        """
+        Counts each value of an iterable once.
+
+        **Parameters** :
+
+        > *values* : `iterable`
+
+        >> The values to count.
+
+        **Return** : `None`
+
+        """
+        for value in values:
+            self.update(value)
+
+    def items(self):
+        """
+        Returns the monitored values and their estimated counts, as a list of (value, count) tuples.
+        """
+        return list(self._counts.items())
+
+    def top(self, n=1, minimum=1):
+        """
+        Finds the n values with the largest estimated counts, as `top_k` does.
+
+        **Parameters** :
+
+        > *n* : `int`
+
+        >> A positive integer, defaulting to 1, indicating how many entries to return.
+
+        > *minimum* : `int`
+
+        >> The smallest count to return. Defaults to 1.
+
+        **Return** : `list`
+
+        > A list of (count, value) tuples, from the most to the least frequent.
+
+        """
+        return top_k(self._counts, n, minimum)
+
+    def update(self, value, count=1):
+        """
+        Adds to the count of a value, replacing the least frequent monitored value if the summary is full.
+
+        **Parameters** :
+
+        > *value* :
+
+        >> A hashable value.
+
+        > *count* : `int`
+
+        >> The number of occurrences to add. Defaults to 1. Adding the items of another summary merges the two.
+
+        **Return** : `None`
+
+        """
+        self.total += count
+        counts = self._counts
+        if value in counts:
+            counts[value] += count
+            return
+        if len(counts) < self.capacity:
+            smallest = 0
+        else:
+            smallest, old = self._pop_smallest()
+            del counts[old]
+            del self._errors[old]
+        counts[value] = smallest + count
+        self._errors[value] = smallest
+        self._order += 1
+        heapq.heappush(self._heap, (smallest + count, self._order, value))
+
+    def _pop_smallest(self):
+        """
+        Removes the value with the smallest count from the heap, and returns its count and the value. Entries whose
+        counts have grown since they were pushed are pushed again with their current counts.
+        """
+        while True:
+            count, order, value = heapq.heappop(self._heap)
+            current = self._counts[value]
+            if current == count:
+                return count, value
+            self._order += 1
+            heapq.heappush(self._heap, (current, self._order, value))
+
+
+class CountMinSketch(object):
+    """
+    A Count-Min sketch of a stream: a table of `depth` rows of `width` counters, with one hash function per row. The
+    estimated count of a value is the smallest of its counters, which is never below its true count, and exceeds it by
+    at most (e * total / width) with probability 1 - exp(-depth). Values are hashed by their string form with checksums
+    rather than `hash`, so sketches made in different processes (for example, of different repositories) can be merged.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        """
+        Creates an empty sketch.
+
+        **Parameters** :
+
+        > *width* : `int`
+
+        >> The number of counters in each row. Defaults to 2048.
+
+        > *depth* : `int`
+
+        >> The number of rows (hash functions). Defaults to 4.
+
+        """
+        if width < 1 or depth < 1:
+            raise InputError("The width and depth of a CountMinSketch must be positive integers.")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def __getitem__(self, value):
+        """
+        Returns the estimated count of a value, which is never below its true count.
+        """
+        return int(self.table[self._rows, self._columns([value])[:, 0]].min())
+
+    def __str__(self):
+        return "<CountMinSketch of {} values, {} by {}>".format(self.total, self.depth, self.width)
+
+    def _columns(self, values):
+        """
+        Returns the counters used for a list of values, as an array with a row of counters for each row of the table.
+        The hash functions of the rows are combinations of the CRC-32 and Adler-32 checksums of each value.
+        """
+        data = [str(value).encode("utf-8") for value in values]
+        first = np.array([zlib.crc32(d) for d in data], dtype=np.int64)
+        second = np.array([zlib.adler32(d) | 1 for d in data], dtype=np.int64)
+        return (first + self._rows[:, None] * second) % self.width
+
+    def extend(self, values):
+        """
+        Counts each value of an iterable once.
+
+        **Parameters** :
+
+        > *values* : `iterable`
+
+        >> The values to count.
+
+        **Return** : `None`
+
+        """
+        # Values are counted in batches, and each batch is added to the table at once.
+        values = iter(values)
+        while True:
+            batch = Counter(islice(values, 10000))
+            if len(batch) == 0:
+                break
+            columns = self._columns(list(batch))
+            counts = np.fromiter(batch.values(), dtype=np.float64, count=len(batch))
+            for row in range(self.depth):
+                self.table[row] += np.bincount(columns[row], counts, self.width).astype(np.int64)
+            self.total += int(counts.sum())
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch of the same size to this one.
+
+        **Parameters** :
+
+        > *other* : `CountMinSketch`
+
+        >> A sketch with the same width and depth.
+
+        **Return** : `None`
+
+        """
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise InputError("Only CountMinSketch objects of the same width and depth can be merged.")
+        self.table += other.table
+        self.total += other.total
+
+    def update(self, value, count=1):
+        """
+        Adds to the count of a value.
+
+        **Parameters** :
+
+        > *value* :
+
+        >> A value, identified by its string form.
+
+        > *count* : `int`
+
+        >> The number of occurrences to add. Defaults to 1.
+
+        **Return** : `None`
+
+        """
+        self.table[self._rows, self._columns([value])[:, 0]] += count
+        self.total += count
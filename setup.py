@@ -37,4 +37,7 @@ setup(
     packages=find_packages(exclude=['tests']),
     install_requires=['bash', 'networkx', 'matplotlib'],
     test_suite='gitnet.tests',
+    entry_points={
+        'console_scripts': ['gitnet=gitnet.cli:main'],
+    },
 )